@@ -0,0 +1,84 @@
+"""
+Benchmark end-to-end S11 reads of an unmodified VNA on a fake server.
+
+Starts a ``cmt_vna.testing.FakeCmtvnaServer`` on localhost, or uses
+the one given with ``--port`` (e.g. ``scripts/fake_cmtvna_server.py``
+in another process, so server and client do not share the GIL), and
+times ``VNA.measure_S11`` per sweep size and transport:
+
+- ``visa``: pyvisa-py TCPIP SOCKET resource;
+- ``socket``: raw socket with bulk ASCII parsing.
+
+Unlike ``bench_transport.py``, this runs the full trigger, ``*OPC?``,
+transfer and parse path of ``VNA`` against a server that tracks the
+sweep settings.
+
+Run with ``python benchmarks/bench_e2e.py``.
+"""
+
+import timeit
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+
+from cmt_vna import VNA
+from cmt_vna.testing import FakeCmtvnaServer, synthetic_s11
+
+
+def bench(port, npoints, number):
+    results = {}
+    for transport in ("visa", "socket"):
+        vna = VNA(ip="127.0.0.1", port=port, timeout=30, transport=transport)
+        freqs = vna.setup(npoints=npoints, ifbw=10e3)
+        np.testing.assert_allclose(
+            vna.measure_S11(), synthetic_s11(freqs), atol=1e-12
+        )
+        t = timeit.repeat(vna.measure_S11, number=number, repeat=3)
+        results[transport] = min(t) / number
+        vna.s.close()
+    return results
+
+
+def main():
+    parser = ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--npoints",
+        type=int,
+        nargs="+",
+        default=[1001, 10001, 100001],
+        help="Sweep sizes to benchmark.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="Port of a running fake server; if None, start one.",
+    )
+    parser.add_argument(
+        "-n", "--number", type=int, default=5, help="Reads per timing."
+    )
+    args = parser.parse_args()
+    server = None
+    port = args.port
+    if port is None:
+        server = FakeCmtvnaServer().start()
+        port = server.port
+    try:
+        print(f"{'npoints':>8} {'transport':>9} {'ms/read':>9} {'speedup':>8}")
+        for npoints in args.npoints:
+            res = bench(port, npoints, args.number)
+            for name, t in res.items():
+                print(
+                    f"{npoints:>8} {name:>9} {t * 1e3:>9.2f} "
+                    f"{res['visa'] / t:>7.2f}x"
+                )
+    finally:
+        if server is not None:
+            server.close()
+
+
+if __name__ == "__main__":
+    main()
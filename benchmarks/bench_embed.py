@@ -0,0 +1,137 @@
+"""
+Benchmark the out=/scratch embed and de-embed kernels.
+
+Times, per sweep size, batch of sweeps and precision:
+
+- ``old``: the previous ``calkit.de_embed_sparams``, which builds its
+  temporaries and output on every call;
+- ``new``: ``calkit.de_embed_sparams`` allocating only its output and one
+  scratch array;
+- ``out``: ``calkit.de_embed_sparams`` in place on the input with a
+  reused scratch array, as in a streaming calibration loop.
+
+Besides the time per call and sweeps/s, ``alloc`` is the peak memory
+allocated during a call (tracemalloc) in units of one output array, i.e.
+about the number of batch-sized temporaries alive at once; ``old`` and
+``new`` also hand back a freshly allocated output each call.
+
+Run with ``python benchmarks/bench_embed.py``.
+"""
+
+import timeit
+import tracemalloc
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+
+from cmt_vna.calkit import de_embed_sparams, embed_sparams
+
+DTYPES = {"c16": np.complex128, "c8": np.complex64}
+
+
+def old_de_embed(sparams, gamma_prime):
+    """The implementation ``de_embed_sparams`` replaced."""
+    s11, s12s21, s22 = sparams
+    d = gamma_prime - s11
+    gamma = d / (s12s21 + s22 * d)
+    return gamma
+
+
+def make_data(npoints, nsweeps, dtype):
+    rng = np.random.default_rng(0)
+    shape = (3, npoints)
+    sprms = 0.1 * (rng.normal(size=shape) + 1j * rng.normal(size=shape))
+    sprms[1] += 1
+    shape = (nsweeps, npoints)
+    gamma = 0.5 * (rng.normal(size=shape) + 1j * rng.normal(size=shape))
+    meas = embed_sparams(sprms, gamma)
+    return sprms.astype(dtype), meas.astype(dtype)
+
+
+def peak_alloc(fn, nbytes):
+    fn()  # warm up
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak / nbytes
+
+
+def bench(npoints, nsweeps, dtype, number):
+    sprms, meas = make_data(npoints, nsweeps, dtype)
+    buf = meas.copy()
+    scratch = np.empty_like(meas)
+
+    def old():
+        return old_de_embed(sprms, meas)
+
+    def new():
+        return de_embed_sparams(sprms, meas)
+
+    def out():
+        # restore the input so every call does the same work
+        np.copyto(buf, meas)
+        return de_embed_sparams(sprms, buf, out=buf, scratch=scratch)
+
+    tol = 1e-4 if dtype == np.complex64 else 1e-10
+    np.testing.assert_allclose(new(), old(), rtol=tol)
+    np.testing.assert_allclose(out(), old(), rtol=tol)
+    assert new().dtype == dtype
+    results = {}
+    for name, fn in {"old": old, "new": new, "out": out}.items():
+        t = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        results[name] = (t, peak_alloc(fn, meas.nbytes))
+    return results
+
+
+def main():
+    parser = ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--npoints",
+        type=int,
+        nargs="+",
+        default=[1000, 100000],
+        help="Sweep sizes to benchmark.",
+    )
+    parser.add_argument(
+        "--nsweeps",
+        type=int,
+        nargs="+",
+        default=[1, 16],
+        help="Number of sweeps per call.",
+    )
+    parser.add_argument(
+        "--dtype",
+        nargs="+",
+        choices=DTYPES,
+        default=list(DTYPES),
+        help="Precisions to benchmark.",
+    )
+    parser.add_argument(
+        "-n", "--number", type=int, default=20, help="Calls per timing."
+    )
+    args = parser.parse_args()
+    cols = ("npoints", "nsweeps", "dtype", "case", "ms/call", "sweeps/s")
+    widths = (8, 7, 5, 4, 9, 10)
+    print(
+        " ".join(f"{c:>{w}}" for c, w in zip(cols, widths)),
+        f"{'alloc':>6}",
+    )
+    for npoints in args.npoints:
+        for nsweeps in args.nsweeps:
+            for dname in args.dtype:
+                res = bench(npoints, nsweeps, DTYPES[dname], args.number)
+                for name, (t, alloc) in res.items():
+                    print(
+                        f"{npoints:>8} {nsweeps:>7} {dname:>5} {name:>4} "
+                        f"{t * 1e3:>9.3f} {nsweeps / t:>10.0f} {alloc:>6.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark one measurement cycle over several simulated VNAs.
+
+Runs ``measure_OSL`` on ``--ninstruments`` ``DummyVNA(simulate=...)``
+instruments (see ``cmt_vna.testing.TimingModel``), with a switch that
+settles in ``--switch-time``, and times, per sweep size:
+
+- ``serial``: one instrument after the other, as separate scripts
+  would without coordination;
+- ``multi``: all at once with ``cmt_vna.multi.MultiVNA``;
+- ``shared``: ``MultiVNA`` with pairs of instruments sharing one
+  switch, which take turns.
+
+``slowest`` is the longest single-instrument call of the ``multi``
+cycle, the bound its wall time should approach.
+
+Run with ``python benchmarks/bench_multi.py``.
+"""
+
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+from cmt_vna.multi import MultiVNA
+from cmt_vna.testing import DummyVNA, TimingModel
+
+
+def make_vnas(n, npoints, args):
+    def switch(state):
+        time.sleep(args.switch_time)
+
+    vnas = []
+    for i in range(n):
+        model = TimingModel(jitter=args.jitter, seed=i)
+        vna = DummyVNA(switch_fn=switch, simulate=model, transport="socket")
+        vna.setup(npoints=npoints, ifbw=args.ifbw)
+        vnas.append(vna)
+    return vnas
+
+
+def best(fn, repeat):
+    t = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        t.append(time.perf_counter() - t0)
+    return min(t)
+
+
+def bench(npoints, args):
+    vnas = make_vnas(args.ninstruments, npoints, args)
+
+    def serial():
+        for vna in vnas:
+            vna.measure_OSL()
+
+    results = {"serial": best(serial, args.repeat)}
+    with MultiVNA() as multi:
+        for i, vna in enumerate(vnas):
+            multi.add(f"vna{i}", vna)
+        results["multi"] = best(multi.measure_OSL, args.repeat)
+        slowest = max(multi.last_cycle_timing["busy"].values())
+    with MultiVNA() as multi:
+        for i, vna in enumerate(vnas):
+            multi.add(f"vna{i}", vna, shared=[f"switch{i // 2}"])
+        results["shared"] = best(multi.measure_OSL, args.repeat)
+    return slowest, results
+
+
+def main():
+    parser = ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-n",
+        "--ninstruments",
+        type=int,
+        default=4,
+        help="Number of simulated instruments.",
+    )
+    parser.add_argument(
+        "--npoints",
+        type=int,
+        nargs="+",
+        default=[201, 1001],
+        help="Sweep sizes to benchmark.",
+    )
+    parser.add_argument(
+        "--ifbw", type=float, default=10e3, help="IF bandwidth in Hz."
+    )
+    parser.add_argument(
+        "--switch-time",
+        type=float,
+        default=0.05,
+        help="Switch settling time in seconds.",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.02,
+        help="Relative jitter of simulated durations.",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Runs per timing."
+    )
+    args = parser.parse_args()
+    cols = ("npoints", "case", "ms/cycle", "slowest ms", "speedup")
+    widths = (8, 7, 9, 10, 7)
+    print(" ".join(f"{c:>{w}}" for c, w in zip(cols, widths)))
+    for npoints in args.npoints:
+        slowest, res = bench(npoints, args)
+        for name, t in res.items():
+            print(
+                f"{npoints:>8} {name:>7} {t * 1e3:>9.1f} "
+                f"{slowest * 1e3:>10.1f} {res['serial'] / t:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
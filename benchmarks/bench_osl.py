@@ -0,0 +1,101 @@
+"""
+Benchmark the closed-form OSL solver against np.linalg.solve.
+
+Times, per sweep size and batch of OSL sets:
+
+- ``solve``: the previous ``calkit.network_sparams``, which builds an
+  (N, 3, 3) matrix stack and calls ``np.linalg.solve``, looped over the
+  batch;
+- ``closed``: the broadcast closed-form ``calkit.network_sparams`` on
+  the whole (T, 3, N) batch at once.
+
+Run with ``python benchmarks/bench_osl.py``.
+"""
+
+import timeit
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+
+from cmt_vna.calkit import S911T, embed_sparams, network_sparams
+
+
+def solve_sparams(gamma_true, gamma_meas):
+    """The np.linalg.solve implementation ``network_sparams`` replaced."""
+    gamma_true = np.array(gamma_true, dtype=complex).T
+    gamma_meas = np.array(gamma_meas, dtype=complex).T
+    mat = np.stack(
+        [np.ones_like(gamma_true), gamma_true, gamma_true * gamma_meas],
+        axis=-1,
+    )
+    sparams = np.linalg.solve(mat, gamma_meas[..., np.newaxis])[..., 0].T
+    sparams[1] += sparams[0] * sparams[2]
+    return sparams
+
+
+def make_osl(npoints, nsets):
+    freqs = np.linspace(1e6, 250e6, npoints)
+    model = S911T(freq_Hz=freqs).std_gamma
+    rng = np.random.default_rng(0)
+    shape = (3, nsets, npoints)
+    sprms = 0.1 * (rng.normal(size=shape) + 1j * rng.normal(size=shape))
+    sprms[1] += 1
+    # (standard, set, freq) -> (set, standard, freq)
+    meas = embed_sparams(sprms, model[:, np.newaxis])
+    return model, np.moveaxis(meas, 0, 1)
+
+
+def bench(npoints, nsets, number):
+    model, meas = make_osl(npoints, nsets)
+
+    def solve():
+        return np.array([solve_sparams(model, m) for m in meas])
+
+    def closed():
+        return network_sparams(model, meas)
+
+    np.testing.assert_allclose(closed(), solve(), rtol=1e-9, atol=1e-12)
+    results = {}
+    for name, fn in {"solve": solve, "closed": closed}.items():
+        t = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        results[name] = t
+    return results
+
+
+def main():
+    parser = ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--npoints",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+        help="Sweep sizes to benchmark.",
+    )
+    parser.add_argument(
+        "--nsets",
+        type=int,
+        nargs="+",
+        default=[1, 100],
+        help="Number of OSL sets per call.",
+    )
+    parser.add_argument(
+        "-n", "--number", type=int, default=5, help="Calls per timing."
+    )
+    args = parser.parse_args()
+    cols = ("npoints", "nsets", "case", "ms/call", "speedup")
+    print(" ".join(f"{c:>{w}}" for c, w in zip(cols, (8, 6, 7, 9, 8))))
+    for npoints in args.npoints:
+        for nsets in args.nsets:
+            res = bench(npoints, nsets, args.number)
+            for name, t in res.items():
+                print(
+                    f"{npoints:>8} {nsets:>6} {name:>7} {t * 1e3:>9.3f} "
+                    f"{res['solve'] / t:>7.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark measurement cadence on the simulated VNA.
+
+Runs ``DummyVNA(simulate=...)``, whose resource takes as long as the
+R60 would to sweep, answer and transfer (see
+``cmt_vna.testing.TimingModel``), and times, per sweep size:
+
+- ``serial`` / ``pipelined``: ``measure_OSL`` with the switch to the
+  next standard run after / during the readout of the previous sweep,
+  with a switch that settles in ``--switch-time``;
+- ``batch``: ``measure_S11_batch`` sweeps per second.
+
+Change the scheduling code and rerun to compare against the numbers
+of the previous version.
+
+Run with ``python benchmarks/bench_sequence.py``.
+"""
+
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+from cmt_vna.testing import DummyVNA, TimingModel
+
+
+def bench(npoints, args):
+    model = TimingModel(jitter=args.jitter, seed=0)
+
+    def switch(state):
+        time.sleep(args.switch_time)
+
+    vna = DummyVNA(switch_fn=switch, simulate=model, transport="socket")
+    vna.setup(npoints=npoints, ifbw=args.ifbw)
+    results = {}
+    for name, pipelined in {"serial": False, "pipelined": True}.items():
+        vna.pipelined = pipelined
+        t = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            vna.measure_OSL()
+            t.append(time.perf_counter() - t0)
+        results[name] = min(t)
+    t0 = time.perf_counter()
+    vna.measure_S11_batch(args.repeat)
+    results["batch"] = (time.perf_counter() - t0) / args.repeat
+    return model.sweep_time(npoints, args.ifbw), results
+
+
+def main():
+    parser = ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--npoints",
+        type=int,
+        nargs="+",
+        default=[201, 1001],
+        help="Sweep sizes to benchmark.",
+    )
+    parser.add_argument(
+        "--ifbw", type=float, default=10e3, help="IF bandwidth in Hz."
+    )
+    parser.add_argument(
+        "--switch-time",
+        type=float,
+        default=0.05,
+        help="Switch settling time in seconds.",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.02,
+        help="Relative jitter of simulated durations.",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Runs per timing."
+    )
+    args = parser.parse_args()
+    cols = ("npoints", "sweep ms", "case", "ms/call", "sweeps/s")
+    widths = (8, 9, 9, 9, 9)
+    print(" ".join(f"{c:>{w}}" for c, w in zip(cols, widths)))
+    for npoints in args.npoints:
+        sweep, res = bench(npoints, args)
+        for name, t in res.items():
+            nsweeps = 1 if name == "batch" else 3
+            print(
+                f"{npoints:>8} {sweep * 1e3:>9.1f} {name:>9} "
+                f"{t * 1e3:>9.1f} {nsweeps / t:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
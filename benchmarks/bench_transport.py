@@ -0,0 +1,136 @@
+"""
+Benchmark the raw-socket SDAT read path against the pyvisa path.
+
+Serves a synthetic ``CALC:DATA:SDAT?`` reply from a loopback responder
+and times, per sweep size:
+
+- ``visa``: pyvisa-py TCPIP SOCKET resource, ``query_ascii_values`` and
+  the slice-based re/im de-interleave ``VNA.measure_S11`` used to do;
+- ``socket``: ``SocketResource.query_ascii_array`` into a preallocated
+  buffer, viewed as complex128;
+- ``parse-visa`` / ``parse-bulk``: the parse step alone, on an
+  in-memory reply.
+
+Run with ``python benchmarks/bench_transport.py``.
+"""
+
+import socket
+import threading
+import timeit
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+import pyvisa
+from pyvisa.util import from_ascii_block
+
+from cmt_vna.transport import (
+    SocketResource,
+    format_ascii_array,
+    parse_ascii_array,
+)
+
+
+class Responder:
+    """Answer every query line with ``payload``; ignore writes."""
+
+    def __init__(self, payload):
+        self.payload = payload + b"\n"
+        self._lsock = socket.create_server(("127.0.0.1", 0))
+        self._lsock.listen()
+        self.port = self._lsock.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._lsock.accept()
+            except OSError:
+                return
+            threading.Thread(
+                target=self._serve, args=(conn,), daemon=True
+            ).start()
+
+    def _serve(self, conn):
+        with conn, conn.makefile("rb") as f:
+            for line in f:
+                if line.strip().endswith(b"?"):
+                    conn.sendall(self.payload)
+
+    def close(self):
+        self._lsock.close()
+
+
+def bench(npoints, number):
+    values = np.random.default_rng(0).normal(size=2 * npoints)
+    payload = format_ascii_array(values)
+    text = payload.decode()
+    srv = Responder(payload)
+    cmd = "CALC:DATA:SDAT?"
+
+    rm = pyvisa.ResourceManager("@py")
+    visa = rm.open_resource(f"TCPIP::127.0.0.1::{srv.port}::SOCKET")
+    visa.read_termination = "\n"
+    visa.timeout = 60000
+    sock = SocketResource("127.0.0.1", srv.port, timeout=60000)
+    gamma = np.empty(npoints, dtype=np.complex128)
+    flat = gamma.view(np.float64)
+
+    def visa_read():
+        data = visa.query_ascii_values(cmd, container=np.array)
+        return data[0::2] + 1j * data[1::2]
+
+    def socket_read():
+        sock.query_ascii_array(cmd, out=flat)
+        return gamma
+
+    def parse_visa():
+        data = from_ascii_block(text, container=np.array)
+        return data[0::2] + 1j * data[1::2]
+
+    def parse_bulk():
+        return parse_ascii_array(payload, out=flat)
+
+    cases = {
+        "visa": visa_read,
+        "socket": socket_read,
+        "parse-visa": parse_visa,
+        "parse-bulk": parse_bulk,
+    }
+    np.testing.assert_allclose(visa_read(), socket_read())
+    results = {}
+    for name, fn in cases.items():
+        t = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        results[name] = t
+    visa.close()
+    sock.close()
+    rm.close()
+    srv.close()
+    return results
+
+
+def main():
+    parser = ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--npoints",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="Sweep sizes to benchmark.",
+    )
+    parser.add_argument(
+        "-n", "--number", type=int, default=5, help="Calls per timing."
+    )
+    args = parser.parse_args()
+    print(f"{'npoints':>8} {'case':>11} {'ms/read':>9} {'speedup':>8}")
+    for npoints in args.npoints:
+        res = bench(npoints, args.number)
+        for name, t in res.items():
+            ref = res["parse-visa" if name.startswith("parse") else "visa"]
+            print(f"{npoints:>8} {name:>11} {t * 1e3:>9.3f} {ref / t:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
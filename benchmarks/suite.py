@@ -0,0 +1,363 @@
+"""
+Benchmark suite of the acquisition, calibration and storage hot paths.
+
+Times every case below in a fresh interpreter (so allocator and cache
+state left by other cases cannot skew it; best of ``--repeat`` runs,
+each auto-ranged to at least 0.2 s), together with a fixed
+``reference`` kernel of ASCII parsing and complex arithmetic. Each case
+is scored in units of the reference time, so scores recorded on one
+machine compare on another, and checked against the baseline
+``benchmarks/baseline.json``. A case slower than its baseline score by
+more than ``--tolerance`` is a regression and makes the run exit with
+status 1. ``--save`` writes the current scores as the new baseline;
+without a baseline for the selected cases the run exits with status 2.
+
+Cases:
+
+- ``measure_S11[N]``: trigger, ``*OPC?`` and bulk ASCII parse of a
+  pre-rendered N point reply on the ``DummyVNA`` socket path;
+- ``network_sparams[...]``: OSL solve, one (3, N) set and a batch;
+- ``calibrate``: three cascaded networks de-embedded from 100 sweeps;
+- ``S911T`` / ``std_gamma``: kit construction with model gammas,
+  cold (cache cleared) and warm;
+- ``activeflag`` / ``flag_sweeps``: band checks of one measurement set
+  and of a stack of sweeps;
+- ``write_data+load``: ``VNA.write_data`` of 100 sweeps and reading
+  every array back.
+
+Run with ``python benchmarks/suite.py``.
+"""
+
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+from pathlib import Path
+
+import numpy as np
+
+from cmt_vna import calkit
+from cmt_vna.testing import DummySocketResource, DummyVNA
+from cmt_vna.transport import format_ascii_array
+from cmt_vna.vna import flag_sweeps
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+# name -> setup function returning the callable to time
+CASES = {}
+
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+
+    return register
+
+
+def _random_sparams(rng, shape):
+    sprms = 0.1 * (rng.normal(size=shape) + 1j * rng.normal(size=shape))
+    sprms[1] += 1
+    return sprms
+
+
+class _RenderedResource(DummySocketResource):
+    """Renders each array reply once, so only the client side is timed."""
+
+    def __init__(self):
+        super().__init__()
+        self._replies = {}
+
+    def query_raw(self, command):
+        key = (command.strip(), self._npoints)
+        if key not in self._replies:
+            self._replies[key] = super().query_raw(command)
+        return self._replies[key]
+
+
+class _RenderedVNA(DummyVNA):
+    _socket_resource_cls = _RenderedResource
+
+
+def _measure_s11(npoints):
+    def setup():
+        vna = _RenderedVNA(transport="socket")
+        vna.setup(npoints=npoints)
+        return vna.measure_S11
+
+    return setup
+
+
+for _n in (1000, 10000, 100000):
+    case(f"measure_S11[{_n // 1000}k]")(_measure_s11(_n))
+
+
+def _osl(rng, npoints, nsets=None):
+    model = calkit.S911T(freq_Hz=np.linspace(1e6, 250e6, npoints)).std_gamma
+    shape = (3, npoints) if nsets is None else (3, nsets, npoints)
+    sprms = _random_sparams(rng, shape)
+    gamma = model if nsets is None else model[:, np.newaxis]
+    meas = calkit.embed_sparams(sprms, gamma)
+    if nsets is not None:
+        meas = np.moveaxis(meas, 0, 1)
+    return model, meas
+
+
+@case("network_sparams[10k]")
+def _network_sparams():
+    model, meas = _osl(np.random.default_rng(0), 10000)
+    return lambda: calkit.network_sparams(model, meas)
+
+
+@case("network_sparams[100x1k]")
+def _network_sparams_batch():
+    model, meas = _osl(np.random.default_rng(0), 1000, nsets=100)
+    return lambda: calkit.network_sparams(model, meas)
+
+
+@case("calibrate[3x100x10k]")
+def _calibrate():
+    rng = np.random.default_rng(1)
+    sprms = {k: _random_sparams(rng, (3, 10000)) for k in "abc"}
+    gammas = 0.5 * (
+        rng.normal(size=(100, 10000)) + 1j * rng.normal(size=(100, 10000))
+    )
+    return lambda: calkit.calibrate(gammas, sprms)
+
+
+@case("S911T+std_gamma[10k,cold]")
+def _s911t_cold():
+    freqs = np.linspace(1e6, 250e6, 10000)
+
+    def run():
+        calkit.clear_std_gamma_cache()
+        return calkit.S911T(freq_Hz=freqs).std_gamma
+
+    return run
+
+
+@case("S911T+std_gamma[10k,warm]")
+def _s911t_warm():
+    freqs = np.linspace(1e6, 250e6, 10000)
+
+    def run():
+        return calkit.S911T(freq_Hz=freqs).std_gamma
+
+    run()  # fill the cache
+    return run
+
+
+def _sweep(rng, db, shape):
+    phase = np.exp(2j * np.pi * rng.random(shape))
+    return 10 ** (db / 20) * phase
+
+
+@case("activeflag[10k]")
+def _activeflag():
+    rng = np.random.default_rng(2)
+    vna = DummyVNA()
+    cal = {"VNAO": -1, "VNAS": -1, "VNAL": -35}
+    cal = {k: _sweep(rng, db, 10000) for k, db in cal.items()}
+    data = {"ant": -10, "load": -40, "noise": -40}
+    data = {k: _sweep(rng, db, 10000) for k, db in data.items()}
+    return lambda: vna.activeflag(data, cal)
+
+
+@case("flag_sweeps[100x10k]")
+def _flag_sweeps():
+    stack = _sweep(np.random.default_rng(3), -10, (100, 10000))
+    return lambda: flag_sweeps(stack, "ant")
+
+
+@case("write_data+load[100x1k]")
+def _write_load():
+    rng = np.random.default_rng(4)
+    vna = DummyVNA()
+    vna.setup(npoints=1000)
+    sweeps = {
+        f"20250101_{i:06d}_gamma": _sweep(rng, -10, 1000) for i in range(100)
+    }
+    outdir = Path(tempfile.mkdtemp())
+
+    def run():
+        vna.data = dict(sweeps)
+        vna.write_data(outdir=outdir)
+        for fpath in outdir.glob("*.npz"):
+            with np.load(fpath) as f:
+                arrays = [f[k] for k in f.files]
+            fpath.unlink()
+        return arrays
+
+    return run
+
+
+def _reference():
+    """Fixed mix of the work the cases do, the unit of the scores."""
+    rng = np.random.default_rng(5)
+    raw = format_ascii_array(rng.normal(size=20000))
+    a = rng.normal(size=100000) + 1j * rng.normal(size=100000)
+    b = rng.normal(size=100000) + 1j * rng.normal(size=100000)
+
+    def run():
+        values = np.fromstring(raw, dtype=np.float64, sep=",")
+        return values, (a * b + a) / (b + 1)
+
+    return run
+
+
+REFERENCE = "reference"
+
+
+def machine():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def time_case(fn, repeat):
+    """Best seconds per call, over ``repeat`` runs of >= 0.2 s."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(number=number, repeat=repeat)) / number
+
+
+def run_isolated(name, repeat):
+    """``time_case`` of one case in a subprocess."""
+    out = subprocess.run(
+        [sys.executable, __file__, "--run-one", name, "-r", str(repeat)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(out)
+
+
+def compare(scores, baseline, tolerance):
+    """
+    Rows of (name, score, baseline score or None, ratio or None,
+    status) per score, status one of ``ok``, ``faster``, ``SLOWER``
+    and ``new``.
+    """
+    rows = []
+    for name, score in scores.items():
+        ref = baseline.get(name)
+        if ref is None:
+            rows.append((name, score, None, None, "new"))
+            continue
+        ratio = score / ref
+        status = "ok"
+        if ratio > 1 + tolerance:
+            status = "SLOWER"
+        elif ratio < 1 / (1 + tolerance):
+            status = "faster"
+        rows.append((name, score, ref, ratio, status))
+    return rows
+
+
+def main():
+    parser = ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-k",
+        "--filter",
+        default="",
+        help="Only run cases whose name contains this string.",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=BASELINE, help="Baseline file."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed relative slowdown of a score against the baseline. "
+        "Scores move by up to ~30%% between CPUs, as cases and reference "
+        "scale differently with cache sizes and vector units.",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="Runs per case."
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Store the scores as the baseline (merged into it).",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="List the cases and exit."
+    )
+    parser.add_argument(
+        "--run-one",
+        metavar="CASE",
+        help="Time one case in this process and print the seconds.",
+    )
+    args = parser.parse_args()
+    if args.run_one is not None:
+        setup = {**CASES, REFERENCE: _reference}[args.run_one]
+        print(repr(time_case(setup(), args.repeat)))
+        return 0
+    names = [n for n in CASES if args.filter in n]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    stored = {"machine": None, "results": {}}
+    if args.baseline.exists():
+        stored = json.loads(args.baseline.read_text())
+    if stored["machine"] not in (None, machine()):
+        print(f"baseline recorded on {stored['machine']}", file=sys.stderr)
+    unit = run_isolated(REFERENCE, args.repeat)
+    scores = {}
+    for name in names:
+        scores[name] = run_isolated(name, args.repeat) / unit
+
+    rows = compare(scores, stored["results"], args.tolerance)
+    width = max(len(n) for n in [*names, REFERENCE])
+    print(
+        f"{'case':<{width}} {'ms':>10} {'score':>8} {'baseline':>8} "
+        f"{'ratio':>6} status"
+    )
+    print(f"{REFERENCE:<{width}} {unit * 1e3:>10.3f} {1:>8.3f}")
+    for name, score, ref, ratio, status in rows:
+        ref = "-" if ref is None else f"{ref:.3f}"
+        ratio = "-" if ratio is None else f"{ratio:.2f}"
+        print(
+            f"{name:<{width}} {score * unit * 1e3:>10.3f} {score:>8.3f} "
+            f"{ref:>8} {ratio:>6} {status}"
+        )
+
+    if args.save:
+        stored = {
+            "machine": machine(),
+            "results": {**stored["results"], **scores},
+        }
+        args.baseline.write_text(json.dumps(stored, indent=2) + "\n")
+        print(f"saved baseline to {args.baseline}")
+        return 0
+    new = [row[0] for row in rows if row[4] == "new"]
+    if new:
+        print(
+            f"no baseline score for {', '.join(new)}; record one with --save",
+            file=sys.stderr,
+        )
+        return 2
+    slower = [row[0] for row in rows if row[4] == "SLOWER"]
+    if slower:
+        print(
+            f"{len(slower)} regression(s) beyond {args.tolerance:.0%}: "
+            f"{', '.join(slower)}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Run a fake cmtvna socket server on localhost, see
+``cmt_vna.testing.FakeCmtvnaServer``. Point an unmodified
+``VNA(ip="127.0.0.1", port=...)`` at it.
+"""
+
+from argparse import ArgumentParser
+
+from cmt_vna.testing import FakeCmtvnaServer, TimingModel
+
+parser = ArgumentParser(description="Fake cmtvna socket server.")
+parser.add_argument("--port", type=int, default=5025, help="Listen port.")
+parser.add_argument(
+    "--simulate",
+    action="store_true",
+    help="Take as long as the instrument to sweep and reply.",
+)
+parser.add_argument(
+    "--jitter",
+    type=float,
+    default=0.0,
+    help="Relative jitter of simulated durations.",
+)
+parser.add_argument(
+    "--delay",
+    type=float,
+    default=0.0,
+    help="Extra seconds before every reply.",
+)
+parser.add_argument(
+    "--drop_after",
+    type=int,
+    default=None,
+    help="Close the connection instead of answering after this many queries.",
+)
+args = parser.parse_args()
+
+model = TimingModel(jitter=args.jitter) if args.simulate else None
+server = FakeCmtvnaServer(port=args.port, model=model)
+server.delay = args.delay
+server.drop_after = args.drop_after
+print(f"Fake cmtvna server listening on {server.host}:{server.port}")
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    server.close()
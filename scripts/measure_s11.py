@@ -2,6 +2,7 @@ from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 import time
 from picohost import PicoRFSwitch
 from cmt_vna import VNA
+from cmt_vna.calmanager import CalibrationManager
 import warnings
 
 warnings.filterwarnings("ignore")
@@ -22,6 +23,26 @@ parser.add_argument(
     action="store_true",
     help="Perform calibration measurement.",
 )
+parser.add_argument(
+    "--max_cal_age",
+    type=float,
+    default=6 * 3600,
+    help="With --osl, seconds after which the standards are re-measured.",
+)
+parser.add_argument(
+    "--drift_threshold",
+    type=float,
+    default=0.01,
+    help=(
+        "With --osl, re-measure all standards when the load standard "
+        "drifts by more than this (max |delta S11|) since the last OSL. "
+        "The default 0.01 is the |S11| of a -40 dB reflection, i.e. as "
+        "large as the whole signal of the load and noise states "
+        "(nominally near -40 dB, flagged above -30 dB), so drift is "
+        "caught before it reaches their level; lower it only if the "
+        "sweep noise at --power stays well below the new value."
+    ),
+)
 parser.add_argument(
     "--fstart", type=float, default=1e6, help="Start frequency in Hz."
 )
@@ -64,9 +85,15 @@ parser.add_argument(
     default=1,
     help="Number of datasets to take each time.",
 )
+parser.add_argument(
+    "--record",
+    type=str,
+    default=None,
+    help="Log the SCPI session to this file, for replay with ReplayVNA.",
+)
 args = parser.parse_args()
 snw = PicoRFSwitch(port=args.switch_port)
-vna = VNA(ip="127.0.0.1", port=5025, switch_fn=snw.switch)
+vna = VNA(ip="127.0.0.1", port=5025, switch_fn=snw.switch, record=args.record)
 print(f"Connected to {vna.id}.")
 
 freq = vna.setup(
@@ -77,14 +104,27 @@ freq = vna.setup(
     power_dBm=args.power,
 )
 
+if args.osl:
+    # every output file gets the OSL block of its calibration, and the
+    # solved error model is saved next to the data per calibration
+    cal = CalibrationManager(
+        vna,
+        max_age=args.max_cal_age,
+        threshold=args.drift_threshold,
+        model_dir=args.outdir,
+    )
+
 try:
     for i in range(args.max_files):
-        if args.osl:  # measures standards, saves them to vna object
-            vna.add_OSL(std_key="vna")
-            snw.switch("VNAANT")
-
         print(f"reading file {i + 1} of {args.max_files}")
-        vna.read_data(num_data=args.num_data)
+        if args.osl:  # checks drift, re-measures the standards if needed
+            cal.read_data("VNAANT", num_data=args.num_data)
+            print(
+                f"using cal from {time.ctime(cal.cal_time)} "
+                f"({cal.standards_sweeps} standards sweeps so far)"
+            )
+        else:
+            vna.read_data(num_data=args.num_data)
         vna.write_data(outdir=args.outdir)
         print("finished writing")
         time.sleep(args.cadence)
@@ -93,3 +133,4 @@ except KeyboardInterrupt:
     vna.write_data(outdir=args.outdir)  # short final write
 finally:
     snw.disconnect()
+    vna.close()
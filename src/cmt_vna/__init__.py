@@ -4,4 +4,17 @@ __author__ = "Christian Hellum Bye, Charlie Tolley"
 __version__ = version("eigsep-vna")
 
 from .vna import VNA
-from . import calkit, testing
+from .async_vna import AsyncVNA
+from . import (
+    archive,
+    dataset,
+    calkit,
+    calmanager,
+    multi,
+    schedule,
+    session,
+    stream,
+    testing,
+    timing,
+    transport,
+)
@@ -0,0 +1,337 @@
+"""
+Crash-safe append-only sweep archive.
+
+A :class:`SweepArchive` is a directory holding, per stream key, one
+``<key>.npy`` file of fixed-size records and one ``<key>.json`` file
+with the VNA header (settings and frequency axis) at the time the
+stream was created. Each record is one sweep: a ``time`` stamp and the
+complex ``data`` array, kept in single precision if the first sweep of
+the stream is complex64.
+
+The ``.npy`` header is written with a fixed length, so an append is one
+write of the record followed by an in-place rewrite of the row count —
+O(1) whatever the archive size. The record lands on disk before the
+count that exposes it, so a crash at any point leaves a valid file
+holding every completed append; a torn trailing record is discarded
+when the archive is reopened. Readers can memory-map a stream with
+``np.load(path, mmap_mode="r")`` or :func:`load` while it is still
+being written and see the records appended so far.
+"""
+
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# total .npy header length in bytes (a multiple of numpy's 64 byte
+# alignment), large enough for any record dtype and 20-digit row count
+HEADER_SIZE = 512
+
+
+def record_dtype(shape, dtype=np.complex128):
+    """Record dtype of a stream of sweeps of the given shape."""
+    return np.dtype([("time", "<f8"), ("data", dtype, tuple(shape))])
+
+
+def _npy_header(dtype, count):
+    header = {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": (count,),
+    }
+    prefix = np.lib.format.MAGIC_PREFIX + bytes([1, 0])
+    length = HEADER_SIZE - len(prefix) - 2
+    body = repr(header).encode("latin1")
+    if len(body) >= length:
+        raise ValueError(f"Record dtype {dtype} too large for the header.")
+    body = body.ljust(length - 1) + b"\n"
+    return prefix + struct.pack("<H", length) + body
+
+
+def _read_npy_header(f):
+    f.seek(0)
+    version = np.lib.format.read_magic(f)
+    if version != (1, 0):
+        raise ValueError(f"Unsupported .npy version {version}.")
+    shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+    if f.tell() != HEADER_SIZE:
+        raise ValueError("Not an archive stream: unexpected header size.")
+    return shape[0], dtype
+
+
+def _jsonable(header):
+    out = {}
+    for key, value in header.items():
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        elif isinstance(value, np.generic):
+            value = value.item()
+        out[key] = value
+    return out
+
+
+def _from_json(header):
+    """Stored header with the lists (frequency axis) as arrays."""
+    if header is None:
+        return None
+    return {
+        k: np.asarray(v) if isinstance(v, list) else v
+        for k, v in header.items()
+    }
+
+
+def _header_diff(stored, header):
+    """First differing setting as ``(name, old, new)``, or None."""
+    for name in sorted(set(stored) | set(header)):
+        a, b = stored.get(name), header.get(name)
+        if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+            same = np.shape(a) == np.shape(b) and np.allclose(a, b)
+            a, b = f"array of {np.shape(a)}", f"array of {np.shape(b)}"
+        else:
+            same = a == b
+        if not same:
+            return name, a, b
+    return None
+
+
+class _Stream:
+    def __init__(self, path, dtype, fsync):
+        self.path = path
+        self.fsync = fsync
+        if path.exists():
+            self.f = open(path, "r+b")  # noqa: SIM115 - closed in close()
+            self.count, self.dtype = _read_npy_header(self.f)
+            if dtype is not None and dtype != self.dtype:
+                self.f.close()
+                raise ValueError(
+                    f"Stream {path.stem!r} holds records of {self.dtype}, "
+                    f"got {dtype}."
+                )
+            # drop a record torn by a crash before its count was written
+            self.f.truncate(HEADER_SIZE + self.count * self.dtype.itemsize)
+        else:
+            self.f = open(path, "w+b")  # noqa: SIM115 - closed in close()
+            self.count, self.dtype = 0, dtype
+            self.f.write(_npy_header(dtype, 0))
+        self.f.seek(0, os.SEEK_END)
+        self.record = np.zeros(1, dtype=self.dtype)
+
+    def append(self, data, t):
+        self.record["time"] = t
+        self.record["data"] = data
+        self.f.write(self.record.data)
+        self._sync()
+        self.count += 1
+        self.f.seek(0)
+        self.f.write(_npy_header(self.dtype, self.count))
+        self._sync()
+        self.f.seek(0, os.SEEK_END)
+
+    def _sync(self):
+        self.f.flush()
+        if self.fsync:
+            os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+class SweepArchive:
+    def __init__(self, path, fsync=False):
+        """
+        Open (or create) an archive directory for appending.
+
+        Existing streams are appended to, so an archive can be reopened
+        after a crash or restart.
+
+        Parameters
+        ----------
+        path : Path or str
+            Archive directory. Created if missing.
+        fsync : bool
+            Also ``os.fsync`` every append, so completed sweeps survive
+            a power loss and not only a process crash. Costs a disk
+            round trip per sweep.
+
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self._streams = {}
+        self._headers = {}  # stored VNA header per stream
+        self._lock = threading.Lock()
+
+    def append(self, key, data, t=None, header=None):
+        """
+        Append one sweep to a stream and flush it.
+
+        Parameters
+        ----------
+        key : str
+            Stream name; used as file name stem.
+        data : np.ndarray
+            Complex sweep. Every record of a stream has the shape of
+            its first one.
+        t : float or None
+            Timestamp; defaults to ``time.time()``.
+        header : dict or None
+            VNA metadata (``VNA.header``). Stored with the first record
+            of the stream; later appends must carry the same settings
+            (use :meth:`key_for` to pick the stream).
+
+        Raises
+        ------
+        ValueError
+            If ``data`` does not fit the stream's records or
+            ``header`` differs from the stored one.
+
+        """
+        t = time.time() if t is None else t
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._open_stream(key, data, header)
+            elif header is not None:
+                self._check_header(key, header)
+            if np.shape(data) != stream.dtype["data"].shape:
+                raise ValueError(
+                    f"Sweep of shape {np.shape(data)} does not fit stream "
+                    f"{key!r} of shape {stream.dtype['data'].shape}."
+                )
+            stream.append(data, t)
+
+    def key_for(self, base, header):
+        """
+        Stream key for sweeps taken with the settings ``header``.
+
+        ``base`` unless that stream holds other settings, else the
+        first of ``<base>_1``, ``<base>_2``, ... that is new or holds
+        the same settings. A setup change thus starts a new stream
+        instead of failing the append, and going back to earlier
+        settings appends to their stream again.
+
+        Parameters
+        ----------
+        base : str
+            Stream name of the first settings.
+        header : dict
+            VNA metadata (``VNA.header``).
+
+        Returns
+        -------
+        str
+            Stream key.
+
+        """
+        with self._lock:
+            for i in itertools.count():
+                key = base if i == 0 else f"{base}_{i}"
+                stored = self._stored_header(key)
+                if stored is None or _header_diff(stored, header) is None:
+                    return key
+
+    def _stored_header(self, key):
+        """Header of a stream, None if it has none or does not exist."""
+        if key in self._headers:
+            return self._headers[key]
+        meta_path = self.path / f"{key}.json"
+        if not meta_path.exists():
+            return None
+        return _from_json(json.loads(meta_path.read_text())["header"])
+
+    def _open_stream(self, key, data, header):
+        meta_path = self.path / f"{key}.json"
+        dtype = None
+        if (self.path / f"{key}.npy").exists():
+            meta = json.loads(meta_path.read_text())
+        else:
+            # complex64 sweeps are stored as such, anything else as
+            # complex128
+            dtype = record_dtype(
+                np.shape(data), np.result_type(data, np.complex64)
+            )
+            meta = {"created": time.time(), "header": None}
+            if header is not None:
+                meta["header"] = _jsonable(header)
+            meta_path.write_text(json.dumps(meta))
+        stream = _Stream(self.path / f"{key}.npy", dtype, self.fsync)
+        self._streams[key] = stream
+        self._headers[key] = _from_json(meta["header"])
+        if header is not None:
+            self._check_header(key, header)
+        return stream
+
+    def _check_header(self, key, header):
+        stored = self._headers[key]
+        if stored is None:
+            return
+        diff = _header_diff(stored, header)
+        if diff is not None:
+            name, a, b = diff
+            raise ValueError(
+                f"VNA settings changed for stream {key!r} ({name}: "
+                f"{a} -> {b}); append to a new key (see key_for)."
+            )
+
+    def close(self):
+        with self._lock:
+            for stream in self._streams.values():
+                stream.close()
+            self._streams = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def keys(path):
+    """Stream keys of an archive directory."""
+    return sorted(p.stem for p in Path(path).glob("*.npy"))
+
+
+def header(path, key):
+    """
+    Metadata of a stream: ``created`` timestamp and the VNA
+    ``header`` (frequency axis as a list) it was created with.
+    """
+    return json.loads((Path(path) / f"{key}.json").read_text())
+
+
+def load(path, key, mmap=True):
+    """
+    Records of a stream, memory-mapped by default.
+
+    Safe to call while the stream is being appended to: the result
+    holds the records completed at the time of the call.
+
+    Parameters
+    ----------
+    path : Path or str
+        Archive directory.
+    key : str
+        Stream name.
+    mmap : bool
+        Memory-map the file read-only instead of reading it.
+
+    Returns
+    -------
+    np.ndarray
+        Structured array with fields ``time`` (shape (n,)) and
+        ``data`` (shape (n, *sweep_shape)).
+
+    """
+    fpath = Path(path) / f"{key}.npy"
+    with open(fpath, "rb") as f:
+        count, dtype = _read_npy_header(f)
+        if not mmap or count == 0:
+            return np.fromfile(f, dtype=dtype, count=count)
+    return np.memmap(
+        fpath, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,)
+    )
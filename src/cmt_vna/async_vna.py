@@ -0,0 +1,399 @@
+"""
+asyncio client for the Copper Mountain VNA.
+
+:class:`AsyncVNA` mirrors the measurement API of :class:`cmt_vna.VNA`
+with awaitable methods, so a field node can drive the VNA, the RF
+switch and file writing from one event loop. Instrument I/O goes
+through :class:`cmt_vna.transport.AsyncSocketResource`; ``switch_fn``
+may be a coroutine function, in which case the switch to the next path
+of a sequence is awaited concurrently with the readout of the previous
+sweep (see ``VNA.measure_sequence``).
+"""
+
+import asyncio
+import inspect
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from .transport import AsyncSocketResource
+from .vna import (
+    CONFIG_COMMANDS,
+    FREQ_SETTINGS,
+    IP,
+    PORT,
+    SETTING_COMMANDS,
+    check_readback,
+    compound,
+    parse_settings,
+    report_mismatch,
+    setting_commands,
+)
+
+
+class AsyncVNA:
+    def __init__(
+        self,
+        ip=IP,
+        port=PORT,
+        timeout=1000,
+        save_dir=Path("."),
+        switch_fn=None,
+    ):
+        """
+        asyncio client controlling a Copper Mountain VNA. Construction
+        does no I/O; call :meth:`connect` (or use ``async with``)
+        before measuring.
+
+        Parameters
+        ----------
+        ip : str
+            IP address of VNA.
+        port : int
+            Port to connect to VNA.
+        timeout : float or None
+            Timeout in seconds for VNA communication, see ``VNA``.
+        save_dir : Path or str
+            Directory to save data to.
+        switch_fn : Callable[[str], Any] or None
+            Callable or coroutine function routing the RF signal to a
+            given state, with the same raises-on-failure contract as
+            ``VNA.switch_fn``. A plain callable blocks the event loop
+            while it runs.
+
+        """
+        self._fstart = None
+        self._fstop = None
+        self._npoints = None
+        self._ifbw = None
+        self._power_dBm = None
+        self._averages = None
+        self._freqs = None
+
+        self.data = {}
+        self.save_dir = Path(save_dir)
+        self.switch_fn = switch_fn
+        self.last_sequence_timing = None
+
+        self.vna_ip = ip
+        self.vna_port = port
+        self.vna_timeout = None if timeout is None else timeout * 1e3
+        self.s = None
+
+    async def _open_resource(self):
+        """
+        Open the asyncio socket resource to the VNA.
+
+        Returns
+        -------
+        s : AsyncSocketResource
+            Opened resource to the VNA.
+
+        """
+        return await AsyncSocketResource.open(
+            self.vna_ip, self.vna_port, timeout=self.vna_timeout
+        )
+
+    async def connect(self):
+        """Connect to the VNA and push the measurement configuration."""
+        self.s = await self._open_resource()
+        await self.s.write(compound(CONFIG_COMMANDS))
+        self._averages = 1
+        self._freqs = None
+
+    async def close(self):
+        if self.s is not None:
+            await self.s.close()
+            self.s = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def fstart(self):
+        return self._fstart
+
+    @property
+    def fstop(self):
+        return self._fstop
+
+    @property
+    def npoints(self):
+        return self._npoints
+
+    @property
+    def ifbw(self):
+        return self._ifbw
+
+    @property
+    def power_dBm(self):
+        return self._power_dBm
+
+    @property
+    def averages(self):
+        return self._averages
+
+    async def id(self):
+        return await self.s.query("*IDN?\n")
+
+    async def setup(
+        self,
+        fstart=1e6,
+        fstop=250e6,
+        npoints=1000,
+        ifbw=100,
+        power_dBm=0,
+        strict=False,
+    ):
+        """
+        Setup S11 measurement: the changed settings are written as one
+        compound command and read back with one compound query, as in
+        ``VNA.setup``. Values the instrument adjusts are adopted with a
+        warning.
+
+        Returns
+        -------
+        freq : np.ndarray
+            Frequency array in Hz
+
+        Raises
+        ------
+        RuntimeError
+            If ``strict`` and the readback does not match the requested
+            values.
+
+        """
+        await self.apply_profile(
+            {
+                "power_dBm": power_dBm,
+                "fstart": fstart,
+                "fstop": fstop,
+                "npoints": npoints,
+                "ifbw": ifbw,
+            },
+            strict=strict,
+        )
+        return await self.freqs()
+
+    async def apply_profile(self, profile, strict=False):
+        """
+        Apply a mapping of ``SETTING_COMMANDS`` settings in one round
+        trip. See ``VNA.apply_profile``, also for ``strict``.
+
+        Returns
+        -------
+        changed : dict
+            The settings that were written.
+
+        """
+        changed = {
+            k: v
+            for k, v in profile.items()
+            if v is not None and getattr(self, f"_{k}") != v
+        }
+        if not changed:
+            return changed
+        cmds = [c for k, v in changed.items() for c in setting_commands(k, v)]
+        await self.s.write(compound(cmds))
+        names = list(changed)
+        query = compound(SETTING_COMMANDS[n][1] for n in names)
+        readback = parse_settings(names, await self.s.query(query))
+        applied, mismatch = check_readback(changed, readback)
+        for key, value in applied.items():
+            setattr(self, f"_{key}", value)
+        if any(k in FREQ_SETTINGS for k in changed):
+            self._freqs = None
+        report_mismatch(mismatch, strict=strict)
+        return changed
+
+    async def freqs(self):
+        """
+        Frequency axis in Hz, cached until the configuration changes.
+        See ``VNA.freqs``.
+        """
+        if self._freqs is None:
+            freqs = await self.s.query_ascii_array("SENS1:FREQ:DATA?")
+            if None not in (self._fstart, self._fstop, self._npoints):
+                local = np.linspace(self._fstart, self._fstop, self._npoints)
+                if local.shape == freqs.shape and np.allclose(
+                    local, freqs, rtol=1e-9, atol=0
+                ):
+                    freqs = local
+            freqs.flags.writeable = False
+            self._freqs = freqs
+        return self._freqs
+
+    async def wait_for_opc(self):
+        """Await operation complete status."""
+        await self.s.query("*OPC?\n")
+
+    async def trigger(self):
+        """
+        Trigger a sweep and await its completion; with ``averages``
+        above 1, a cleared average of that many sweeps, like
+        ``VNA._trigger``.
+        """
+        navg = self.averages or 1
+        if navg > 1:
+            await self.s.write("SENS1:AVER:CLE")
+        for _ in range(navg):
+            await self.s.write("TRIG:SEQ:SING")
+            await self.wait_for_opc()
+
+    async def read_s11(self, out=None):
+        """
+        Read the last completed sweep from the instrument buffer.
+
+        Parameters
+        ----------
+        out : np.ndarray or None
+            Preallocated complex128 output of length npoints.
+
+        Returns
+        -------
+        data : np.ndarray
+            Complex-valued array of S11 measurements.
+
+        """
+        flat = None if out is None else out.view(np.float64)
+        data = await self.s.query_ascii_array("CALC:DATA:SDAT?", out=flat)
+        return data.view(np.complex128)
+
+    async def measure_S11(self):
+        """Trigger a sweep and read it out. See ``VNA.measure_S11``."""
+        await self.trigger()
+        return await self.read_s11()
+
+    async def _switch(self, state):
+        t = time.perf_counter()
+        res = self.switch_fn(state)
+        if inspect.isawaitable(res):
+            await res
+        return time.perf_counter() - t
+
+    async def measure_sequence(self, states):
+        """
+        Measure S11 on several switch paths. The switch to each next
+        path runs as a task concurrently with the readout of the
+        previous sweep; a switch failure is raised before the next
+        sweep is triggered. See ``VNA.measure_sequence``.
+
+        Parameters
+        ----------
+        states : list of str
+            Distinct switch path names, passed verbatim to
+            ``switch_fn``.
+
+        Returns
+        -------
+        s11 : dict
+            Complex S11 sweep per state, in measurement order.
+
+        Raises
+        -------
+        RuntimeError
+            If the attribute switch_fn is None.
+        ValueError
+            If ``states`` has duplicates.
+
+        """
+        if self.switch_fn is None:
+            raise RuntimeError("No switch_fn set, cannot measure S11.")
+        if len(set(states)) != len(states):
+            raise ValueError(f"Duplicate states in sequence {states}.")
+        timing = {"switch": 0.0, "sweep": 0.0, "readout": 0.0}
+        s11 = {}
+        t_start = time.perf_counter()
+        pending = None
+        try:
+            for i, state in enumerate(states):
+                if pending is None:
+                    timing["switch"] += await self._switch(state)
+                else:
+                    timing["switch"] += await pending
+                    pending = None
+                t = time.perf_counter()
+                await self.trigger()
+                timing["sweep"] += time.perf_counter() - t
+                if i + 1 < len(states):
+                    pending = asyncio.ensure_future(
+                        self._switch(states[i + 1])
+                    )
+                t = time.perf_counter()
+                s11[state] = await self.read_s11()
+                timing["readout"] += time.perf_counter() - t
+        finally:
+            if pending is not None:
+                # let an in-flight switch finish rather than cancel it
+                # half way; its outcome no longer matters
+                await asyncio.gather(pending, return_exceptions=True)
+        timing["wall"] = time.perf_counter() - t_start
+        timing["serial"] = timing["switch"] + timing["sweep"]
+        timing["serial"] += timing["readout"]
+        timing["saved"] = timing["serial"] - timing["wall"]
+        self.last_sequence_timing = timing
+        return s11
+
+    async def measure_OSL(self):
+        """Measure the open, short and load standards."""
+        return await self.measure_sequence(["VNAO", "VNAS", "VNAL"])
+
+    async def measure_ant(self, measure_noise=True, measure_load=True):
+        """Measure the antenna, and optionally load and noise source."""
+        paths = {"VNAANT": "ant"}
+        if measure_load:
+            paths["VNANOFF"] = "load"
+        if measure_noise:
+            paths["VNANON"] = "noise"
+        s11 = await self.measure_sequence(list(paths))
+        return {paths[state]: data for state, data in s11.items()}
+
+    async def measure_rec(self):
+        """Measure the receiver."""
+        s11 = await self.measure_sequence(["VNARF"])
+        return {"rec": s11["VNARF"]}
+
+    async def add_OSL(self, std_key="vna"):
+        """Measure the standards and store them in ``data``."""
+        OSL = await self.measure_OSL()
+        self.data[std_key] = np.array(list(OSL.values()))
+
+    async def read_data(self, num_data=1):
+        """Take ``num_data`` sweeps and store them in ``data``."""
+        for _ in range(num_data):
+            gamma = await self.measure_S11()
+            date = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.data[f"{date}_gamma"] = gamma
+
+    async def write_data(self, outdir=None):
+        """
+        Write ``data`` to an npz, like ``VNA.write_data``, and clear it.
+
+        The data dict is swapped out before the write, so measuring can
+        continue while the file is written. ``np.savez`` has no
+        non-blocking form, so it runs in the default executor.
+
+        Parameters
+        ----------
+        outdir : Path or str
+            Directory to save the data to. If None, uses the save_dir
+            attribute.
+
+        Returns
+        -------
+        fpath : Path
+            Path of the written file.
+
+        """
+        data, self.data = self.data, {}
+        data["freqs"] = await self.freqs()
+        date = datetime.now().strftime("%Y%m%d_%H%M%S")
+        fpath = Path(outdir or self.save_dir) / f"{date}_vna_data.npz"
+        await asyncio.to_thread(np.savez, fpath, **data)
+        return fpath
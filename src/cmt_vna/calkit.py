@@ -6,8 +6,101 @@ et al. 2024; M24). Equations related to OSL calibration of reflection
 coefficient measurements are described in Monsalve et al. 2016 (M16).
 """
 
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from pathlib import Path
+
 import numpy as np
 
+# complex dtype per precision setting; single precision halves memory and
+# disk use, with a resolution far below the instrument noise floor
+PRECISIONS = {"double": np.complex128, "single": np.complex64}
+
+# In-memory LRU cache of kit model gammas, keyed by ``S911T.cache_key``.
+STD_GAMMA_CACHE_SIZE = 32
+_std_gamma_cache = OrderedDict()
+_std_gamma_lock = threading.Lock()
+
+
+def clear_std_gamma_cache():
+    """Empty the in-memory cache of kit model gammas."""
+    with _std_gamma_lock:
+        _std_gamma_cache.clear()
+
+
+def cached_std_gamma(key, compute, cache_dir=None):
+    """
+    Look up model gammas in the in-memory cache, then in ``cache_dir``,
+    and compute (and store) them only if both miss.
+
+    Parameters
+    ----------
+    key : str
+        Cache key, e.g. ``S911T.cache_key``.
+    compute : Callable[[], np.ndarray]
+        Computes the gammas on a miss.
+    cache_dir : Path or None
+        Directory of ``<key>.npy`` files. Not used if None.
+
+    Returns
+    -------
+    np.ndarray
+        Read-only cached array, shared between callers.
+
+    """
+    with _std_gamma_lock:
+        gamma = _std_gamma_cache.get(key)
+        if gamma is not None:
+            _std_gamma_cache.move_to_end(key)
+            return gamma
+    path = None if cache_dir is None else Path(cache_dir) / f"{key}.npy"
+    if path is not None and path.exists():
+        gamma = np.load(path)
+    else:
+        gamma = np.asarray(compute())
+        if path is not None:
+            # write to a temporary file first so concurrent readers never
+            # see a partial file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, gamma)
+            os.replace(tmp, path)
+    gamma.flags.writeable = False
+    with _std_gamma_lock:
+        _std_gamma_cache[key] = gamma
+        while len(_std_gamma_cache) > STD_GAMMA_CACHE_SIZE:
+            _std_gamma_cache.popitem(last=False)
+    return gamma
+
+
+def complex_dtype(precision):
+    """
+    Complex dtype of a ``PRECISIONS`` key.
+
+    Raises
+    ------
+    ValueError
+        If ``precision`` is unknown.
+
+    """
+    try:
+        return np.dtype(PRECISIONS[precision])
+    except KeyError:
+        raise ValueError(
+            f"Unknown precision {precision!r}, expected one of "
+            f"{tuple(PRECISIONS)}."
+        ) from None
+
+
+def _precision_of(dtype):
+    """``PRECISIONS`` key of a complex dtype."""
+    return "single" if np.dtype(dtype) == np.complex64 else "double"
+
 
 def impedance_to_gamma(Z, Z0):
     """
@@ -84,65 +177,105 @@ def calc_l_x_gamma(Z0, delta_1ghz, delay, freq_Hz):
     return 2j * np.pi * freq_Hz * delay + (1 + 1j) * x
 
 
-def network_sparams(gamma_true, gamma_meas):
+def network_sparams(gamma_true, gamma_meas, precision="double"):
     """
     Get the S-parameters of a network by comparing the measured reflection
     coefficients of the open, short, and match standards to a model of their
     reflection coefficients (the "true" values). See M16, Eq. 3.
 
+    Eq. 3 is linear in (S11, S12*S21 - S11*S22, S22) for each standard, so
+    the three standards give a 3x3 system per frequency. It is solved in
+    closed form (eliminating S11 by differencing the standards and applying
+    Cramer's rule to the remaining 2x2 system), which broadcasts over any
+    batch dimensions.
+
     Parameters
     ----------
     gamma_true : array-like
         True reflection coefficients for the open, short, and match standards.
-        These are the unprimed quantities in Eq. 3. First dimension should
-        have length 3 (open, short, match).
+        These are the unprimed quantities in Eq. 3. Shape (3,), (3, N), or
+        (..., 3, N); the standards axis is second to last for 2+ dimensions.
     gamma_meas : array-like
         Measured reflection coefficients for the open, short, and match. These
-        are the primed quantities in Eq. 3. First dimension should have length
-        3 (open, short, match).
+        are the primed quantities in Eq. 3. Same layout as gamma_true; the two
+        are broadcast against each other, so e.g. one (3, N) model can be
+        combined with a (T, 3, N) stack of OSL measurements.
+    precision : str
+        Key of ``PRECISIONS``: both inputs are cast to it and the solve
+        runs in it.
 
     Returns
     -------
     sparams : ndarray
-        S-parameters in the form [S11, S12 * S21, S22]. We only care about
-        the product of S12 and S21, not their individual values.
+        S-parameters in the form [S11, S12 * S21, S22], along the standards
+        axis. We only care about the product of S12 and S21, not their
+        individual values. Inputs of up to 2 dimensions are squeezed, as
+        before; batched inputs keep their shape.
+
+    Raises
+    ------
+    np.linalg.LinAlgError
+        If the system is singular (or not finite) at any frequency, e.g.
+        for coinciding standards or an all-zero measurement, as
+        ``np.linalg.solve`` did.
 
     """
-    gamma_true = np.array(gamma_true, dtype=complex)
-    gamma_meas = np.array(gamma_meas, dtype=complex)
-
-    _orig_shape = gamma_true.shape
-
-    # Reshape to (N, 3)
-    gamma_true = gamma_true.T  # shape (N, 3)
-    gamma_meas = gamma_meas.T  # shape (N, 3)
-
-    # Construct (N, 3, 3) matrix
-    mat = np.stack(
-        [np.ones_like(gamma_true), gamma_true, gamma_true * gamma_meas],
-        axis=-1,
-    )  # shape (N, 3, 3)
-
-    gamma_meas = gamma_meas[..., np.newaxis]  # or gamma_meas.reshape(N, 3, 1)
-
-    sparams = np.linalg.solve(mat, gamma_meas)  # shape (N, 3, 1)
-
-    sparams = np.squeeze(sparams, axis=-1)  # shape (N, 3)
-
-    # Reshape back to original
-    sparams = sparams.T.reshape(_orig_shape)
-
-    # Compute S12 * S21
-    sparams[1] += sparams[0] * sparams[2]
-
-    return np.squeeze(sparams)
+    dtype = complex_dtype(precision)
+    gamma_true = np.asarray(gamma_true, dtype=dtype)
+    gamma_meas = np.asarray(gamma_meas, dtype=dtype)
+    ndim = max(gamma_true.ndim, gamma_meas.ndim)
+    axis = 0 if ndim == 1 else -2
+    g1, g2, g3 = np.moveaxis(gamma_true, axis, 0)
+    m1, m2, m3 = np.moveaxis(gamma_meas, axis, 0)
+
+    # eliminate S11: differences of the open row with the short and match
+    # rows leave two equations in b = S12*S21 - S11*S22 and c = S22
+    dg12 = g1 - g2
+    dg13 = g1 - g3
+    gm1 = g1 * m1
+    dgm12 = gm1 - g2 * m2
+    dgm13 = gm1 - g3 * m3
+    dm12 = m1 - m2
+    dm13 = m1 - m3
+    det = dg12 * dgm13 - dg13 * dgm12
+    if not np.all(np.isfinite(det) & (det != 0)):
+        raise np.linalg.LinAlgError(
+            "Singular OSL system: the standards or their measurements are "
+            "degenerate at some frequencies."
+        )
+    b = (dm12 * dgm13 - dm13 * dgm12) / det
+    s22 = (dg12 * dm13 - dg13 * dm12) / det
+    s11 = m1 - b * g1 - s22 * gm1
+    sparams = np.stack([s11, b + s11 * s22, s22], axis=axis)
+    if ndim <= 2:
+        return np.squeeze(sparams)
+    return sparams
+
+
+def _kernel_buffers(s11, s12s21, s22, gamma, out, scratch):
+    """Output and scratch arrays of an embed/de-embed kernel."""
+    if out is None:
+        shape = np.broadcast_shapes(
+            np.shape(s11), np.shape(s12s21), np.shape(s22), np.shape(gamma)
+        )
+        dtype = np.result_type(s11, s12s21, s22, gamma, np.float32)
+        out = np.empty(shape, dtype=dtype)
+    if scratch is None:
+        scratch = np.empty_like(out)
+    elif np.may_share_memory(out, scratch):
+        raise ValueError("scratch must not overlap out.")
+    return out, scratch
 
 
-def embed_sparams(sparams, gamma):
+def embed_sparams(sparams, gamma, out=None, scratch=None):
     """
     Embed S-parameters into a network with reflection coefficient gamma. See
     M16, Eq. 1.
 
+    The result is computed in place in ``out`` with one scratch array, so
+    with both given no memory is allocated. Precision follows the inputs,
+    or ``out`` if it is given: complex64 arrays stay complex64.
+
     Parameters
     ----------
     sparams : array-like
@@ -150,23 +283,44 @@ def embed_sparams(sparams, gamma):
         the product of S12 and S21, not their individual values.
     gamma : complex
         Intrinsic reflection coefficient.
+    out : np.ndarray or None
+        Output array of the broadcast shape of ``sparams[0]`` and
+        ``gamma``; may be ``gamma`` itself to work in place.
+    scratch : np.ndarray or None
+        Work array of the same shape, not overlapping ``out``.
 
     Returns
     -------
     gamma_prime : complex
         Embedded reflection coefficient, measured at reference plane.
 
-    """
-    s11, s12s21, s22 = sparams
-    gamma_prime = s11 + s12s21 * gamma / (1 - s22 * gamma)
-    return gamma_prime
-
+    Raises
+    ------
+    ValueError
+        If ``scratch`` overlaps ``out``.
 
-def de_embed_sparams(sparams, gamma_prime):
+    """
+    s11, s12s21, s22 = (np.asarray(s) for s in sparams)
+    gamma = np.asarray(gamma)
+    alloc = out is None
+    out, den = _kernel_buffers(s11, s12s21, s22, gamma, out, scratch)
+    np.multiply(s22, gamma, out=den)
+    np.subtract(1, den, out=den)
+    np.multiply(s12s21, gamma, out=out)
+    np.divide(out, den, out=out)
+    np.add(out, s11, out=out)
+    # numpy scalars in, numpy scalar out
+    return out[()] if alloc and out.ndim == 0 else out
+
+
+def de_embed_sparams(sparams, gamma_prime, out=None, scratch=None):
     """
     De-embed S-parameters from a network with measured reflection coefficient
     gamma_prime. See M16, Eq. 2.
 
+    Like ``embed_sparams``, this works in place in ``out`` with one
+    scratch array, in the precision of the inputs or of ``out``.
+
     Parameters
     ----------
     sparams : array-like
@@ -174,17 +328,79 @@ def de_embed_sparams(sparams, gamma_prime):
         the product of S12 and S21, not their individual values.
     gamma_prime : complex
         Measured reflection coefficient.
+    out : np.ndarray or None
+        Output array of the broadcast shape of ``sparams[0]`` and
+        ``gamma_prime``; may be ``gamma_prime`` itself to work in place.
+    scratch : np.ndarray or None
+        Work array of the same shape, not overlapping ``out``.
 
     Returns
     -------
     gamma : complex
         Intrinsic reflection coefficient.
 
+    Raises
+    ------
+    ValueError
+        If ``scratch`` overlaps ``out``.
+
     """
-    s11, s12s21, s22 = sparams
-    d = gamma_prime - s11
-    gamma = d / (s12s21 + s22 * d)
-    return gamma
+    s11, s12s21, s22 = (np.asarray(s) for s in sparams)
+    gamma_prime = np.asarray(gamma_prime)
+    alloc = out is None
+    out, den = _kernel_buffers(s11, s12s21, s22, gamma_prime, out, scratch)
+    np.subtract(gamma_prime, s11, out=out)
+    np.multiply(s22, out, out=den)
+    np.add(den, s12s21, out=den)
+    np.divide(out, den, out=out)
+    # numpy scalars in, numpy scalar out
+    return out[()] if alloc and out.ndim == 0 else out
+
+
+def cascade_sparams(*sparams):
+    """
+    Compose cascaded networks into one equivalent network, so that
+    embedding through the result equals embedding through each network in
+    turn: ``embed_sparams(cascade_sparams(a, b), g)`` is
+    ``embed_sparams(a, embed_sparams(b, g))``.
+
+    Parameters
+    ----------
+    sparams : array-like
+        S-parameters of each network in the form [S11, S12 * S21, S22],
+        ordered from the reference plane of the measurement (the VNA port)
+        towards the DUT. Arrays broadcast against each other.
+
+    Returns
+    -------
+    ndarray
+        S-parameters [S11, S12 * S21, S22] of the cascade; complex64 if
+        all networks are, complex128 otherwise.
+
+    Raises
+    ------
+    ValueError
+        If no network is given.
+
+    """
+    if not sparams:
+        raise ValueError("Need at least one network to cascade.")
+    sparams = [np.asarray(s) for s in sparams]
+    dtype = np.result_type(*sparams, np.complex64)
+    total = sparams[0].astype(dtype, copy=False)
+    for nxt in sparams[1:]:
+        a11, a12a21, a22 = total
+        b11, b12b21, b22 = nxt.astype(dtype, copy=False)
+        # multiple reflections between the two networks
+        d = 1 / (1 - a22 * b11)
+        total = np.stack(
+            [
+                a11 + a12a21 * b11 * d,
+                a12a21 * b12b21 * d**2,
+                b22 + b12b21 * a22 * d,
+            ]
+        )
+    return total
 
 
 def calibrate(gammas, sprms_dict):
@@ -192,18 +408,339 @@ def calibrate(gammas, sprms_dict):
     Calibrate all gammas in gammas dict with respect to all sparams in
     sprms dict. Applicable to both gammas and standards.
 
+    The networks are first combined with ``cascade_sparams``, so the
+    gammas are de-embedded in one broadcast operation.
+
     IN
-    kit: CalKit object.
-    gammas : array that contains all gamma values to be processed.
-    sprms_dict : sparams dict to de-embed from the gammas.
+    gammas : array that contains all gamma values to be processed, with
+        frequency along the last axis, e.g. (n_sweeps, N).
+    sprms_dict : sparams dict to de-embed from the gammas, ordered from
+        the VNA port towards the DUT.
     OUT
     returns the calibrated gammas as an array.
     """
-    for key, sprm in sprms_dict.items():
-        gammas = np.array(
-            [de_embed_sparams(sparams=sprm, gamma_prime=g) for g in gammas]
+    if not sprms_dict:
+        return gammas
+    sprms = cascade_sparams(*sprms_dict.values())
+    return de_embed_sparams(sparams=sprms, gamma_prime=np.asarray(gammas))
+
+
+def _interp_weights(freq_Hz, new_freq_Hz):
+    """Left grid index and linear weight of each new frequency."""
+    i = np.searchsorted(freq_Hz, new_freq_Hz, side="right") - 1
+    i = np.clip(i, 0, len(freq_Hz) - 2)
+    w = (new_freq_Hz - freq_Hz[i]) / (freq_Hz[i + 1] - freq_Hz[i])
+    return i, w
+
+
+def _interp_polar(freq_Hz, x, new_freq_Hz):
+    """
+    Interpolate complex x along its last axis in magnitude and unwrapped
+    phase, so terms that rotate quickly with frequency (e.g. through
+    cable delay) do not lose magnitude between grid points.
+    """
+    i, w = _interp_weights(freq_Hz, new_freq_Hz)
+    mag = np.abs(x)
+    phase = np.unwrap(np.angle(x), axis=-1)
+    mag = mag[..., i] * (1 - w) + mag[..., i + 1] * w
+    phase = phase[..., i] * (1 - w) + phase[..., i + 1] * w
+    return mag * np.exp(1j * phase)
+
+
+def interp_sparams(freq_Hz, sparams, new_freq_Hz):
+    """
+    Interpolate S-parameters onto another frequency grid within the same
+    band, linearly in magnitude and unwrapped phase.
+
+    The interpolation error is estimated by interpolating every other grid
+    point from its neighbours: linear interpolation error scales with the
+    square of the grid spacing, so a quarter of that error approximates the
+    error on the full grid.
+
+    Parameters
+    ----------
+    freq_Hz : array-like
+        Increasing frequency grid of sparams, shape (N,), N >= 2.
+    sparams : array-like
+        S-parameters with frequency on the last axis, e.g. (3, N).
+    new_freq_Hz : array-like
+        Frequencies to interpolate to, within [freq_Hz[0], freq_Hz[-1]].
+
+    Returns
+    -------
+    sparams : np.ndarray
+        Interpolated S-parameters, shape (..., M), in the precision of the
+        input (computed in double precision).
+    error : np.ndarray
+        Estimated absolute interpolation error per term and frequency,
+        shape (..., M). NaN if the grid has fewer than 4 points.
+
+    Raises
+    ------
+    ValueError
+        If new frequencies lie outside the band of freq_Hz.
+
+    """
+    freq_Hz = np.asarray(freq_Hz, dtype=np.float64)
+    new_freq_Hz = np.asarray(new_freq_Hz, dtype=np.float64)
+    sparams = np.asarray(sparams)
+    dtype = np.result_type(sparams, np.complex64)
+    sparams = sparams.astype(complex, copy=False)
+    tol = 1e-9 * (freq_Hz[-1] - freq_Hz[0])
+    if new_freq_Hz.min() < freq_Hz[0] - tol or (
+        new_freq_Hz.max() > freq_Hz[-1] + tol
+    ):
+        raise ValueError(
+            f"Frequencies {new_freq_Hz.min():.6g}-{new_freq_Hz.max():.6g} Hz "
+            f"outside the calibrated band {freq_Hz[0]:.6g}-"
+            f"{freq_Hz[-1]:.6g} Hz."
         )
-    return gammas
+    new_freq_Hz = np.clip(new_freq_Hz, freq_Hz[0], freq_Hz[-1])
+    out = _interp_polar(freq_Hz, sparams, new_freq_Hz).astype(dtype)
+    shape = sparams.shape[:-1] + new_freq_Hz.shape
+    if len(freq_Hz) < 4:
+        return out, np.full(shape, np.nan)
+    # hold out the odd points, interpolate them from the even ones
+    held = _interp_polar(freq_Hz[::2], sparams[..., ::2], freq_Hz[1::2])
+    err = np.abs(held - sparams[..., 1::2]) / 4
+    odd = freq_Hz[1::2]
+    i, w = _interp_weights(odd, np.clip(new_freq_Hz, odd[0], odd[-1]))
+    err = err[..., i] * (1 - w) + err[..., i + 1] * w
+    return out, err
+
+
+class ErrorModel:
+    def __init__(self, freq_Hz, sparams, interp_error=None, precision=None):
+        """
+        One-port error model: the S-parameters [S11, S12 * S21, S22] of the
+        network between the reference plane of a calibration and the VNA,
+        on a fixed frequency grid.
+
+        Parameters
+        ----------
+        freq_Hz : array-like
+            Frequency grid in Hz, shape (N,).
+        sparams : array-like
+            Error terms [S11, S12 * S21, S22], shape (3, N). Stored as one
+            contiguous complex array.
+        interp_error : np.ndarray or None
+            Estimated absolute error of each term, shape (3, N), if the
+            model was interpolated from another grid (see ``interp``).
+        precision : str or None
+            Key of ``PRECISIONS`` to store the terms in; gammas applied
+            to the model come out in it (or wider). If None, single for
+            complex64 ``sparams`` and double otherwise.
+
+        Raises
+        ------
+        ValueError
+            If the shapes do not match or ``precision`` is unknown.
+
+        """
+        if precision is None:
+            precision = _precision_of(np.result_type(sparams))
+        self.freq_Hz = np.array(freq_Hz, dtype=np.float64)
+        self.sparams = np.array(
+            sparams, dtype=complex_dtype(precision), order="C"
+        )
+        if self.freq_Hz.ndim != 1 or self.sparams.shape != (
+            3,
+            self.freq_Hz.size,
+        ):
+            raise ValueError(
+                f"Expected sparams of shape (3, {self.freq_Hz.size}), got "
+                f"{self.sparams.shape}."
+            )
+        self.interp_error = interp_error
+
+    @property
+    def precision(self):
+        """``PRECISIONS`` key of the stored terms."""
+        return _precision_of(self.sparams.dtype)
+
+    def astype(self, precision):
+        """The model with its terms in another precision."""
+        if precision == self.precision:
+            return self
+        return type(self)(
+            self.freq_Hz,
+            self.sparams,
+            interp_error=self.interp_error,
+            precision=precision,
+        )
+
+    @classmethod
+    def from_osl(cls, osl_meas, kit, model=None, precision="double"):
+        """
+        Solve the error model from OSL measurements, see
+        ``network_sparams``.
+
+        Parameters
+        ----------
+        osl_meas : array-like
+            Measured open, short and load, shape (3, N).
+        kit : CalKit
+            Calibration kit; its ``freq_Hz`` is the frequency grid.
+        model : array-like or None
+            Model gammas of the standards. If None, uses
+            ``kit.std_gamma``.
+        precision : str
+            Key of ``PRECISIONS`` the model is solved and stored in.
+
+        Returns
+        -------
+        ErrorModel
+
+        """
+        if model is None:
+            model = kit.std_gamma
+        sparams = network_sparams(model, osl_meas, precision=precision)
+        return cls(kit.freq_Hz, sparams, precision=precision)
+
+    @classmethod
+    def cascade(cls, *models):
+        """
+        Error model of cascaded networks, see ``cascade_sparams``.
+
+        Parameters
+        ----------
+        models : ErrorModel
+            Networks ordered from the VNA port towards the DUT, all on the
+            same frequency grid.
+
+        Returns
+        -------
+        ErrorModel
+
+        Raises
+        ------
+        ValueError
+            If no model is given or the frequency grids differ.
+
+        """
+        if not models:
+            raise ValueError("Need at least one error model to cascade.")
+        freq_Hz = models[0].freq_Hz
+        for m in models[1:]:
+            if not np.array_equal(m.freq_Hz, freq_Hz):
+                raise ValueError(
+                    "Cannot cascade error models on different grids."
+                )
+        return cls(freq_Hz, cascade_sparams(*(m.sparams for m in models)))
+
+    def interp(self, freq_Hz):
+        """
+        The model on another grid within the calibrated band, see
+        ``interp_sparams``.
+
+        Parameters
+        ----------
+        freq_Hz : array-like
+            New frequency grid in Hz.
+
+        Returns
+        -------
+        ErrorModel
+            Interpolated model with the error estimate in
+            ``interp_error``; the model itself if the grid is unchanged.
+
+        Raises
+        ------
+        ValueError
+            If the new grid extends outside the calibrated band.
+
+        """
+        freq_Hz = np.asarray(freq_Hz, dtype=np.float64)
+        if np.array_equal(freq_Hz, self.freq_Hz):
+            return self
+        sparams, err = interp_sparams(self.freq_Hz, self.sparams, freq_Hz)
+        return type(self)(
+            freq_Hz, sparams, interp_error=err, precision=self.precision
+        )
+
+    def _check(self, gamma):
+        if np.shape(gamma)[-1:] != self.freq_Hz.shape:
+            raise ValueError(
+                f"Expected gammas with {self.freq_Hz.size} frequencies on the "
+                f"last axis, got shape {np.shape(gamma)}."
+            )
+
+    def apply(self, gamma, out=None, scratch=None):
+        """
+        Embed intrinsic reflection coefficients in the network, giving what
+        the VNA measures. See ``embed_sparams``.
+
+        Parameters
+        ----------
+        gamma : array-like
+            Intrinsic gammas, shape (..., N).
+        out : np.ndarray or None
+            Complex output array of the same shape; may be ``gamma`` itself
+            to work in place.
+        scratch : np.ndarray or None
+            Work array of the same shape; reusing one across calls makes
+            this allocation free.
+
+        Returns
+        -------
+        np.ndarray
+            Embedded gammas.
+
+        """
+        self._check(gamma)
+        return embed_sparams(self.sparams, gamma, out=out, scratch=scratch)
+
+    def remove(self, gamma_prime, out=None, scratch=None):
+        """
+        De-embed the network from measured reflection coefficients. See
+        ``de_embed_sparams``.
+
+        Parameters
+        ----------
+        gamma_prime : array-like
+            Measured gammas, shape (..., N).
+        out : np.ndarray or None
+            Complex output array of the same shape; may be ``gamma_prime``
+            itself to calibrate in place.
+        scratch : np.ndarray or None
+            Work array of the same shape; reusing one across calls makes
+            this allocation free.
+
+        Returns
+        -------
+        np.ndarray
+            Calibrated gammas.
+
+        """
+        self._check(gamma_prime)
+        return de_embed_sparams(
+            self.sparams, gamma_prime, out=out, scratch=scratch
+        )
+
+    def save(self, path):
+        """
+        Write the model to an uncompressed npz with ``freq_Hz`` (float64)
+        and ``sparams`` (in the model's precision) arrays, plus
+        ``interp_error`` if the model has one.
+
+        Parameters
+        ----------
+        path : Path or str
+            Output file.
+
+        """
+        arrays = {"freq_Hz": self.freq_Hz, "sparams": self.sparams}
+        if self.interp_error is not None:
+            arrays["interp_error"] = self.interp_error
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a model written by ``save``."""
+        with np.load(path) as f:
+            return cls(
+                f["freq_Hz"], f["sparams"], interp_error=f.get("interp_error")
+            )
 
 
 class CalStandard:
@@ -404,46 +941,147 @@ class BasicLoadStandard:
 
 
 class S911T(CalKit):
-    def __init__(self, freq_Hz, match_resistance=50):
+    # Copper Mountain model of the kit: open capacitance and short
+    # inductance polynomials (np.polyval order), one-way delay in s and
+    # loss in Ohm/s; ideal load impedance in ohms
+    C_COEFS = (6.18e-45, -226e-36, 2470e-27, -7.425e-15)
+    OPEN_DELAY = 30.821e-12
+    OPEN_LOSS = 2e9
+    L_COEFS = (-6.13e-42, 303.8e-33, -5010e-24, 27.98e-12)
+    SHORT_DELAY = 30.688e-12
+    SHORT_LOSS = 2e9
+    LOAD_Z = 50
+
+    def __init__(self, freq_Hz, match_resistance=50, cache_dir=None):
         """
         Values for EIGSEP calibration kit.
 
+        The standards are built on first access, and ``std_gamma`` is
+        memoized by ``cache_key``, so kits on an already seen frequency
+        grid never recompute the models. Replacing a standard (e.g. with
+        ``add_open``) makes ``std_gamma`` follow this kit's standards
+        instead of the shared cache; assigning ``freq_Hz`` drops all
+        standards and the model and rebuilds the kit's models lazily.
+
         Parameters:
             freq_Hz (np.array of floats) : Frequency Range in Hz.
             match_resistance (float) : Resistance of match standard in ohms.
+            cache_dir (Path or str or None) : Directory to also persist
+                ``std_gamma`` to, shared between processes. Not used if
+                None.
         """
+        super().__init__(freq_Hz, Z0=50)
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
 
-        Z0 = 50
+    @property
+    def freq_Hz(self):
+        return self._freq_Hz
+
+    @freq_Hz.setter
+    def freq_Hz(self, value):
+        # standards, key and model all belong to one grid
+        self._freq_Hz = value
+        self._standards = {}
+        self._custom = False
+        self._model = None
+        vars(self).pop("cache_key", None)
+
+    def _standard(self, name):
+        """Standard ``name``, building the kit's model if none is set."""
+        if name not in self._standards:
+            custom = self._custom
+            self._add_model(name)
+            self._custom = custom
+        return self._standards[name]
+
+    def _set_standard(self, name, standard):
+        self._standards[name] = standard
+        self._custom = True
 
-        # open standard
-        c_coefs = (6.18e-45, -226e-36, 2470e-27, -7.425e-15)
-        c_open = np.polyval(c_coefs, freq_Hz)
-        open_delay = 30.821e-12  # s
-        open_loss = 2e9  # Ohm/s
+    @property
+    def open(self):
+        return self._standard("open")
 
-        # short standard
-        l_coefs = (-6.13e-42, 303.8e-33, -5010e-24, 27.98e-12)
-        l_short = np.polyval(l_coefs, freq_Hz)
-        short_delay = 30.688e-12  # s
-        short_loss = 2e9  # Ohm/s
+    @open.setter
+    def open(self, standard):
+        self._set_standard("open", standard)
 
-        # load standard
-        load_Z = 50  # Ohm
-        load = np.ones(len(freq_Hz)) * load_Z
+    @property
+    def short(self):
+        return self._standard("short")
 
-        super().__init__(freq_Hz, Z0=Z0)
-        self.add_open(c_open, open_loss, open_delay)
-        self.add_short(l_short, short_loss, short_delay)
-        self.load = BasicLoadStandard(load)
+    @short.setter
+    def short(self, standard):
+        self._set_standard("short", standard)
 
     @property
-    def std_gamma(self):
+    def load(self):
+        return self._standard("load")
+
+    @load.setter
+    def load(self, standard):
+        self._set_standard("load", standard)
+
+    def _add_model(self, name):
+        freq_Hz = self.freq_Hz
+        if name == "open":
+            c_open = np.polyval(self.C_COEFS, freq_Hz)
+            self.add_open(c_open, self.OPEN_LOSS, self.OPEN_DELAY)
+        elif name == "short":
+            l_short = np.polyval(self.L_COEFS, freq_Hz)
+            self.add_short(l_short, self.SHORT_LOSS, self.SHORT_DELAY)
+        else:
+            load = np.ones(len(freq_Hz)) * self.LOAD_Z
+            self.load = BasicLoadStandard(load)
+
+    @cached_property
+    def cache_key(self):
+        """
+        Hash of the frequency grid and kit parameters, identifying the
+        kit's model ``std_gamma``. Computed once per grid.
+        """
+        params = (
+            self.Z0,
+            self.C_COEFS,
+            self.OPEN_DELAY,
+            self.OPEN_LOSS,
+            self.L_COEFS,
+            self.SHORT_DELAY,
+            self.SHORT_LOSS,
+            self.LOAD_Z,
+        )
+        freqs = np.ascontiguousarray(self.freq_Hz, dtype=np.float64)
+        h = hashlib.sha256(freqs.tobytes())
+        h.update(repr((freqs.shape, params)).encode())
+        return h.hexdigest()
+
+    def _std_gamma(self):
         open_gamma = self.open.gamma
         shor_gamma = self.short.gamma
         load_gamma = self.load.gamma
         gamma = np.vstack([open_gamma, shor_gamma, load_gamma])
         return gamma
 
+    @property
+    def std_gamma(self):
+        """
+        Model reflection coefficients of open, short and load, shape
+        (3, N). Served from the shared cache unless a standard was
+        replaced; assign to replace it for this kit only.
+        """
+        if self._model is not None:
+            return self._model
+        if self._custom:
+            return self._std_gamma()
+        gamma = cached_std_gamma(
+            self.cache_key, self._std_gamma, self.cache_dir
+        )
+        return gamma.copy()
+
+    @std_gamma.setter
+    def std_gamma(self, value):
+        self._model = np.array(value, dtype=complex)
+
     def sparams(self, stds_meas, model=None):
         """
         Return a scattering matrix based on measured and model standards.
@@ -0,0 +1,202 @@
+"""
+Drift-triggered calibration.
+
+:class:`CalibrationManager` replaces a full OSL on a fixed cadence with
+a cheap drift check: one standard is re-measured and compared with its
+sweep in the last full OSL. A full ``VNA.add_OSL`` runs only when that
+drift passes a threshold or the calibration reaches a maximum age.
+
+Every sweep taken through the manager is tagged with the calibration it
+used, and the OSL block of that calibration goes into every file
+``VNA.write_data`` writes, so each file can be calibrated on its own.
+With a ``model_dir``, the solved error model of each calibration is
+also saved there under :func:`model_path`.
+"""
+
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from .calkit import ErrorModel
+from .dataset import TIME_FORMAT
+from .vna import mlin
+
+# drift metrics: measured monitor sweep, reference sweep -> drift
+METRICS = {
+    # largest complex deviation, linear units
+    "max_abs": lambda now, ref: float(np.max(np.abs(now - ref))),
+    # change of the mean dB magnitude, as used by VNA.activeflag
+    "mean_dB": lambda now, ref: float(abs(mlin(now) - mlin(ref))),
+}
+
+
+def model_path(model_dir, cal_time):
+    """
+    File of the error model of the calibration with ``cal_time``, the
+    value of the ``<date>_cal`` tags of the sweeps it calibrates.
+    """
+    stamp = datetime.fromtimestamp(float(cal_time)).strftime(TIME_FORMAT)
+    return Path(model_dir) / f"{stamp}_cal_model.npz"
+
+
+def load_model(model_dir, cal_time):
+    """The ``ErrorModel`` saved for the calibration with ``cal_time``."""
+    return ErrorModel.load(model_path(model_dir, cal_time))
+
+
+class CalibrationManager:
+    def __init__(
+        self,
+        vna,
+        std_key="vna",
+        monitor="VNAL",
+        threshold=0.01,
+        max_age=6 * 3600,
+        metric="max_abs",
+        kit=None,
+        model_dir=None,
+    ):
+        """
+        Decide when to re-run the full OSL calibration of a VNA.
+
+        Parameters
+        ----------
+        vna : VNA
+            VNA with ``switch_fn`` set.
+        std_key : str
+            Key the calibration is stored under, see ``VNA.add_OSL``.
+        monitor : str
+            Standard re-measured to check for drift; one of ``VNAO``,
+            ``VNAS``, ``VNAL``.
+        threshold : float
+            Drift (in units of ``metric``) that triggers a full OSL.
+        max_age : float
+            Seconds after which a full OSL runs regardless of drift.
+        metric : str
+            Drift metric, a key of ``METRICS``.
+        kit : CalKit or None
+            Passed to ``VNA.add_OSL``.
+        model_dir : Path or str or None
+            If set, the error model of every full OSL is saved in this
+            directory, see :func:`model_path`.
+
+        Raises
+        ------
+        ValueError
+            If ``metric`` or ``monitor`` is unknown.
+
+        """
+        if metric not in METRICS:
+            raise ValueError(
+                f"Unknown metric {metric!r}, expected one of {tuple(METRICS)}."
+            )
+        if monitor not in ("VNAO", "VNAS", "VNAL"):
+            raise ValueError(f"Monitor {monitor!r} is not an OSL standard.")
+        self.vna = vna
+        self.std_key = std_key
+        self.monitor = monitor
+        self.threshold = threshold
+        self.max_age = max_age
+        self.metric = metric
+        self.kit = kit
+        self.model_dir = model_dir
+        self.cal_time = None  # time of the current calibration; its id
+        self.history = []  # one dict per full OSL
+        self.last_drift = None
+        self.n_checks = 0
+        self._reference = None
+        self._osl = None  # OSL block of the current calibration
+
+    @property
+    def standards_sweeps(self):
+        """Standards sweeps taken: 3 per full OSL plus drift checks."""
+        return 3 * len(self.history) + self.n_checks
+
+    def _calibrate(self, reason):
+        self.vna.add_OSL(std_key=self.std_key, kit=self.kit)
+        self.cal_time = time.time()
+        states = self.vna.stds_meta[self.std_key]
+        self._osl = np.array(self.vna.data[self.std_key])
+        self._reference = self._osl[states.index(self.monitor)].copy()
+        if self.model_dir is not None:
+            self.vna.error_model(self.std_key).save(
+                model_path(self.model_dir, self.cal_time)
+            )
+        self.history.append(
+            {"time": self.cal_time, "reason": reason, "drift": self.last_drift}
+        )
+
+    def drift(self):
+        """
+        Re-measure the monitor standard and compare it with its sweep in
+        the current calibration.
+
+        Returns
+        -------
+        float
+            Drift in units of ``metric``.
+
+        """
+        sweep = self.vna.measure_sequence([self.monitor])[self.monitor]
+        self.n_checks += 1
+        self.last_drift = METRICS[self.metric](sweep, self._reference)
+        return self.last_drift
+
+    def ensure(self):
+        """
+        Make sure the calibration is current: run a full OSL if there is
+        none, it is older than ``max_age``, or the drift check exceeds
+        ``threshold``.
+
+        Returns
+        -------
+        float
+            ``cal_time`` of the calibration in use.
+
+        """
+        if self.cal_time is None:
+            self.last_drift = None
+            self._calibrate("initial")
+        elif time.time() - self.cal_time >= self.max_age:
+            self.last_drift = None
+            self._calibrate("age")
+        elif self.drift() > self.threshold:
+            self._calibrate("drift")
+        return self.cal_time
+
+    def read_data(self, state, num_data=1):
+        """
+        ``ensure`` the calibration, then take sweeps with
+        ``VNA.read_data``. Each new ``<date>_gamma`` entry of
+        ``vna.data`` gets a ``<date>_cal`` entry holding the
+        ``cal_time`` of the calibration it used, and the OSL block of
+        that calibration is put back under ``std_key`` if
+        ``write_data`` has cleared it, so every written file holds the
+        standards that calibrate its sweeps.
+
+        Parameters
+        ----------
+        state : str
+            Switch path of the DUT. Switched to after ``ensure``, whose
+            drift check or OSL leaves the switch on a standard.
+        num_data : int
+            Number of sweeps.
+
+        Returns
+        -------
+        float
+            ``cal_time`` of the calibration used.
+
+        """
+        cal_time = self.ensure()
+        self.vna.switch_fn(state)
+        before = set(self.vna.data)
+        self.vna.read_data(num_data=num_data)
+        for key in set(self.vna.data) - before:
+            if key.endswith("_gamma"):
+                date = key[: -len("_gamma")]
+                self.vna.data[f"{date}_cal"] = np.float64(cal_time)
+        self.vna.data.setdefault(self.std_key, self._osl)
+        return cal_time
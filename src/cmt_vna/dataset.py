@@ -0,0 +1,237 @@
+"""
+Lazy reader for directories of ``VNA.write_data`` files.
+
+:class:`NpzDataset` scans a directory of ``*_vna_data.npz`` files once,
+reading only the zip directories and ``.npy`` member headers, and
+indexes every array by time and kind: ``<date>_<kind>`` keys (``gamma``
+sweeps, ``cal`` tags of ``CalibrationManager``) are indexed at their own
+timestamp, any other key (``vna`` OSL blocks, ``freqs``, ...) under its
+name at the file's timestamp. ``np.savez`` stores members uncompressed,
+so those arrays are memory-mapped straight out of the zip file;
+compressed members (``np.savez_compressed``) are decompressed on
+access.
+"""
+
+import struct
+import zipfile
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+TIME_FORMAT = "%Y%m%d_%H%M%S"  # as written by VNA.write_data
+
+# zip local file header, see APPNOTE.TXT 4.3.7
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+# one indexed array; offset is None for compressed members
+Entry = namedtuple(
+    "Entry", ["time", "kind", "path", "key", "offset", "shape", "dtype"]
+)
+
+
+def parse_time(stamp):
+    """POSIX time of a ``TIME_FORMAT`` local-time stamp."""
+    return datetime.strptime(stamp, TIME_FORMAT).timestamp()
+
+
+def _to_posix(t):
+    if t is None or isinstance(t, (int, float)):
+        return t
+    return t.timestamp()
+
+
+def _read_npy_header(f):
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(f)
+    return np.lib.format.read_array_header_2_0(f)
+
+
+def _split_key(key):
+    """``(time, kind)`` of a ``<date>_<kind>`` key, else ``(None, key)``."""
+    n = len("YYYYmmdd_HHMMSS")
+    if len(key) > n + 1 and key[n] == "_":
+        try:
+            return parse_time(key[:n]), key[n + 1 :]
+        except ValueError:
+            pass
+    return None, key
+
+
+def _scan_file(path):
+    """Index entries of one npz file, without reading array data."""
+    file_time = parse_time(path.name[: len("YYYYmmdd_HHMMSS")])
+    entries = []
+    with open(path, "rb") as f, zipfile.ZipFile(f) as zf:
+        for info in zf.infolist():
+            if not info.filename.endswith(".npy"):
+                continue
+            key = info.filename[: -len(".npy")]
+            if info.compress_type == zipfile.ZIP_STORED:
+                f.seek(info.header_offset)
+                fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+                name_len, extra_len = fields[-2:]
+                f.seek(
+                    info.header_offset
+                    + _LOCAL_HEADER.size
+                    + name_len
+                    + extra_len
+                )
+                shape, fortran, dtype = _read_npy_header(f)
+                offset = f.tell()
+            else:
+                with zf.open(info) as member:
+                    shape, fortran, dtype = _read_npy_header(member)
+                offset = None
+            if fortran or dtype.hasobject:
+                offset = None  # not mappable as a C-ordered array
+            t, kind = _split_key(key)
+            if t is None:
+                t, kind = file_time, key
+            entries.append(Entry(t, kind, path, key, offset, shape, dtype))
+    return entries
+
+
+class NpzDataset:
+    def __init__(self, directory, pattern="*_vna_data.npz"):
+        """
+        Index all matching npz files in a directory.
+
+        Parameters
+        ----------
+        directory : Path or str
+            Directory holding the files.
+        pattern : str
+            Glob pattern of the files. Their names must start with a
+            ``TIME_FORMAT`` stamp.
+
+        """
+        self.directory = Path(directory)
+        self.files = sorted(self.directory.glob(pattern))
+        index = {}
+        for path in self.files:
+            for entry in _scan_file(path):
+                index.setdefault(entry.kind, []).append(entry)
+        self._index = {}
+        self._times = {}
+        for kind, entries in index.items():
+            entries.sort(key=lambda e: e.time)
+            self._index[kind] = entries
+            self._times[kind] = np.array([e.time for e in entries])
+        self._freq_entries = {e.path: e for e in self.entries("freqs")}
+        self._freqs = {}  # per file, read on demand
+
+    @property
+    def kinds(self):
+        return sorted(self._index)
+
+    def __len__(self):
+        return len(self._index.get("gamma", []))
+
+    def entries(self, kind="gamma"):
+        """Index entries of one kind, sorted by time."""
+        return list(self._index.get(kind, []))
+
+    def times(self, kind="gamma"):
+        """POSIX times of the arrays of one kind, sorted."""
+        return self._times.get(kind, np.empty(0)).copy()
+
+    @staticmethod
+    def read(entry):
+        """
+        Array of one index entry: a read-only memory map for
+        uncompressed members, otherwise a decompressed copy.
+        """
+        if entry.offset is not None:
+            return np.memmap(
+                entry.path,
+                dtype=entry.dtype,
+                mode="r",
+                offset=entry.offset,
+                shape=entry.shape,
+            )
+        with np.load(entry.path) as npz:
+            return npz[entry.key]
+
+    def sweep(self, i, kind="gamma"):
+        """The ``i``-th array of one kind in time order."""
+        return self.read(self._index[kind][i])
+
+    def freqs(self, path):
+        """
+        Frequency axis stored in one file.
+
+        Raises
+        ------
+        KeyError
+            If the file is not indexed or holds no ``freqs``.
+
+        """
+        path = Path(path)
+        if path not in self._freqs:
+            entry = self._freq_entries[path]
+            self._freqs[path] = np.array(self.read(entry))
+        return self._freqs[path]
+
+    def _range(self, kind, start, stop):
+        times = self._times.get(kind, np.empty(0))
+        lo = 0 if start is None else np.searchsorted(times, _to_posix(start))
+        hi = len(times)
+        if stop is not None:
+            hi = np.searchsorted(times, _to_posix(stop))
+        return lo, hi
+
+    def select(self, start=None, stop=None, kind="gamma"):
+        """
+        Stack the arrays of one kind taken in ``[start, stop)``.
+
+        Only the files holding those arrays are opened.
+
+        Parameters
+        ----------
+        start, stop : datetime, float or None
+            Time range; floats are POSIX times. None leaves that side
+            open.
+        kind : str
+            Array kind, see ``kinds``.
+
+        Returns
+        -------
+        times : np.ndarray
+            POSIX time of each array, shape (n,).
+        freqs : np.ndarray or None
+            Common frequency axis, or None if no array is selected.
+        data : np.ndarray
+            Stacked arrays, shape (n, *array_shape).
+
+        Raises
+        ------
+        ValueError
+            If the selected arrays differ in shape, dtype or frequency
+            axis.
+
+        """
+        lo, hi = self._range(kind, start, stop)
+        entries = self._index.get(kind, [])[lo:hi]
+        times = self._times.get(kind, np.empty(0))[lo:hi].copy()
+        if not entries:
+            return times, None, np.empty((0,))
+        shapes = {(e.shape, e.dtype) for e in entries}
+        if len(shapes) > 1:
+            raise ValueError(
+                f"Selected {kind} arrays differ in shape or dtype: "
+                f"{sorted(map(str, shapes))}."
+            )
+        freqs = self.freqs(entries[0].path)
+        for path in dict.fromkeys(e.path for e in entries):
+            if not np.array_equal(self.freqs(path), freqs):
+                raise ValueError(
+                    f"Frequency axis of {path.name} differs from "
+                    f"{entries[0].path.name}."
+                )
+        data = np.empty((len(entries),) + entries[0].shape, entries[0].dtype)
+        for i, entry in enumerate(entries):
+            data[i] = self.read(entry)
+        return times, freqs, data
@@ -0,0 +1,308 @@
+"""
+Concurrent control of several VNAs from one process.
+
+:class:`MultiVNA` holds named ``VNA`` instances (one per R60 and cmtvna
+server port) and runs the same call on all of them at once in a thread
+pool, so a measurement cycle takes as long as the slowest instrument
+rather than the sum. The instruments block on socket I/O and
+``switch_fn``, which release the GIL.
+
+Instruments routed through the same switch hardware declare it as a
+shared resource when added. A call holds the locks of all resources of
+its instrument from its first switch to its last sweep, so two
+instruments never move a shared switch under each other; they take
+turns while the others keep running. Locks are taken in sorted order,
+so instruments sharing several resources cannot deadlock.
+
+Every call is logged to a common ``timeline`` (seconds since the
+``MultiVNA`` was created, anchored at the POSIX ``start_time``), its
+duration and lock wait go into the ``timer``, and ``stats`` gathers
+those with the per-instrument ``VNA.timer`` statistics.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .timing import PhaseTimer
+
+# one call on one instrument; times in seconds since ``MultiVNA.t0``,
+# ``wait`` the part of it spent waiting for shared resources, ``error``
+# the exception type name of a failed call (None if it succeeded)
+Event = namedtuple("Event", ["name", "task", "start", "stop", "wait", "error"])
+
+
+class MultiVNA:
+    def __init__(self, max_workers=None, timeline_length=10000):
+        """
+        Drive several VNAs concurrently, see :meth:`add`.
+
+        Parameters
+        ----------
+        max_workers : int or None
+            Thread pool size. If None, one thread per instrument.
+        timeline_length : int
+            Number of most recent events kept in ``timeline``.
+
+        """
+        self.vnas = {}  # name -> VNA, in the order added
+        self.shared = {}  # name -> sorted shared resource names
+        self._locks = {}  # resource name -> Lock
+        self.max_workers = max_workers
+        self._pool = None
+        self.timeline = deque(maxlen=timeline_length)
+        self.timer = PhaseTimer(enabled=True)
+        self.last_cycle_timing = None
+        self.t0 = time.perf_counter()
+        self.start_time = time.time()
+
+    def add(self, name, vna, shared=()):
+        """
+        Add an instrument.
+
+        Parameters
+        ----------
+        name : str
+            Name of the instrument in results, ``timeline`` and
+            ``stats``.
+        vna : VNA
+            Connected VNA.
+        shared : iterable of str
+            Names of resources (e.g. a switch network) this
+            instrument's ``switch_fn`` uses together with other
+            instruments. Instruments sharing a resource never measure
+            at the same time.
+
+        Returns
+        -------
+        MultiVNA
+            The controller itself, so calls can be chained.
+
+        Raises
+        ------
+        ValueError
+            If ``name`` is already used, or ``vna`` (or its connection)
+            is already added under another name: calls on different
+            names run at the same time and would interleave on one
+            socket.
+
+        """
+        if name in self.vnas:
+            raise ValueError(f"Duplicate instrument name {name!r}.")
+        for other, added in self.vnas.items():
+            if added is vna or added.s is vna.s:
+                raise ValueError(
+                    f"Instrument {name!r} is already added as {other!r}."
+                )
+        self.vnas[name] = vna
+        self.shared[name] = sorted(set(shared))
+        for resource in self.shared[name]:
+            self._locks.setdefault(resource, threading.Lock())
+        self._shutdown_pool()  # resized on the next call
+        return self
+
+    def __len__(self):
+        return len(self.vnas)
+
+    def __getitem__(self, name):
+        return self.vnas[name]
+
+    def _get_pool(self):
+        if self._pool is None:
+            workers = self.max_workers or max(len(self.vnas), 1)
+            self._pool = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="MultiVNA"
+            )
+        return self._pool
+
+    def _shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def close(self):
+        """Stop the worker threads. The VNAs stay connected."""
+        self._shutdown_pool()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _call(self, name, task, call):
+        """Run ``call(name)`` holding the instrument's shared resources."""
+        locks = [self._locks[r] for r in self.shared[name]]
+        start = t = time.perf_counter()
+        for lock in locks:
+            lock.acquire()
+        error = None
+        try:
+            if locks:
+                t = time.perf_counter()
+            result = call(name)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+            stop = time.perf_counter()
+            waited = t - start
+            self.timeline.append(
+                Event(
+                    name, task, start - self.t0, stop - self.t0, waited, error
+                )
+            )
+            self.timer.record(f"{name}.{task}", stop - t)
+            if locks:
+                self.timer.record(f"{name}.wait", waited)
+        return result, stop - t, waited
+
+    def run(self, fn, names=None, task=None):
+        """
+        Call ``fn(vna)`` on several instruments concurrently.
+
+        Every call runs to completion even if another one fails, so no
+        instrument is left mid-sweep; failed calls are logged to
+        ``timeline`` with the exception type as ``error``. Durations are stored in
+        ``last_cycle_timing``: ``wall``, per-instrument ``busy`` and
+        ``wait`` (for shared resources), ``serial`` (sum of ``busy``,
+        the cycle time one after the other) and ``saved``.
+
+        Parameters
+        ----------
+        fn : Callable[[VNA], Any]
+            Called with each VNA in a worker thread.
+        names : list of str or None
+            Instruments to run on. If None, all of them.
+        task : str or None
+            Name of the call in ``timeline`` and ``timer``. Defaults
+            to the name of ``fn``.
+
+        Returns
+        -------
+        dict
+            Return value of ``fn`` per instrument name.
+
+        Raises
+        ------
+        KeyError
+            If a name is not a known instrument.
+        Exception
+            The exception of the first failed instrument (in the order
+            of ``names``), after all calls have finished.
+
+        """
+        task = getattr(fn, "__name__", "call") if task is None else task
+        return self._run(lambda name: fn(self.vnas[name]), names, task)
+
+    def _run(self, call, names, task):
+        """``run`` of ``call(name)`` per instrument name."""
+        names = list(self.vnas if names is None else names)
+        for name in names:
+            if name not in self.vnas:
+                raise KeyError(f"Unknown instrument {name!r}.")
+        pool = self._get_pool()
+        t_start = time.perf_counter()
+        futures = {
+            name: pool.submit(self._call, name, task, call) for name in names
+        }
+        wait(futures.values())
+        results, busy, waited, error = {}, {}, {}, None
+        for name, future in futures.items():
+            if future.exception() is None:
+                results[name], busy[name], waited[name] = future.result()
+            elif error is None:
+                error = future.exception()
+        wall = time.perf_counter() - t_start
+        serial = sum(busy.values())
+        self.last_cycle_timing = {
+            "wall": wall,
+            "busy": busy,
+            "wait": waited,
+            "serial": serial,
+            "saved": max(serial - wall, 0.0),
+        }
+        self.timer.record(f"cycle.{task}", wall)
+        if error is not None:
+            raise error
+        return results
+
+    def setup(self, names=None, **settings):
+        """``VNA.setup`` on each instrument; frequency axis per name."""
+        return self.run(lambda vna: vna.setup(**settings), names, "setup")
+
+    def measure_S11(self, names=None):
+        """One ``VNA.measure_S11`` sweep per instrument."""
+        return self.run(lambda vna: vna.measure_S11(), names, "measure_S11")
+
+    def measure_OSL(self, names=None):
+        """``VNA.measure_OSL`` per instrument."""
+        return self.run(lambda vna: vna.measure_OSL(), names, "measure_OSL")
+
+    def measure_sequence(self, states, names=None, **kwargs):
+        """``VNA.measure_sequence`` of ``states`` per instrument."""
+        return self.run(
+            lambda vna: vna.measure_sequence(states, **kwargs),
+            names,
+            "measure_sequence",
+        )
+
+    def read_data(self, num_data=1, names=None):
+        """
+        ``VNA.read_data`` per instrument; the sweeps are added to each
+        instrument's ``data``.
+        """
+        return self.run(
+            lambda vna: vna.read_data(num_data=num_data), names, "read_data"
+        )
+
+    def run_schedules(self, schedules):
+        """
+        Run one ``schedule.Schedule`` per instrument.
+
+        Parameters
+        ----------
+        schedules : dict
+            Schedule per instrument name.
+
+        Returns
+        -------
+        dict
+            ``ScheduleResult`` per instrument name.
+
+        """
+        return self._run(
+            lambda name: schedules[name].run(self.vnas[name]),
+            list(schedules),
+            "schedule",
+        )
+
+    def events(self, name=None, task=None):
+        """``timeline`` events, optionally of one instrument or task."""
+        return [
+            e
+            for e in self.timeline
+            if (name is None or e.name == name)
+            and (task is None or e.task == task)
+        ]
+
+    def stats(self):
+        """
+        Aggregated timing statistics.
+
+        Returns
+        -------
+        dict
+            ``"multi"``: ``timer`` statistics of the calls (phases
+            ``<name>.<task>``, ``<name>.wait`` and ``cycle.<task>``),
+            and per instrument name the statistics of its
+            ``VNA.timer`` (empty unless that timer is enabled).
+
+        """
+        out = {"multi": self.timer.stats()}
+        for name, vna in self.vnas.items():
+            out[name] = vna.timer.stats()
+        return out
@@ -0,0 +1,224 @@
+"""
+Declarative measurement schedules.
+
+A :class:`Schedule` lists switch states (the ``switch_fn`` vocabulary:
+``VNAO``, ``VNAS``, ``VNAL``, ``VNAANT``, ``VNANOFF``, ``VNANON``,
+``VNARF``, ``VNAAMB``, ...) with a repeat count and optional sweep
+settings for each. :meth:`Schedule.run` orders the entries to keep
+configuration changes and switch transitions to a minimum and measures
+each group of equal settings with ``VNA.measure_sequence``, so
+switching is pipelined with readout when the VNA's ``pipelined`` is set
+and sweeps are checked by its ``flag_policy``.
+"""
+
+import time
+
+# sweep settings an entry may override; applied with ``VNA.apply_profile``
+SETTINGS = ("fstart", "fstop", "npoints", "ifbw", "power_dBm")
+
+
+class ScheduleResult:
+    def __init__(self, data, settings, freqs, order, timing):
+        """
+        Outcome of :meth:`Schedule.run`.
+
+        Parameters
+        ----------
+        data : dict
+            Complex S11 sweeps per entry key, shape (repeat, npoints).
+        settings : dict
+            Sweep settings per entry key, as applied with
+            ``VNA.apply_profile``.
+        freqs : dict
+            Frequency axis per entry key.
+        order : list of tuple
+            ``(key, state, repeat)`` in the order the entries were
+            measured.
+        timing : dict
+            Wall-clock breakdown in seconds (``setup``, ``switch``,
+            ``sweep``, ``readout``, ``wall``, and ``saved`` by
+            pipelining) plus ``n_switches`` and ``n_config_changes``.
+
+        """
+        self.data = data
+        self.settings = settings
+        self.freqs = freqs
+        self.order = order
+        self.timing = timing
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+
+class Schedule:
+    def __init__(self):
+        """
+        Ordered list of measurement entries, see :meth:`add`.
+        """
+        self.entries = []
+
+    def add(self, state, repeat=1, key=None, **settings):
+        """
+        Add an entry to the schedule.
+
+        Parameters
+        ----------
+        state : str
+            Switch path name, passed verbatim to ``switch_fn``.
+        repeat : int
+            Number of sweeps to take on this path.
+        key : str or None
+            Name of the entry in the result. Defaults to ``state``.
+        settings
+            Sweep settings for this entry, any of ``SETTINGS``.
+            Settings that are not given keep the VNA's value at the
+            time the schedule runs.
+
+        Returns
+        -------
+        Schedule
+            The schedule itself, so calls can be chained.
+
+        Raises
+        ------
+        ValueError
+            If ``key`` is already used, ``repeat`` is not positive, or
+            an unknown setting is given.
+
+        """
+        key = state if key is None else key
+        if any(e["key"] == key for e in self.entries):
+            raise ValueError(f"Duplicate schedule key {key!r}.")
+        if repeat < 1:
+            raise ValueError(f"repeat must be positive, got {repeat}.")
+        unknown = set(settings) - set(SETTINGS)
+        if unknown:
+            raise ValueError(
+                f"Unknown sweep settings {sorted(unknown)}, expected any "
+                f"of {SETTINGS}."
+            )
+        self.entries.append(
+            {"key": key, "state": state, "repeat": repeat, **settings}
+        )
+        return self
+
+    def plan(self, current=None):
+        """
+        Order the entries for measurement.
+
+        Entries with identical resolved settings form one group, so
+        every distinct configuration is set once. Groups start with the
+        one matching ``current`` and then greedily follow the one with
+        the fewest differing settings. Within a group, entries on the
+        same state run back to back, and the group starts on the state
+        the previous group ended on if it has one, saving a switch.
+
+        Parameters
+        ----------
+        current : dict or None
+            Current sweep settings of the VNA; entries inherit any
+            setting they do not override. None values are ignored.
+
+        Returns
+        -------
+        plan : list of tuple
+            ``(settings, entries)`` per group, in measurement order.
+
+        """
+        current = {k: v for k, v in (current or {}).items() if v is not None}
+        groups = {}
+        for entry in self.entries:
+            settings = dict(current)
+            settings.update({k: entry[k] for k in SETTINGS if k in entry})
+            gkey = tuple(sorted(settings.items()))
+            groups.setdefault(gkey, []).append(entry)
+
+        def ndiff(a, b):
+            a, b = dict(a), dict(b)
+            return sum(a.get(k) != b.get(k) for k in set(a) | set(b))
+
+        plan = []
+        prev_settings = tuple(sorted(current.items()))
+        prev_state = None
+        while groups:
+            gkey = min(groups, key=lambda g: ndiff(g, prev_settings))
+            entries = groups.pop(gkey)
+            states = list(dict.fromkeys(e["state"] for e in entries))
+            if prev_state in states:
+                states.remove(prev_state)
+                states.insert(0, prev_state)
+            entries = sorted(entries, key=lambda e: states.index(e["state"]))
+            plan.append((dict(gkey), entries))
+            prev_settings = gkey
+            prev_state = states[-1]
+        return plan
+
+    def run(self, vna):
+        """
+        Measure all entries on ``vna`` in planned order.
+
+        Only the settings of a group that differ from the VNA's are
+        sent, so settings no entry gives (or inherits from the VNA)
+        are never written.
+
+        Parameters
+        ----------
+        vna : VNA
+            Connected VNA with ``switch_fn`` set.
+
+        Returns
+        -------
+        ScheduleResult
+
+        Raises
+        -------
+        RuntimeError
+            If ``vna.switch_fn`` is None, or a sweep is flagged under
+            the VNA's ``flag_policy``, see ``VNA.measure_sequence``.
+        Exception
+            Any exception raised by ``switch_fn`` propagates, aborting
+            the schedule before the corresponding S11 measurement.
+
+        """
+        if vna.switch_fn is None:
+            raise RuntimeError("No switch_fn set, cannot measure S11.")
+        current = {k: getattr(vna, k) for k in SETTINGS}
+        timing = dict.fromkeys(
+            ("setup", "switch", "sweep", "readout", "saved"), 0.0
+        )
+        timing["n_switches"] = 0
+        timing["n_config_changes"] = 0
+        data, settings, freqs, order = {}, {}, {}, []
+        prev_state = None
+        t_start = time.perf_counter()
+        for group_settings, entries in self.plan(current):
+            if any(getattr(vna, k) != v for k, v in group_settings.items()):
+                timing["n_config_changes"] += 1
+            t = time.perf_counter()
+            vna.apply_profile(group_settings)
+            axis = vna.freqs
+            timing["setup"] += time.perf_counter() - t
+            # entries on one state are consecutive, see plan
+            repeat = {}
+            for e in entries:
+                repeat[e["state"]] = repeat.get(e["state"], 0) + e["repeat"]
+            states = list(repeat)
+            timing["n_switches"] += sum(
+                a != b for a, b in zip([prev_state] + states[:-1], states)
+            )
+            s11 = vna.measure_sequence(
+                states, repeat=repeat, current_state=prev_state
+            )
+            for k in ("switch", "sweep", "readout", "saved"):
+                timing[k] += vna.last_sequence_timing[k]
+            taken = dict.fromkeys(states, 0)
+            for e in entries:
+                i, n = taken[e["state"]], e["repeat"]
+                data[e["key"]] = s11[e["state"]][i : i + n]
+                settings[e["key"]] = dict(group_settings)
+                freqs[e["key"]] = axis
+                order.append((e["key"], e["state"], n))
+                taken[e["state"]] += n
+            prev_state = states[-1]
+        timing["wall"] = time.perf_counter() - t_start
+        return ScheduleResult(data, settings, freqs, order, timing)
@@ -0,0 +1,354 @@
+"""
+Record and replay the SCPI conversation with the instrument.
+
+:class:`SessionRecorder` wraps the resource ``VNA._open_resource``
+returns (``VNA(record=path)`` does this) and appends every write, query
+and reply, with its time, to a binary session log. :class:`ReplayResource`
+reads the log back and answers the same conversation without the
+instrument, either as fast as possible or with the recorded reply
+latencies, so the ``measure_*`` code paths can be profiled and
+regression-tested against traffic captured in the field (see
+``testing.ReplayVNA``).
+
+The log starts with ``MAGIC`` and a length-prefixed JSON header (format
+version, POSIX start time and the query methods the recorded resource
+provides, so the replay takes the same transport code paths). Each
+record is a ``RECORD`` struct — seconds since the start, kind code and
+payload length — followed by the payload:
+
+- ``write`` / ``query``: the command, UTF-8;
+- ``text`` / ``raw``: reply of ``query`` / ``query_raw``;
+- ``array``: reply of ``query_ascii_array`` or ``query_ascii_values``,
+  one dtype character (``d`` or ``f``) and the binary values, less than
+  half the size of the ASCII transfer;
+- ``error``: ``"<exception type>: <message>"`` of a failed query.
+
+Records are flushed as they are written, so a log survives the process
+dying mid-run up to its last complete record.
+"""
+
+import json
+import struct
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+import pyvisa
+
+from .transport import format_ascii_array, parse_ascii_array
+
+MAGIC = b"CMTSCPI\n"
+VERSION = 1
+_HEADER_LEN = struct.Struct("<I")
+# seconds since the start of the session, kind code, payload length
+RECORD = struct.Struct("<dBI")
+KINDS = ("write", "query", "text", "raw", "array", "error")
+_CODES = {kind: code for code, kind in enumerate(KINDS)}
+# resource methods that send a query and read its reply
+QUERY_METHODS = (
+    "query",
+    "query_raw",
+    "query_ascii_array",
+    "query_ascii_values",
+)
+# exceptions a replayed error is raised as; others become RuntimeError
+_ERRORS = {
+    "TimeoutError": TimeoutError,
+    "ConnectionError": ConnectionError,
+    "ValueError": ValueError,
+}
+
+Record = namedtuple("Record", ["time", "kind", "data"])
+
+
+def _encode_reply(reply):
+    """Kind and payload of a query reply."""
+    if isinstance(reply, str):
+        return "text", reply.encode()
+    if isinstance(reply, (bytes, bytearray, memoryview)):
+        return "raw", bytes(reply)
+    values = np.asarray(reply)
+    if values.dtype not in (np.float32, np.float64):
+        values = values.astype(np.float64)
+    return "array", values.dtype.char.encode() + values.tobytes()
+
+
+def _encode_error(exc):
+    if isinstance(exc, pyvisa.VisaIOError):
+        return f"VisaIOError: {exc.error_code}".encode()
+    return f"{type(exc).__name__}: {exc}".encode()
+
+
+def _decode(kind, payload):
+    if kind == "raw":
+        return payload
+    if kind == "array":
+        return np.frombuffer(payload[1:], dtype=payload[:1].decode())
+    return payload.decode()
+
+
+def read_session(path):
+    """
+    Read a session log.
+
+    A truncated trailing record (the process died while writing it) is
+    ignored.
+
+    Parameters
+    ----------
+    path : Path or str
+        Log written by :class:`SessionRecorder`.
+
+    Returns
+    -------
+    header : dict
+        ``version``, ``created`` (POSIX time) and ``methods``.
+    records : list of Record
+        Records in order; ``data`` is a str, bytes for ``raw`` replies
+        and a read-only float array for ``array`` replies.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a session log.
+
+    """
+    with open(path, "rb") as f:
+        buf = f.read()
+    if not buf.startswith(MAGIC):
+        raise ValueError(f"{path} is not a session log.")
+    pos = len(MAGIC)
+    (n,) = _HEADER_LEN.unpack_from(buf, pos)
+    pos += _HEADER_LEN.size
+    header = json.loads(buf[pos : pos + n])
+    pos += n
+    records = []
+    while pos + RECORD.size <= len(buf):
+        t, code, n = RECORD.unpack_from(buf, pos)
+        start = pos + RECORD.size
+        if start + n > len(buf):
+            break
+        kind = KINDS[code]
+        records.append(Record(t, kind, _decode(kind, buf[start : start + n])))
+        pos = start + n
+    return header, records
+
+
+class SessionRecorder:
+    """
+    Resource wrapper logging the SCPI conversation to a session log.
+
+    Provides the write and query methods of the wrapped resource (and
+    only those, so ``VNA`` picks the same code paths) and records each
+    call; other attributes (``timeout``, ``read_termination``, ...)
+    are passed through. Calls are serialized, so the log keeps every
+    reply right after its query.
+
+    Parameters
+    ----------
+    resource : pyvisa.Resource or SocketResource
+        Opened resource to the VNA.
+    path : Path or str
+        Log file; overwritten.
+    clock : Callable[[], float]
+        Monotonic clock timing the records in seconds.
+
+    """
+
+    def __init__(self, resource, path, clock=time.monotonic):
+        methods = [m for m in QUERY_METHODS if hasattr(resource, m)]
+        header = json.dumps(
+            {"version": VERSION, "created": time.time(), "methods": methods}
+        ).encode()
+        self.__dict__.update(
+            _resource=resource,
+            _clock=clock,
+            _lock=threading.Lock(),
+            _file=open(path, "wb"),  # noqa: SIM115 - closed in close()
+            _t0=clock(),
+            path=path,
+            n_records=0,
+        )
+        self._file.write(MAGIC + _HEADER_LEN.pack(len(header)) + header)
+        self._file.flush()
+
+    def __getattr__(self, name):
+        attr = getattr(self.__dict__["_resource"], name)
+        if name in QUERY_METHODS:
+            return partial(self._query, name)
+        return attr
+
+    def __setattr__(self, name, value):
+        setattr(self._resource, name, value)
+
+    def _log(self, kind, payload):
+        t = self._clock() - self._t0
+        self._file.write(RECORD.pack(t, _CODES[kind], len(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        self.__dict__["n_records"] += 1
+
+    def write(self, command):
+        with self._lock:
+            self._log("write", command.encode())
+            self._resource.write(command)
+
+    def _query(self, name, command, *args, **kwargs):
+        with self._lock:
+            self._log("query", command.encode())
+            try:
+                reply = getattr(self._resource, name)(command, *args, **kwargs)
+            except Exception as e:
+                self._log("error", _encode_error(e))
+                raise
+            self._log(*_encode_reply(reply))
+        return reply
+
+    def close(self):
+        """Close the log and the wrapped resource."""
+        with self._lock:
+            self._file.close()
+        self._resource.close()
+
+
+class ReplayResource:
+    """
+    Resource answering a recorded SCPI conversation.
+
+    Every write and query must match the next record of the log, so a
+    replay is deterministic and any change in the commands the client
+    sends is caught. Replies are converted to what the calling method
+    returns, so a log recorded with one array path (e.g. ``query_raw``
+    with timing enabled) replays through another.
+
+    Parameters
+    ----------
+    path : Path or str
+        Log written by :class:`SessionRecorder`.
+    speed : float or None
+        If None, replies return at once. Otherwise each reply is
+        delayed by its recorded latency (query to reply) divided by
+        ``speed``, i.e. 1 replays the instrument at recorded speed.
+    sleep : Callable[[float], Any]
+        Sleep function of the latency delays.
+
+    Raises
+    ------
+    ValueError
+        If ``speed`` is not positive.
+
+    """
+
+    def __init__(self, path, speed=None, sleep=time.sleep):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"speed must be positive, got {speed}.")
+        self.header, self.records = read_session(path)
+        self.path = path
+        self.speed = speed
+        self.read_termination = "\n"
+        self.timeout = None
+        self._sleep = sleep
+        self._pos = 0
+
+    def __getattr__(self, name):
+        if name in QUERY_METHODS and name in self.header["methods"]:
+            return getattr(self, f"_{name}")
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    @property
+    def remaining(self):
+        """Number of records not replayed yet."""
+        return len(self.records) - self._pos
+
+    def _next(self, kind, command=None):
+        """
+        Consume the next record, which must be ``kind`` (and carry
+        ``command``).
+
+        Raises
+        ------
+        RuntimeError
+            If the log is exhausted or the record does not match.
+
+        """
+        if self._pos >= len(self.records):
+            raise RuntimeError(
+                f"Replay of {self.path} exhausted, got {kind} {command!r}."
+            )
+        record = self.records[self._pos]
+        if record.kind != kind or (
+            command is not None and record.data != command
+        ):
+            raise RuntimeError(
+                f"Replay of {self.path} diverged at record {self._pos}: "
+                f"expected {record.kind} {record.data!r}, got {kind} "
+                f"{command!r}."
+            )
+        self._pos += 1
+        return record
+
+    def write(self, command):
+        self._next("write", command)
+
+    def _reply(self, command):
+        """Replay one query; the reply record's kind and data."""
+        sent = self._next("query", command)
+        if self._pos >= len(self.records):
+            raise RuntimeError(
+                f"Replay of {self.path} exhausted awaiting the reply to "
+                f"{command!r}."
+            )
+        reply = self.records[self._pos]
+        self._pos += 1
+        if self.speed is not None:
+            self._sleep(max(reply.time - sent.time, 0.0) / self.speed)
+        if reply.kind == "error":
+            name, _, msg = reply.data.partition(": ")
+            if name == "VisaIOError":
+                raise pyvisa.VisaIOError(int(msg))
+            raise _ERRORS.get(name, RuntimeError)(msg)
+        if reply.kind not in ("text", "raw", "array"):
+            raise RuntimeError(
+                f"Replay of {self.path}: record {self._pos - 1} is a "
+                f"{reply.kind}, expected the reply to {command!r}."
+            )
+        return reply.kind, reply.data
+
+    def _as_raw(self, kind, data):
+        if kind == "text":
+            return data.encode()
+        if kind == "array":
+            return format_ascii_array(data)
+        return data
+
+    def _query(self, command):
+        kind, data = self._reply(command)
+        if kind == "text":
+            return data
+        return self._as_raw(kind, data).decode().strip()
+
+    def _query_raw(self, command):
+        return self._as_raw(*self._reply(command))
+
+    def _query_ascii_array(self, command, out=None):
+        kind, data = self._reply(command)
+        if kind != "array":
+            return parse_ascii_array(self._as_raw(kind, data), out=out)
+        if out is None:
+            return data.astype(np.float64)
+        if data.size != out.size:
+            raise ValueError(
+                f"Reply has {data.size} values, out has {out.size}."
+            )
+        out[...] = data.reshape(out.shape)
+        return out
+
+    def _query_ascii_values(self, command, container=list):
+        return container(self._query_ascii_array(command))
+
+    def close(self):
+        pass
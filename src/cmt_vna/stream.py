@@ -0,0 +1,322 @@
+"""
+Continuous background acquisition.
+
+:class:`SweepStream` runs back-to-back S11 sweeps in a background
+thread and writes them into a preallocated circular buffer, so memory
+stays flat however long the stream runs. Consumers read through
+:class:`Subscription` objects, either as iterators or with a callback
+that is invoked from a dedicated thread. Two backpressure policies
+decide what happens when a consumer falls more than ``capacity`` sweeps
+behind:
+
+``"drop_oldest"``
+    Acquisition never waits. The lagging subscription skips the
+    overwritten sweeps and counts them in ``dropped``.
+``"block"``
+    Acquisition pauses before overwriting a sweep that an open
+    subscription has not read yet, so no sweep is lost but the sweep
+    cadence follows the slowest consumer.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+POLICIES = ("drop_oldest", "block")
+
+# seq: running sweep number of the stream, time: time.time() at the end
+# of the sweep, data: complex S11 (a copy owned by the consumer)
+Sweep = namedtuple("Sweep", ["seq", "time", "data"])
+
+
+class Subscription:
+    def __init__(self, stream, cursor):
+        """
+        Read position of one consumer in a :class:`SweepStream`. Made
+        by ``SweepStream.subscribe``.
+        """
+        self._stream = stream
+        self.cursor = cursor  # seq of the next sweep to read
+        self.dropped = 0
+        self.error = None  # exception raised by the callback, if any
+
+    def get(self, timeout=None):
+        """
+        Next sweep of the stream, waiting for it if needed.
+
+        Parameters
+        ----------
+        timeout : float or None
+            Seconds to wait for a new sweep. If None, waits until one
+            arrives or the stream ends.
+
+        Returns
+        -------
+        Sweep or None
+            None once the stream has ended and every retained sweep
+            has been read.
+
+        Raises
+        ------
+        TimeoutError
+            If no sweep arrives within ``timeout``.
+
+        """
+        return self._stream._next(self, timeout)
+
+    def __iter__(self):
+        while (sweep := self.get()) is not None:
+            yield sweep
+
+    def close(self):
+        """Stop reading; no longer holds back a ``block`` stream."""
+        self._stream._unsubscribe(self)
+
+
+class SweepStream:
+    def __init__(self, vna, capacity=1024, policy="drop_oldest", count=None):
+        """
+        Background S11 acquisition into a circular buffer.
+
+        The VNA must not be used from other threads while the stream
+        runs. The sweep length is fixed at construction.
+
+        Parameters
+        ----------
+        vna : VNA
+            Connected and configured VNA.
+        capacity : int
+            Number of most recent sweeps retained.
+        policy : str
+            Backpressure policy, one of ``POLICIES``.
+        count : int or None
+            Stop after this many sweeps. If None, runs until
+            :meth:`stop`.
+
+        Raises
+        ------
+        ValueError
+            If ``policy`` is unknown or ``capacity`` is not positive.
+
+        """
+        if policy not in POLICIES:
+            raise ValueError(
+                f"Unknown policy {policy!r}, expected one of {POLICIES}."
+            )
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}.")
+        self.vna = vna
+        self.capacity = capacity
+        self.policy = policy
+        self.count = count
+        self.freqs = vna.freqs
+        # one spare row: the slot being filled is never a readable one
+        rows = capacity + 1
+        self._data = np.zeros((rows, len(self.freqs)), dtype=vna.dtype)
+        self._flat = self._data.view(self._data.real.dtype)
+        self._times = np.zeros(rows)
+        self._head = 0  # number of sweeps written
+        self._subs = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._done = False  # no more sweeps will be written
+        self._thread = None
+        self._callback_threads = []
+        self.error = None  # exception that ended the acquisition
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def nsweeps(self):
+        """Number of sweeps acquired so far."""
+        return self._head
+
+    def start(self):
+        """Start the acquisition thread."""
+        if self._thread is not None:
+            raise RuntimeError("Stream already started.")
+        self._thread = threading.Thread(
+            target=self._run, name="cmt_vna-stream", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Stop acquisition after the current sweep and wait for the
+        acquisition and callback threads to finish. Subscriptions can
+        still read the retained sweeps.
+
+        Raises
+        ------
+        Exception
+            The exception that ended the acquisition, if any.
+
+        """
+        self._stop.set()
+        with self._cond:
+            if self._thread is None:
+                self._done = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        for thread in self._callback_threads:
+            thread.join(timeout)
+        if self.error is not None:
+            raise self.error
+
+    def wait(self, timeout=None):
+        """
+        Wait for a stream with a ``count`` to finish, see :meth:`stop`.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.stop(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _slot(self, seq):
+        return seq % (self.capacity + 1)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if self.count is not None and self._head >= self.count:
+                    break
+                if self.policy == "block":
+                    with self._cond:
+                        self._cond.wait_for(self._can_write)
+                    if self._stop.is_set():
+                        break
+                slot = self._slot(self._head)
+                self.vna._trigger()
+                t = time.time()
+                self.vna._read_array("CALC:DATA:SDAT?", out=self._flat[slot])
+                with self._cond:
+                    self._times[slot] = t
+                    self._head += 1
+                    self._cond.notify_all()
+        except Exception as e:  # noqa: BLE001 - raised again by readers
+            self.error = e
+        finally:
+            self._stop.set()
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def _can_write(self):
+        """Whether the next sweep overwrites nothing still unread."""
+        if self._stop.is_set():
+            return True
+        oldest = self._head - self.capacity
+        return all(sub.cursor > oldest for sub in self._subs)
+
+    def subscribe(self, callback=None, from_oldest=False):
+        """
+        Register a consumer.
+
+        Parameters
+        ----------
+        callback : Callable[[Sweep], Any] or None
+            If given, called with every sweep from a dedicated thread
+            until the stream ends. An exception raised by the callback
+            closes the subscription and is stored in its ``error``.
+        from_oldest : bool
+            Start at the oldest retained sweep instead of the next new
+            one.
+
+        Returns
+        -------
+        Subscription
+
+        """
+        with self._cond:
+            start = self._head
+            if from_oldest:
+                start = max(0, self._head - self.capacity)
+            sub = Subscription(self, start)
+            self._subs.append(sub)
+        if callback is not None:
+            thread = threading.Thread(
+                target=self._dispatch,
+                args=(sub, callback),
+                name="cmt_vna-stream-callback",
+                daemon=True,
+            )
+            self._callback_threads.append(thread)
+            thread.start()
+        return sub
+
+    @staticmethod
+    def _dispatch(sub, callback):
+        try:
+            for sweep in sub:
+                callback(sweep)
+        except Exception as e:  # noqa: BLE001 - kept in sub.error
+            sub.error = e
+            sub.close()
+
+    def _unsubscribe(self, sub):
+        with self._cond:
+            if sub in self._subs:
+                self._subs.remove(sub)
+            sub.cursor = None
+            self._cond.notify_all()
+
+    def _next(self, sub, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if sub.cursor is None:
+                    return None
+                oldest = max(0, self._head - self.capacity)
+                if sub.cursor < oldest:
+                    sub.dropped += oldest - sub.cursor
+                    sub.cursor = oldest
+                if sub.cursor < self._head:
+                    slot = self._slot(sub.cursor)
+                    sweep = Sweep(
+                        sub.cursor, self._times[slot], self._data[slot].copy()
+                    )
+                    sub.cursor += 1
+                    if self.policy == "block":
+                        self._cond.notify_all()
+                    return sweep
+                if self._done:
+                    return None
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("No sweep within timeout.")
+                self._cond.wait(remaining)
+
+    def latest(self, n=1):
+        """
+        Copy of the most recent retained sweeps.
+
+        Parameters
+        ----------
+        n : int
+            Maximum number of sweeps.
+
+        Returns
+        -------
+        times : np.ndarray
+            ``time.time()`` at the end of each sweep, oldest first.
+        data : np.ndarray
+            Complex S11 sweeps, shape (len(times), npoints).
+
+        """
+        with self._cond:
+            n = min(n, self.capacity, self._head)
+            slots = [self._slot(s) for s in range(self._head - n, self._head)]
+            return self._times[slots].copy(), self._data[slots].copy()
@@ -1,18 +1,42 @@
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+
 import numpy as np
 
 from . import VNA
+from .async_vna import AsyncVNA
+from .session import ReplayResource
+from .transport import format_ascii_array, parse_ascii_array
+
+# SCPI header -> (DummyResource state attribute, type) of settable values
+_SETTINGS = {
+    "SENS1:FREQ:STAR": ("_fstart", float),
+    "SENS1:FREQ:STOP": ("_fstop", float),
+    "SENS1:SWE:POIN": ("_npoints", int),
+    "SENS1:BWID": ("_ifbw", float),
+    "SOUR:POW": ("_power", float),
+    "SENS1:AVER:COUN": ("_averages", int),
+}
 
 
 class DummyResource:
     """
     Dummy PyVisa.Resource class for testing purposes.
-    Parses SCPI write commands to track VNA state (npoints, fstart, fstop)
-    and responds to query commands with synthetic data.
+    Parses SCPI write commands to track VNA state (npoints, fstart, fstop,
+    ifbw, power, averaging factor) and responds to query commands with
+    synthetic data. Compound command lines (``;``-separated, as sent by
+    ``VNA.apply_profile``) are split like the instrument does.
     """
 
     _DEFAULT_NPOINTS = 1000
     _DEFAULT_FSTART = 1e6
     _DEFAULT_FSTOP = 250e6
+    _DEFAULT_IFBW = 10e3
+    _DEFAULT_POWER = 0.0
+    _DEFAULT_AVERAGES = 1
 
     def __init__(self):
         self.read_termination = None
@@ -20,30 +44,38 @@ class DummyResource:
         self._npoints = self._DEFAULT_NPOINTS
         self._fstart = self._DEFAULT_FSTART
         self._fstop = self._DEFAULT_FSTOP
+        self._ifbw = self._DEFAULT_IFBW
+        self._power = self._DEFAULT_POWER
+        self._averages = self._DEFAULT_AVERAGES
+
+    @staticmethod
+    def _split(command):
+        """Split a compound command line into single commands."""
+        return [c.strip().lstrip(":") for c in command.strip().split(";")]
 
     def write(self, command):
         """Parse SCPI commands to track instrument state."""
-        cmd = command.strip()
-        if cmd.startswith("SENS1:FREQ:STAR"):
+        for cmd in self._split(command):
             parts = cmd.split()
-            self._fstart = float(parts[1])
-        elif cmd.startswith("SENS1:FREQ:STOP"):
-            parts = cmd.split()
-            self._fstop = float(parts[1])
-        elif cmd.startswith("SENS1:SWE:POIN"):
-            parts = cmd.split()
-            self._npoints = int(float(parts[1]))
-        # like the Linux cmtvna server, unrecognized writes (notably
-        # the whole FORMat subsystem) are silently ignored
+            if len(parts) >= 2 and parts[0] in _SETTINGS:
+                attr, typ = _SETTINGS[parts[0]]
+                setattr(self, attr, typ(float(parts[1])))
+            # like the Linux cmtvna server, unrecognized writes (notably
+            # the whole FORMat subsystem) are silently ignored
 
-    def query(self, command):
-        """Respond to simple SCPI queries."""
-        cmd = command.strip()
+    def _answer(self, cmd):
         if cmd == "*IDN?":
             return "DummyVNA"
         if cmd == "*OPC?":
             return "1"
-        raise ValueError(f"Query command {command!r} not recognized by mock.")
+        if cmd.endswith("?") and cmd[:-1] in _SETTINGS:
+            value = getattr(self, _SETTINGS[cmd[:-1]][0])
+            return f"{value:.12g}"
+        raise ValueError(f"Query command {cmd!r} not recognized by mock.")
+
+    def query(self, command):
+        """Respond to simple (and compound) SCPI queries."""
+        return ";".join(self._answer(c) for c in self._split(command))
 
     def query_ascii_values(self, command, container=list):
         """
@@ -82,17 +114,364 @@ class DummyResource:
         pass
 
 
+class DummySocketResource(DummyResource):
+    """
+    DummyResource counterpart of ``transport.SocketResource``. Array
+    queries are rendered to ASCII the way the cmtvna server sends them
+    and parsed back with the bulk parser, so the raw-socket code path
+    of ``VNA`` runs without a server.
+    """
+
+    def query_raw(self, command):
+        """Return the ASCII reply to an array query as bytes."""
+        data = super().query_ascii_values(command, container=np.asarray)
+        return format_ascii_array(data)
+
+    def query_ascii_array(self, command, out=None):
+        """Parse the rendered ASCII reply in bulk."""
+        return parse_ascii_array(self.query_raw(command), out=out)
+
+    def query_ascii_values(self, command, container=list):
+        return container(self.query_ascii_array(command))
+
+
+class TimingModel:
+    """
+    Timing of the cmtvna server and R60 for :class:`SimulatedResource`.
+
+    A sweep of ``npoints`` at ``ifbw`` takes ``sweep_overhead +
+    npoints * (point_overhead + ifbw_factor / ifbw)``; every query
+    costs ``latency`` (one round trip) plus the transfer of its ASCII
+    reply at ``transfer_rate``, at ``bytes_per_value`` for array
+    replies. Each duration is scaled by ``1 + jitter * N(0, 1)``
+    (clipped at zero). The defaults are rough figures for the R60 on
+    a local network; fit them to ``PhaseTimer`` stats of the real
+    instrument for exact numbers.
+
+    Parameters
+    ----------
+    point_overhead : float
+        Seconds per point besides the IF filter (settling, stepping).
+    ifbw_factor : float
+        Measurement time per point in units of 1 / ifbw.
+    sweep_overhead : float
+        Fixed seconds per sweep (trigger handling, retrace).
+    latency : float
+        Seconds per query round trip.
+    transfer_rate : float
+        Reply bytes per second of the cmtvna server.
+    bytes_per_value : int
+        ASCII bytes per array value, ``"%.12e,"`` formatting.
+    jitter : float
+        Relative standard deviation of every duration.
+    seed : int or None
+        Seed of the jitter.
+
+    """
+
+    def __init__(
+        self,
+        point_overhead=20e-6,
+        ifbw_factor=1.0,
+        sweep_overhead=5e-3,
+        latency=0.5e-3,
+        transfer_rate=5e6,
+        bytes_per_value=20,
+        jitter=0.0,
+        seed=None,
+    ):
+        self.point_overhead = point_overhead
+        self.ifbw_factor = ifbw_factor
+        self.sweep_overhead = sweep_overhead
+        self.latency = latency
+        self.transfer_rate = transfer_rate
+        self.bytes_per_value = bytes_per_value
+        self.jitter = jitter
+        self._rng = np.random.default_rng(seed)
+
+    def _jittered(self, t):
+        if not self.jitter:
+            return t
+        return t * max(0.0, 1 + self.jitter * self._rng.standard_normal())
+
+    def sweep_time(self, npoints, ifbw):
+        """Seconds for one sweep."""
+        per_point = self.point_overhead + self.ifbw_factor / ifbw
+        return self._jittered(self.sweep_overhead + npoints * per_point)
+
+    def query_time(self, nbytes):
+        """Seconds for a query with a reply of ``nbytes``."""
+        return self._jittered(self.latency + nbytes / self.transfer_rate)
+
+
+class SimulatedResource(DummyResource):
+    """
+    DummyResource that takes as long as the instrument would, see
+    :class:`TimingModel`.
+
+    ``TRIG:SEQ:SING`` starts a sweep; ``*OPC?`` returns once it is
+    complete. Other writes are free, as the server queues them. Queries
+    block for their round trip and reply transfer, or raise
+    TimeoutError after ``timeout`` milliseconds. Durations run on
+    ``clock`` and ``sleep``, which tests can replace with a fake clock.
+    Replies are those of DummyResource.
+
+    Parameters
+    ----------
+    model : TimingModel or None
+        Timing; if None, the TimingModel defaults.
+    clock : Callable[[], float]
+        Monotonic clock in seconds.
+    sleep : Callable[[float], None]
+        Blocks for the given seconds.
+
+    """
+
+    def __init__(self, model=None, clock=time.monotonic, sleep=time.sleep):
+        super().__init__()
+        self.model = TimingModel() if model is None else model
+        self.clock = clock
+        self.sleep = sleep
+        self._sweep_end = 0.0  # clock time the last sweep completes
+
+    def _wait(self, nbytes, until=0.0):
+        """
+        Block for a query round trip, not before ``until``.
+
+        Raises
+        ------
+        TimeoutError
+            If the reply would take longer than ``timeout``.
+
+        """
+        delay = self.model.query_time(nbytes)
+        delay = max(delay, until - self.clock() + delay)
+        if self.timeout is not None and delay > self.timeout / 1e3:
+            self.sleep(self.timeout / 1e3)
+            raise TimeoutError(
+                "cmtvna server did not reply within the timeout period."
+            )
+        self.sleep(delay)
+
+    def write(self, command):
+        super().write(command)
+        if "TRIG:SEQ:SING" in command:
+            start = max(self.clock(), self._sweep_end)
+            duration = self.model.sweep_time(self._npoints, self._ifbw)
+            self._sweep_end = start + duration
+
+    def query(self, command):
+        reply = super().query(command)
+        until = self._sweep_end if "*OPC?" in command else 0.0
+        self._wait(len(reply) + 1, until=until)
+        return reply
+
+    def query_ascii_values(self, command, container=list):
+        data = super().query_ascii_values(command, container=np.asarray)
+        self._wait(data.size * self.model.bytes_per_value)
+        return container(data)
+
+
+class SimulatedSocketResource(DummySocketResource, SimulatedResource):
+    """
+    SimulatedResource on the raw-socket code path of ``VNA``: replies
+    are rendered to ASCII and bulk-parsed like DummySocketResource.
+    """
+
+
+def synthetic_s11(freqs):
+    """
+    Synthetic S11 trace of an antenna-like DUT: a reflection behind a
+    30 ns delay with a ripple in magnitude, so every point differs.
+    """
+    f = np.asarray(freqs, dtype=np.float64)
+    mag = 0.2 + 0.1 * np.cos(2 * np.pi * f / 50e6)
+    return mag * np.exp(-2j * np.pi * f * 30e-9)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        fake = self.server.fake
+        with fake._lock:
+            fake._conns.add(self.connection)
+        try:
+            for line in self.rfile:
+                reply = fake._handle(line.decode())
+                if reply is fake.DROP:
+                    return
+                if reply is not None:
+                    self.wfile.write(reply + b"\n")
+        except OSError:
+            pass  # connection dropped
+        finally:
+            with fake._lock:
+                fake._conns.discard(self.connection)
+
+
+class FakeCmtvnaServer:
+    """
+    In-process SCPI server on localhost that behaves like the cmtvna
+    socket server, for end-to-end tests and benchmarks of the real
+    ``VNA`` transports (pyvisa TCPIP SOCKET and raw socket).
+
+    Commands are newline-terminated and may be compound (``;``). State
+    is tracked by a shared DummyResource (or SimulatedResource), so
+    settings persist across connections like on the instrument.
+    Writes are never answered, and like the real server the FORMat
+    subsystem is ignored: ``FORM:DATA`` writes are no-ops and
+    ``FORM:DATA?`` (as any unknown query) gets no reply. Array replies
+    are rendered with ``format_ascii_array``; S11 sweeps come from
+    ``trace``.
+
+    Faults are injected through attributes that can be changed while
+    the server runs: ``delay`` seconds are slept before every reply,
+    and after ``drop_after`` queries the connection is closed instead
+    of answered. ``drop`` closes all open connections at once.
+
+    Parameters
+    ----------
+    host : str
+        Address to listen on.
+    port : int
+        Port to listen on; 0 picks a free one, see ``port``.
+    model : TimingModel or None
+        If set, replies take as long as this model says, see
+        :class:`SimulatedResource`.
+    trace : Callable[[np.ndarray], np.ndarray] or None
+        Complex S11 served for a frequency axis. If None, uses
+        ``synthetic_s11``.
+
+    """
+
+    DROP = object()  # _handle result: close the connection
+
+    def __init__(self, host="127.0.0.1", port=0, model=None, trace=None):
+        if model is None:
+            self.resource = DummyResource()
+        else:
+            self.resource = SimulatedResource(model)
+        self.trace = synthetic_s11 if trace is None else trace
+        self.delay = 0.0
+        self.drop_after = None
+        self.n_queries = 0
+        # resource state, counters and _conns; every call into the
+        # resource holds it, as handler threads share the resource
+        self._lock = threading.Lock()
+        self._conns = set()
+        self._server = _TCPServer((host, port), _Handler)
+        self._server.fake = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        """Serve in a background thread."""
+        # short poll interval, so close returns promptly
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread, until ``close``."""
+        self._server.serve_forever()
+
+    def drop(self):
+        """Close all open client connections."""
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        """Stop serving and close all connections."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self.drop()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _array(self, cmd):
+        res = self.resource
+        with self._lock:
+            data = res.query_ascii_values(cmd, container=np.asarray)
+            axis = (res._fstart, res._fstop, res._npoints)
+        if cmd == "CALC:DATA:SDAT?":
+            freqs = np.linspace(*axis)
+            data = self.trace(freqs).astype(np.complex128).view(np.float64)
+        return format_ascii_array(data)
+
+    def _handle(self, line):
+        """Reply to one command line: bytes, None or ``DROP``."""
+        replies = []
+        for cmd in DummyResource._split(line):
+            if not cmd:
+                continue
+            if not cmd.endswith("?"):
+                with self._lock:
+                    self.resource.write(cmd)
+                continue
+            with self._lock:
+                self.n_queries += 1
+                drop = self.drop_after is not None and (
+                    self.n_queries > self.drop_after
+                )
+            if drop:
+                return self.DROP
+            try:
+                if cmd in ("CALC:DATA:SDAT?", "SENS1:FREQ:DATA?"):
+                    replies.append(self._array(cmd))
+                else:
+                    with self._lock:
+                        reply = self.resource.query(cmd)
+                    replies.append(reply.encode())
+            except ValueError:
+                return None  # unknown query: never answered
+        if not replies:
+            return None
+        if self.delay:
+            time.sleep(self.delay)
+        return b";".join(replies)
+
+
 class DummyVNA(VNA):
     """
     Mock VNA for testing purposes. Uses DummyResource instead of a real
     PyVISA connection. All base class methods work through the stateful
     DummyResource, so the code paths match the real VNA as closely as
     possible.
+
+    Constructed with ``simulate=True`` (or a :class:`TimingModel`), it
+    uses :class:`SimulatedResource` instead, so sweeps, queries and
+    transfers take realistic time and cadence or pipelining changes can
+    be benchmarked without an instrument.
     """
 
     # Resource class to instantiate; tests override this to model
     # cold-start / never-ready instrument servers.
     _resource_cls = DummyResource
+    # used instead when constructed with transport="socket"
+    _socket_resource_cls = DummySocketResource
+
+    def __init__(self, *args, simulate=None, **kwargs):
+        if simulate is True:
+            simulate = TimingModel()
+        self.simulate = simulate or None
+        super().__init__(*args, **kwargs)
 
     def _open_resource(self):
         """
@@ -100,7 +479,93 @@ class DummyVNA(VNA):
         PyVISA. The base class _configure_vna still runs, so the SCPI
         config push and the verify loop are exercised for real.
         """
-        s = self._resource_cls()
+        if self.simulate is not None:
+            if self.transport == "socket":
+                s = SimulatedSocketResource(self.simulate)
+            else:
+                s = SimulatedResource(self.simulate)
+        elif self.transport == "socket":
+            s = self._socket_resource_cls()
+        else:
+            s = self._resource_cls()
         s.read_termination = "\n"
         s.timeout = self.vna_timeout
         return s
+
+
+class ReplayVNA(VNA):
+    """
+    VNA answered by a session log recorded with ``VNA(record=path)``
+    instead of an instrument, see :class:`cmt_vna.session.ReplayResource`.
+
+    Construct it with the settings of the recorded run (``transport``,
+    ``precision``, ...) and repeat its calls: every command it sends
+    is checked against the log, and ``RuntimeError`` is raised where
+    the conversation diverges.
+
+    Parameters
+    ----------
+    path : Path or str
+        Session log.
+    speed : float or None
+        None replays as fast as possible, 1 with the recorded reply
+        latencies (2 twice as fast, ...).
+    *args, **kwargs
+        Passed on to ``VNA``.
+
+    """
+
+    def __init__(self, path, *args, speed=None, **kwargs):
+        self.replay_path = path
+        self.replay_speed = speed
+        super().__init__(*args, **kwargs)
+
+    def _open_resource(self):
+        s = ReplayResource(self.replay_path, speed=self.replay_speed)
+        s.timeout = self.vna_timeout
+        return s
+
+
+class AsyncDummyResource:
+    """
+    Async counterpart of DummySocketResource for ``AsyncVNA`` tests.
+    Every call yields to the event loop once, like a real socket
+    round trip would.
+    """
+
+    def __init__(self):
+        self._sync = DummySocketResource()
+        self.read_termination = "\n"
+        self.timeout = None
+
+    async def write(self, command):
+        await asyncio.sleep(0)
+        self._sync.write(command)
+
+    async def query(self, command):
+        await asyncio.sleep(0)
+        return self._sync.query(command)
+
+    async def query_raw(self, command):
+        await asyncio.sleep(0)
+        return self._sync.query_raw(command)
+
+    async def query_ascii_array(self, command, out=None):
+        await asyncio.sleep(0)
+        return self._sync.query_ascii_array(command, out=out)
+
+    async def close(self):
+        pass
+
+
+class AsyncDummyVNA(AsyncVNA):
+    """
+    Mock AsyncVNA backed by AsyncDummyResource instead of a socket.
+    """
+
+    _resource_cls = AsyncDummyResource
+
+    async def _open_resource(self):
+        s = self._resource_cls()
+        s.timeout = self.vna_timeout
+        return s
@@ -0,0 +1,199 @@
+"""
+Per-phase timing instrumentation.
+
+:class:`PhaseTimer` records the wall-clock duration of named phases
+(trigger, sweep, transfer, parse, switch, and whole ``measure_*``
+calls) into running histograms with fixed log-spaced bins, so memory
+stays constant no matter how long a run is. When disabled, ``span``
+returns a shared no-op context manager and ``timed`` methods only pay
+an attribute lookup.
+"""
+
+import bisect
+import functools
+import json
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+
+# histogram bin edges in seconds: 10 bins per decade from 1 us to 1000 s
+BIN_EDGES = tuple(np.logspace(-6, 3, 91).tolist())
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("_name", "_t0", "_timer")
+
+    def __init__(self, timer, name):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._timer.record(self._name, time.perf_counter() - self._t0)
+        return False
+
+
+class PhaseTimer:
+    def __init__(self, enabled=False):
+        """
+        Running per-phase timing statistics.
+
+        Parameters
+        ----------
+        enabled : bool
+            Whether spans are recorded. Can be toggled at any time
+            through the ``enabled`` attribute.
+
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()  # switch_fn may run in a worker
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded statistics."""
+        with self._lock:
+            self._stats = {}
+
+    def span(self, name):
+        """
+        Context manager timing one occurrence of phase ``name``.
+
+        Returns a shared no-op context manager when disabled.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        """
+        Add one duration to the statistics of phase ``name``.
+
+        Parameters
+        ----------
+        name : str
+            Phase name.
+        seconds : float
+            Duration in seconds.
+
+        """
+        i = bisect.bisect_right(BIN_EDGES, seconds) - 1
+        i = min(max(i, 0), len(BIN_EDGES) - 2)
+        with self._lock:
+            st = self._stats.get(name)
+            if st is None:
+                st = self._stats[name] = {
+                    "count": 0,
+                    "total": 0.0,
+                    "min": float("inf"),
+                    "max": 0.0,
+                    "hist": [0] * (len(BIN_EDGES) - 1),
+                }
+            st["count"] += 1
+            st["total"] += seconds
+            st["min"] = min(st["min"], seconds)
+            st["max"] = max(st["max"], seconds)
+            st["hist"][i] += 1
+
+    @property
+    def phases(self):
+        return list(self._stats)
+
+    def stats(self, name=None):
+        """
+        Summary statistics of one or all phases.
+
+        Parameters
+        ----------
+        name : str or None
+            Phase name. If None, returns all phases.
+
+        Returns
+        -------
+        dict
+            ``count``, ``total``, ``mean``, ``min``, ``max`` (seconds),
+            ``median`` and ``p95`` estimated from the histogram, and
+            the raw ``hist`` counts over ``BIN_EDGES``. Keyed by phase
+            name if ``name`` is None.
+
+        """
+        if name is None:
+            return {n: self.stats(n) for n in self.phases}
+        with self._lock:
+            st = dict(self._stats[name])
+            st["hist"] = list(st["hist"])
+        st["mean"] = st["total"] / st["count"]
+        st["median"] = self._quantile(st, 0.5)
+        st["p95"] = self._quantile(st, 0.95)
+        return st
+
+    @staticmethod
+    def _quantile(st, q):
+        """Geometric bin center of the ``q`` quantile, clipped to data."""
+        target = q * st["count"]
+        cum = 0
+        for i, n in enumerate(st["hist"]):
+            cum += n
+            if cum >= target and n:
+                center = (BIN_EDGES[i] * BIN_EDGES[i + 1]) ** 0.5
+                return min(max(center, st["min"]), st["max"])
+        return st["max"]
+
+    def quantile(self, name, q):
+        """
+        Estimate a quantile of phase ``name`` from its histogram.
+
+        Parameters
+        ----------
+        name : str
+            Phase name.
+        q : float
+            Quantile between 0 and 1.
+
+        Returns
+        -------
+        float
+            Duration in seconds, accurate to the bin width (a factor
+            of 10**0.1).
+
+        """
+        return self._quantile(self.stats(name), q)
+
+    def dump(self, path):
+        """
+        Write all statistics and the bin edges to a JSON file.
+
+        Parameters
+        ----------
+        path : Path or str
+            Output file.
+
+        """
+        out = {"bin_edges": list(BIN_EDGES), "phases": self.stats()}
+        Path(path).write_text(json.dumps(out, indent=1))
+
+
+def timed(name):
+    """
+    Decorator recording each call of a method under phase ``name`` of
+    the instance's ``timer``.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.timer.enabled:
+                return method(self, *args, **kwargs)
+            with self.timer.span(name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
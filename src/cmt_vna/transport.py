@@ -0,0 +1,334 @@
+"""
+Raw-socket SCPI transport for the Linux cmtvna server.
+
+``pyvisa`` with the ``@py`` backend reads socket replies in small
+chunks, concatenates them, and decodes the whole message to ``str``
+before ``query_ascii_values`` parses it. For 10k-100k point sweeps on
+the Raspberry Pi that bookkeeping costs more than the transfer itself.
+:class:`SocketResource` talks to the server over a plain TCP socket,
+receives replies into one reusable byte buffer and hands them to
+:func:`parse_ascii_array`, which converts the whole block in a single
+NumPy call.
+
+The server only speaks ASCII (it ignores the FORMat subsystem, see
+``VNA._push_config``), so arrays arrive as comma-separated numbers
+terminated by a newline.
+"""
+
+import asyncio
+import socket
+
+import numpy as np
+
+# initial size of the receive buffer, grown on demand and then reused
+BUFFER_SIZE = 1 << 16
+# ASCII bytes parsed per step into a preallocated ``out``, so the
+# temporary values stay small and in cache instead of reply-sized
+PARSE_CHUNK = 1 << 16
+# longest value the chunk boundary search expects, in bytes
+_MAX_VALUE_LEN = 64
+
+
+def parse_ascii_array(raw, out=None):
+    """
+    Parse a comma-separated ASCII block into a float array.
+
+    Parameters
+    ----------
+    raw : bytes-like or str
+        ASCII reply, without the read termination (trailing whitespace
+        is tolerated). May be a view of a receive buffer.
+    out : np.ndarray or None
+        Preallocated output array. Its size must match the number of
+        values in ``raw``; the values are parsed straight into it in
+        its float dtype (float32 for single precision),
+        ``PARSE_CHUNK`` bytes at a time. If None, a new float64 array
+        is returned.
+
+    Returns
+    -------
+    values : np.ndarray
+        Parsed values; ``out`` if it was given.
+
+    Raises
+    ------
+    ValueError
+        If ``raw`` holds a different number of values than ``out``.
+
+    """
+    if isinstance(raw, str):
+        raw = raw.encode()
+    if out is None:
+        return np.fromstring(bytes(raw), dtype=np.float64, sep=",")
+    flat = out.reshape(-1) if out.flags.c_contiguous else out.flat
+    raw = memoryview(raw)
+    n = start = 0
+    while start < len(raw):
+        stop = start + PARSE_CHUNK
+        if stop < len(raw):
+            # end the chunk at the last separator before ``stop``
+            cut = bytes(raw[stop - _MAX_VALUE_LEN : stop]).rfind(b",")
+            stop = len(raw) if cut < 0 else stop - _MAX_VALUE_LEN + cut
+        values = np.fromstring(
+            bytes(raw[start:stop]), dtype=out.dtype, sep=","
+        )
+        if n + values.size > out.size:
+            n = np.fromstring(bytes(raw), dtype=out.dtype, sep=",").size
+            break
+        flat[n : n + values.size] = values
+        n += values.size
+        start = stop + 1
+    if n != out.size:
+        raise ValueError(
+            f"Expected {out.size} values in ASCII block, got {n}."
+        )
+    return out
+
+
+def format_ascii_array(values):
+    """
+    Render an array as the cmtvna server does: comma-separated
+    scientific notation, no terminator.
+
+    Parameters
+    ----------
+    values : array-like
+        Real values to render.
+
+    Returns
+    -------
+    bytes
+        ASCII block.
+
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return ",".join(f"{v:.12e}" for v in values).encode()
+
+
+class SocketResource:
+    """
+    Minimal SCPI-over-TCP resource for the cmtvna server.
+
+    Implements the subset of ``pyvisa.Resource`` that ``VNA`` uses
+    (``write``, ``query``, ``query_ascii_values``, ``timeout``,
+    ``read_termination``, ``close``), plus ``query_raw`` and
+    ``query_ascii_array`` for the bulk array path.
+
+    Parameters
+    ----------
+    host : str
+        IP address of the cmtvna server.
+    port : int
+        Port of the cmtvna server.
+    timeout : float or None
+        Timeout in milliseconds, like ``pyvisa.Resource.timeout``. If
+        None, reads block indefinitely.
+    buffer_size : int
+        Initial size of the receive buffer in bytes. The buffer grows
+        to fit the largest reply and is reused afterwards. Bytes received
+        after a reply's termination are kept for the next read.
+
+    """
+
+    def __init__(self, host, port, timeout=None, buffer_size=BUFFER_SIZE):
+        self.read_termination = "\n"
+        self.write_termination = "\n"
+        self._sock = socket.create_connection((host, port))
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.timeout = timeout
+        self._buf = bytearray(buffer_size)
+        # received bytes not yet returned by a read: self._buf[start:end]
+        self._start = 0
+        self._end = 0
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+        self._sock.settimeout(None if value is None else value / 1e3)
+
+    def write(self, command):
+        """Send one SCPI command, appending the write termination."""
+        msg = command.rstrip("\r\n") + self.write_termination
+        self._sock.sendall(msg.encode())
+
+    def _read_into_buffer(self):
+        """
+        Receive one reply into the reusable buffer, starting with any
+        bytes left over after the previous reply.
+
+        Returns
+        -------
+        n : int
+            Length of the reply in the buffer, excluding the read
+            termination.
+
+        Raises
+        ------
+        TimeoutError
+            If the server does not finish the reply within ``timeout``.
+        ConnectionError
+            If the server closes the connection mid-reply.
+
+        """
+        term = self.read_termination.encode()
+        n = self._end - self._start
+        if self._start:
+            self._buf[:n] = self._buf[self._start : self._end]
+            self._start = 0
+            self._end = n
+        end = self._buf.find(term, 0, n)
+        while end < 0:
+            if n == len(self._buf):
+                self._buf.extend(bytes(len(self._buf)))  # double
+            with memoryview(self._buf) as view:
+                nrecv = self._sock.recv_into(view[n:])
+            if nrecv == 0:
+                raise ConnectionError("cmtvna server closed the connection.")
+            # only the new bytes (plus a terminator-length overlap) can
+            # hold the terminator
+            end = self._buf.find(term, max(n - len(term) + 1, 0), n + nrecv)
+            n += nrecv
+            self._end = n
+        self._start = end + len(term)
+        return end
+
+    def read_raw(self):
+        """
+        Read one reply, without the read termination, as a read-only
+        memoryview of the receive buffer. It is only valid until the
+        next read; copy it with ``bytes`` to keep it.
+        """
+        n = self._read_into_buffer()
+        return memoryview(self._buf).toreadonly()[:n]
+
+    def query_raw(self, command):
+        """Send a query and return the raw reply, see :meth:`read_raw`."""
+        self.write(command)
+        return self.read_raw()
+
+    def query(self, command):
+        """Send a query and return the reply as a string."""
+        return str(self.query_raw(command), "ascii").strip()
+
+    def query_ascii_array(self, command, out=None):
+        """
+        Send a query and parse the ASCII array reply in bulk.
+
+        Parameters
+        ----------
+        command : str
+            SCPI query command.
+        out : np.ndarray or None
+            Preallocated output, see :func:`parse_ascii_array`.
+
+        Returns
+        -------
+        np.ndarray
+            Parsed float64 values.
+
+        """
+        return parse_ascii_array(self.query_raw(command), out=out)
+
+    def query_ascii_values(self, command, container=list):
+        """``pyvisa``-compatible ASCII array query."""
+        return container(self.query_ascii_array(command))
+
+    def close(self):
+        self._sock.close()
+
+
+class AsyncSocketResource:
+    """
+    asyncio counterpart of :class:`SocketResource`, built on
+    ``asyncio`` streams. Create it with :meth:`open`.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+    writer : asyncio.StreamWriter
+    timeout : float or None
+        Timeout in milliseconds for each reply. If None, waits
+        indefinitely.
+
+    """
+
+    def __init__(self, reader, writer, timeout=None):
+        self.read_termination = "\n"
+        self.write_termination = "\n"
+        self.timeout = timeout
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def open(cls, host, port, timeout=None, limit=1 << 26):
+        """
+        Connect to the cmtvna server.
+
+        Parameters
+        ----------
+        host : str
+            IP address of the cmtvna server.
+        port : int
+            Port of the cmtvna server.
+        timeout : float or None
+            Reply timeout in milliseconds.
+        limit : int
+            Largest reply in bytes the stream reader will buffer.
+
+        Returns
+        -------
+        AsyncSocketResource
+
+        """
+        reader, writer = await asyncio.open_connection(host, port, limit=limit)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(reader, writer, timeout=timeout)
+
+    async def write(self, command):
+        """Send one SCPI command, appending the write termination."""
+        msg = command.rstrip("\r\n") + self.write_termination
+        self._writer.write(msg.encode())
+        await self._writer.drain()
+
+    async def read_raw(self):
+        """
+        Read one reply as bytes, without the read termination.
+
+        Raises
+        ------
+        TimeoutError
+            If the server does not finish the reply within ``timeout``.
+
+        """
+        term = self.read_termination.encode()
+        timeout = None if self.timeout is None else self.timeout / 1e3
+        try:
+            raw = await asyncio.wait_for(self._reader.readuntil(term), timeout)
+        except asyncio.TimeoutError as e:
+            raise TimeoutError(
+                "cmtvna server did not reply within the timeout period."
+            ) from e
+        return raw[: -len(term)]
+
+    async def query_raw(self, command):
+        """Send a query and return the raw reply as bytes."""
+        await self.write(command)
+        return await self.read_raw()
+
+    async def query(self, command):
+        """Send a query and return the reply as a string."""
+        return (await self.query_raw(command)).decode().strip()
+
+    async def query_ascii_array(self, command, out=None):
+        """Send a query and parse the ASCII array reply in bulk."""
+        return parse_ascii_array(await self.query_raw(command), out=out)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
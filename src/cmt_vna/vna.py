@@ -1,13 +1,171 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import time
+import warnings
 
 import numpy as np
 import pyvisa
 
+from .calkit import S911T, ErrorModel, complex_dtype
+from .session import SessionRecorder
+from .stream import SweepStream
+from .timing import PhaseTimer, timed
+from .transport import SocketResource, parse_ascii_array
 
 IP = "127.0.0.1"
 PORT = 5025
+# "visa" goes through pyvisa-py; "socket" uses the raw-socket
+# SocketResource with the bulk ASCII parser
+TRANSPORTS = ("visa", "socket")
+
+# Fixed configuration written on connect: no instrument-side averaging
+# until ``VNA.averages`` is set, linear sweep instead of point by
+# point, and sweeps triggered over the bus.
+CONFIG_COMMANDS = (
+    "SENS1:AVER:COUN 1",
+    "SENS1:AVER OFF",
+    "SWE:TYPE LIN",
+    "TRIG:SOUR BUS",
+)
+
+# Tracked sweep settings: attribute -> (set command, query command).
+# ``VNA.apply_profile`` joins the set commands of all changed settings
+# into one compound command line (``;:`` restarts at the root of the
+# SCPI tree) and reads them back with one compound query.
+SETTING_COMMANDS = {
+    "power_dBm": ("SOUR:POW {}", "SOUR:POW?"),
+    "fstart": ("SENS1:FREQ:STAR {} HZ", "SENS1:FREQ:STAR?"),
+    "fstop": ("SENS1:FREQ:STOP {} HZ", "SENS1:FREQ:STOP?"),
+    "npoints": ("SENS1:SWE:POIN {}", "SENS1:SWE:POIN?"),
+    "ifbw": ("SENS1:BWID {} HZ", "SENS1:BWID?"),
+    "averages": ("SENS1:AVER:COUN {}", "SENS1:AVER:COUN?"),
+}
+# settings that define the frequency axis, see ``VNA.freqs``
+FREQ_SETTINGS = ("fstart", "fstop", "npoints")
+
+
+def setting_commands(name, value):
+    """
+    SCPI commands that set one tracked setting.
+
+    Parameters
+    ----------
+    name : str
+        Key of ``SETTING_COMMANDS``.
+    value : float or int
+        New value.
+
+    Returns
+    -------
+    list of str
+        Commands, without termination.
+
+    """
+    cmds = [SETTING_COMMANDS[name][0].format(value)]
+    if name == "averages":
+        # the factor only applies while averaging is switched on
+        cmds.append(f"SENS1:AVER {'ON' if value > 1 else 'OFF'}")
+    return cmds
+
+
+def compound(commands):
+    """Join SCPI commands into one compound command line."""
+    return ";:".join(commands) + "\n"
+
+
+def parse_settings(names, response):
+    """
+    Parse the reply to a compound query of ``SETTING_COMMANDS``.
+
+    Parameters
+    ----------
+    names : list of str
+        Queried settings, in query order.
+    response : str
+        Semicolon-separated reply.
+
+    Returns
+    -------
+    dict
+        Setting values; ``npoints`` and ``averages`` as int.
+
+    Raises
+    ------
+    RuntimeError
+        If the reply holds a different number of values.
+
+    """
+    values = response.strip().split(";")
+    if len(values) != len(names):
+        raise RuntimeError(
+            f"Expected {len(names)} values from VNA, got {response!r}."
+        )
+    parsed = {}
+    for name, value in zip(names, values):
+        value = float(value)
+        if name in ("npoints", "averages"):
+            value = int(value)
+        parsed[name] = value
+    return parsed
+
+
+def check_readback(requested, readback):
+    """
+    Compare requested settings with the instrument's readback.
+
+    Parameters
+    ----------
+    requested : dict
+        Settings that were written.
+    readback : dict
+        The same settings read back from the instrument.
+
+    Returns
+    -------
+    applied : dict
+        Value to track per setting: the requested one where it matches
+        the readback (keeping its type), the readback otherwise.
+    mismatch : dict
+        ``(requested, readback)`` per setting that did not match.
+
+    """
+    applied, mismatch = {}, {}
+    for key, value in requested.items():
+        if np.isclose(value, readback[key], rtol=1e-9, atol=1e-9):
+            applied[key] = value
+        else:
+            applied[key] = readback[key]
+            mismatch[key] = (value, readback[key])
+    return applied, mismatch
+
+
+def report_mismatch(mismatch, strict=False):
+    """
+    Handle settings the instrument did not apply as requested (it
+    rounds IFBW to its supported steps and clips frequencies): warn,
+    the cached state having followed the instrument, or raise.
+
+    Parameters
+    ----------
+    mismatch : dict
+        ``(requested, readback)`` per setting, see ``check_readback``.
+    strict : bool
+        Raise instead of warning.
+
+    Raises
+    ------
+    RuntimeError
+        If ``strict`` and ``mismatch`` is not empty.
+
+    """
+    if not mismatch:
+        return
+    msg = f"VNA did not apply settings (requested, readback): {mismatch}."
+    if strict:
+        raise RuntimeError(msg)
+    warnings.warn(f"{msg} Using the instrument's values.", stacklevel=3)
+
 
 # Default (low, high) dB bands for ``VNA.activeflag``. ``None`` disables
 # that side of the check. Open/short standards should sit near 0 dB; loads
@@ -23,14 +181,110 @@ DEFAULT_FLAG_THRESHOLDS = {
 }
 
 
+# Threshold key of each switch path, see ``VNA.measure_sequence``. Paths
+# without a key (or without a band) are not flagged.
+STATE_FLAG_KEYS = {
+    "VNAO": "VNAO",
+    "VNAS": "VNAS",
+    "VNAL": "VNAL",
+    "VNARF": "rec",
+    "VNAANT": "ant",
+    "VNANOFF": "load",
+    "VNANON": "noise",
+}
+# What ``VNA.measure_sequence`` does with a sweep outside its band:
+# nothing, record it in ``last_sequence_flags``, stop and raise, or
+# stop and start the sequence over (``flag_retries`` times).
+FLAG_POLICIES = ("off", "record", "abort", "retry")
+
+
 def lin2dB(data):
     """Return the dB magnitude of a complex S-parameter array."""
     return 20 * np.log10(np.abs(data))
 
 
+def mean_dB(data):
+    """
+    Mean dB magnitude of each sweep of a stack, along the last axis.
+
+    Computed as 10 log10 |x|^2, so the whole (..., npoints) stack takes
+    one log10 pass and no square root.
+
+    Parameters
+    ----------
+    data : array-like
+        S-parameter sweeps, shape (..., npoints).
+
+    Returns
+    -------
+    np.ndarray
+        Mean dB magnitude, shape (...).
+
+    """
+    data = np.asarray(data)
+    power = np.square(data.real, dtype=np.result_type(data.real, 1.0))
+    if np.iscomplexobj(data):
+        power += np.square(data.imag)
+    np.log10(power, out=power)
+    return 10 * power.mean(axis=-1)
+
+
 def mlin(x):
     """Return the mean dB magnitude of a complex S-parameter array."""
-    return np.mean(lin2dB(x))
+    return np.mean(mean_dB(x))
+
+
+def in_band(value, band):
+    """
+    Check values against a ``(low, high)`` dB band of
+    ``DEFAULT_FLAG_THRESHOLDS``; either bound may be None.
+
+    Returns
+    -------
+    bool or np.ndarray
+        True where the value is not outside the band; a bool for a
+        scalar value.
+
+    """
+    low, high = band
+    value = np.asarray(value)
+    ok = np.ones(value.shape, dtype=bool)
+    if low is not None:
+        ok &= ~(value < low)
+    if high is not None:
+        ok &= ~(value > high)
+    return ok if ok.ndim else bool(ok)
+
+
+def flag_sweeps(data, key, thresholds=None):
+    """
+    Flag a stack of sweeps against one band in a single vectorized pass.
+
+    Parameters
+    ----------
+    data : array-like
+        S-parameter sweeps, shape (n, npoints) or any (..., npoints).
+    key : str
+        Key of the band, e.g. ``"VNAO"`` or ``"ant"``.
+    thresholds : dict, optional
+        Band overrides, see ``VNA.activeflag``.
+
+    Returns
+    -------
+    np.ndarray
+        True for each sweep whose mean dB magnitude is in the band,
+        shape (...).
+
+    """
+    bands = {**DEFAULT_FLAG_THRESHOLDS, **(thresholds or {})}
+    return in_band(mean_dB(data), bands[key])
+
+
+def _check_flag_policy(policy):
+    if policy not in FLAG_POLICIES:
+        raise ValueError(
+            f"Unknown flag policy {policy!r}, expected one of {FLAG_POLICIES}."
+        )
 
 
 class VNA:
@@ -41,6 +295,13 @@ class VNA:
         timeout=1000,
         save_dir=Path("."),
         switch_fn=None,
+        transport="visa",
+        pipelined=False,
+        timing=False,
+        archive=None,
+        precision="double",
+        flag_policy="off",
+        record=None,
     ):
         """
         Class controlling Copper Mountain VNA.
@@ -68,8 +329,68 @@ class VNA:
             unreported failed switch would contaminate the subsequent S11
             measurement. If None, OSL prompts for manual switching and
             ``measure_ant``/``measure_rec`` raise.
+        transport : str
+            How to talk to the cmtvna server: ``"visa"`` (pyvisa-py
+            socket resource) or ``"socket"`` (raw TCP socket with bulk
+            ASCII parsing, see :mod:`cmt_vna.transport`).
+        pipelined : bool
+            Default for ``measure_sequence``: if True, the switch to the
+            next path in a multi-path measurement runs in a worker
+            thread while the previous sweep is read out. Opt in only if
+            ``switch_fn`` is safe to call from another thread.
+        timing : bool
+            Record per-phase timing spans in the ``timer`` attribute, a
+            :class:`cmt_vna.timing.PhaseTimer`. Phases are ``trigger``
+            (writing the trigger), ``sweep`` (the ``*OPC?`` round trip,
+            i.e. the sweep itself plus query latency), ``transfer`` and
+            ``parse`` of the ASCII trace (one ``transfer`` span covering
+            both with pyvisa resources, which parse internally),
+            ``switch`` (``switch_fn`` settling), and one span per
+            ``measure_*`` call under the method's name. Can be toggled
+            later with ``timer.enabled``.
+        archive : SweepArchive or None
+            If set, ``read_data``, ``add_OSL``, ``measure_ant``,
+            ``measure_rec`` and ``measure_dut`` also append every sweep
+            with the ``header`` to this
+            :class:`cmt_vna.archive.SweepArchive` as it is taken, so
+            nothing is lost if the process dies before ``write_data``.
+            Streams are named after the data keys (``gamma``, ``vna``,
+            ``ant``, ``load``, ``noise``, ``rec`` or the switch state);
+            sweeps taken after a setup change go to a new stream
+            ``<key>_1``, ... (``SweepArchive.key_for``).
+        precision : str
+            ``"double"`` (complex128) or ``"single"`` (complex64), see
+            ``calkit.PRECISIONS``. Sweeps are parsed, stored, archived
+            and calibrated in this precision; single halves memory and
+            disk use at a resolution far below the instrument noise.
+        flag_policy : str
+            Default for ``measure_sequence`` (and so ``measure_OSL``,
+            ``measure_ant`` and ``measure_rec``): how to handle a sweep
+            whose mean dB magnitude falls outside its band, one of
+            ``FLAG_POLICIES``. Bands are ``DEFAULT_FLAG_THRESHOLDS``
+            updated with the ``flag_thresholds`` attribute, and
+            ``"retry"`` starts over at most ``flag_retries`` times.
+        record : Path or str or None
+            If set, the SCPI conversation with the instrument (from
+            the configuration written on connect) is logged to this
+            file, see :class:`cmt_vna.session.SessionRecorder`; replay
+            it with ``testing.ReplayVNA``. The log is closed by
+            ``close`` (or leaving a ``with VNA(...)`` block).
+
+        Raises
+        ------
+        ValueError
+            If ``transport`` is not one of ``TRANSPORTS``, ``precision``
+            is unknown or ``flag_policy`` is not one of
+            ``FLAG_POLICIES``.
 
         """
+        if transport not in TRANSPORTS:
+            raise ValueError(
+                f"Unknown transport {transport!r}, expected one of "
+                f"{TRANSPORTS}."
+            )
+        _check_flag_policy(flag_policy)
 
         # attributes
         self._fstart = None
@@ -77,27 +398,50 @@ class VNA:
         self._npoints = None
         self._ifbw = None
         self._power_dBm = None
+        self._averages = None
+        self._freqs = None  # cached frequency axis, see freqs
+        self.precision = precision
+        self.dtype = complex_dtype(precision)  # of sweeps
 
         self._clear_data()
         self.save_dir = Path(save_dir)
         self.switch_fn = switch_fn
+        self.pipelined = pipelined
+        self.profiles = {}  # named settings, see apply_profile
+        self.last_sequence_timing = None
+        self.flag_policy = flag_policy
+        self.flag_thresholds = {}  # band overrides per key
+        self.flag_retries = 1
+        self.last_sequence_flags = None
+        self.timer = PhaseTimer(enabled=timing)
+        self.archive = archive
+        self.error_models = {}  # solved per std_key, see error_model
+        self._cal_models = {}  # error_models on the last used grid
+        self._cal_stds = {}  # std_key -> (OSL block, kit), see add_OSL
 
         # configure and connect to VNA
         self.vna_ip = ip
         self.vna_port = port
         self.vna_timeout = timeout * 1e3  # convert to milliseconds
+        self.transport = transport
+        self.record = record
         self.s = self._configure_vna()
 
     def _open_resource(self):
         """
-        Use pyvisa to open the socket resource to the VNA.
+        Open the socket resource to the VNA, through pyvisa or the raw
+        socket transport depending on the ``transport`` attribute.
 
         Returns
         -------
-        s : pyvisa.Resource
+        s : pyvisa.Resource or SocketResource
             Opened resource to the VNA.
 
         """
+        if self.transport == "socket":
+            return SocketResource(
+                self.vna_ip, self.vna_port, timeout=self.vna_timeout
+            )
         rm = pyvisa.ResourceManager("@py")
         cmd = f"TCPIP::{self.vna_ip}::{self.vna_port}::SOCKET"
         s = rm.open_resource(cmd)
@@ -124,14 +468,14 @@ class VNA:
             Opened resource to the VNA.
 
         """
-        s.write("SENS1:AVER:COUN 1\n")  # number of averages
-        # linear sweep instead of point by point
-        s.write("SWE:TYPE LIN\n")
-        s.write("TRIG:SOUR BUS\n")
+        s.write(compound(CONFIG_COMMANDS))
+        self._averages = 1
+        self._freqs = None
 
     def _configure_vna(self):
         """
-        Connect to the VNA and configure it.
+        Connect to the VNA and configure it. With ``record`` set, the
+        resource is wrapped in a ``SessionRecorder``.
 
         Returns
         -------
@@ -140,9 +484,21 @@ class VNA:
 
         """
         s = self._open_resource()
+        if self.record is not None:
+            s = SessionRecorder(s, self.record)
         self._push_config(s)
         return s
 
+    def close(self):
+        """Close the connection to the VNA, and the ``record`` log."""
+        self.s.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     @property
     def id(self):
         return self.s.query("*IDN?\n")
@@ -153,10 +509,7 @@ class VNA:
 
     @fstart.setter
     def fstart(self, value):
-        if self._fstart == value:
-            return
-        self.s.write(f"SENS1:FREQ:STAR {value} HZ\n")
-        self._fstart = value
+        self._set("fstart", value)
 
     @property
     def fstop(self):
@@ -164,10 +517,7 @@ class VNA:
 
     @fstop.setter
     def fstop(self, value):
-        if self._fstop == value:
-            return
-        self.s.write(f"SENS1:FREQ:STOP {value} HZ\n")
-        self._fstop = value
+        self._set("fstop", value)
 
     @property
     def npoints(self):
@@ -175,10 +525,7 @@ class VNA:
 
     @npoints.setter
     def npoints(self, value):
-        if self._npoints == value:
-            return
-        self.s.write(f"SENS1:SWE:POIN {value}\n")
-        self._npoints = value
+        self._set("npoints", value)
 
     @property
     def ifbw(self):
@@ -186,10 +533,7 @@ class VNA:
 
     @ifbw.setter
     def ifbw(self, value):
-        if self._ifbw == value:
-            return
-        self.s.write(f"SENS1:BWID {value} HZ\n")
-        self._ifbw = value
+        self._set("ifbw", value)
 
     @property
     def power_dBm(self):
@@ -197,18 +541,250 @@ class VNA:
 
     @power_dBm.setter
     def power_dBm(self, value):
-        if self._power_dBm == value:
+        self._set("power_dBm", value)
+
+    @property
+    def averages(self):
+        """
+        Instrument-side averaging factor. With BUS triggering every
+        ``TRIG:SEQ:SING`` adds one sweep to the running average, so
+        each measurement clears it and triggers ``averages`` sweeps
+        per read.
+        """
+        return self._averages
+
+    @averages.setter
+    def averages(self, value):
+        self._set("averages", value)
+
+    def _set(self, name, value):
+        """
+        Write one tracked setting if it differs from the cached value.
+        """
+        if getattr(self, f"_{name}") == value:
             return
-        self.s.write(f"SOUR:POW {value}\n")
-        self._power_dBm = value
+        for cmd in setting_commands(name, value):
+            self.s.write(f"{cmd}\n")
+        setattr(self, f"_{name}", value)
+        if name in FREQ_SETTINGS:
+            self._freqs = None
+
+    def _query_settings(self, names):
+        """
+        Read settings back from the VNA with one compound query.
+
+        Parameters
+        ----------
+        names : list of str
+            Keys of ``SETTING_COMMANDS``.
+
+        Returns
+        -------
+        dict
+            Instrument values of the settings.
+
+        """
+        query = compound(SETTING_COMMANDS[n][1] for n in names)
+        return parse_settings(names, self.s.query(query))
+
+    def capture_profile(self, name=None):
+        """
+        Read all tracked settings from the VNA in one round trip and
+        sync the cached attributes to them.
+
+        Parameters
+        ----------
+        name : str or None
+            If given, store the profile under this name in
+            ``profiles``.
+
+        Returns
+        -------
+        profile : dict
+            Instrument value of every key of ``SETTING_COMMANDS``.
+
+        """
+        profile = self._query_settings(list(SETTING_COMMANDS))
+        for key, value in profile.items():
+            if getattr(self, f"_{key}") != value:
+                setattr(self, f"_{key}", value)
+                if key in FREQ_SETTINGS:
+                    self._freqs = None
+        if name is not None:
+            self.profiles[name] = dict(profile)
+        return profile
+
+    def _resolve_profile(self, profile):
+        if isinstance(profile, str):
+            profile = self.profiles[profile]
+        unknown = set(profile) - set(SETTING_COMMANDS)
+        if unknown:
+            raise ValueError(
+                f"Unknown settings {sorted(unknown)}, expected any of "
+                f"{tuple(SETTING_COMMANDS)}."
+            )
+        return profile
+
+    def diff_profile(self, profile):
+        """
+        Settings of a profile that differ from the cached state.
+
+        Parameters
+        ----------
+        profile : str or dict
+            Name of a stored profile, or a mapping of settings. None
+            values are skipped.
+
+        Returns
+        -------
+        dict
+            The settings that would be written by ``apply_profile``.
+
+        Raises
+        ------
+        KeyError
+            If no profile of that name is stored.
+        ValueError
+            If the profile has settings outside ``SETTING_COMMANDS``.
+
+        """
+        profile = self._resolve_profile(profile)
+        return {
+            k: v
+            for k, v in profile.items()
+            if v is not None and getattr(self, f"_{k}") != v
+        }
+
+    def apply_profile(self, profile, strict=False):
+        """
+        Apply a configuration profile in one round trip.
+
+        Only settings that differ from the cached state are sent, as a
+        single compound command line, and read back with a single
+        compound query. Where the readback differs from the request
+        (the instrument rounds or clips it), the cached state follows
+        the instrument and a warning is issued.
+
+        Parameters
+        ----------
+        profile : str or dict
+            Name of a stored profile, or a mapping of settings.
+        strict : bool
+            Raise instead of warning on a readback mismatch.
+
+        Returns
+        -------
+        changed : dict
+            The settings that were written.
+
+        Raises
+        ------
+        RuntimeError
+            If ``strict`` and the readback does not match the requested
+            values. The cached state still follows the instrument.
+
+        """
+        changed = self.diff_profile(profile)
+        if not changed:
+            return changed
+        cmds = [c for k, v in changed.items() for c in setting_commands(k, v)]
+        self.s.write(compound(cmds))
+        readback = self._query_settings(list(changed))
+        applied, mismatch = check_readback(changed, readback)
+        for key, value in applied.items():
+            setattr(self, f"_{key}", value)
+        if any(k in FREQ_SETTINGS for k in changed):
+            self._freqs = None
+        report_mismatch(mismatch, strict=strict)
+        return changed
+
+    def _read_array(self, command, out=None):
+        """
+        Query an ASCII array from the VNA.
+
+        Resources that provide ``query_ascii_array`` (the raw-socket
+        transport) parse the reply in bulk, optionally into ``out``;
+        plain pyvisa resources fall back to ``query_ascii_values``.
+        With timing enabled, resources with ``query_raw`` are read and
+        parsed in two steps so both phases are recorded.
+
+        Parameters
+        ----------
+        command : str
+            SCPI query command.
+        out : np.ndarray or None
+            Preallocated float output. Bulk parsers parse straight into
+            it; otherwise the reply is copied into it.
+
+        Returns
+        -------
+        np.ndarray
+            Contiguous array of the returned values; float64 unless
+            ``out`` is given.
+
+        """
+        if self.timer.enabled and hasattr(self.s, "query_raw"):
+            # same as query_ascii_array, split into timed phases
+            with self.timer.span("transfer"):
+                raw = self.s.query_raw(command)
+            with self.timer.span("parse"):
+                return parse_ascii_array(raw, out=out)
+        query = getattr(self.s, "query_ascii_array", None)
+        if query is not None:
+            return query(command, out=out)
+        with self.timer.span("transfer"):
+            data = self.s.query_ascii_values(command, container=np.array)
+        data = np.ascontiguousarray(data, dtype=np.float64)
+        if out is None:
+            return data
+        out[...] = data.reshape(out.shape)
+        return out
 
     @property
     def freqs(self):
+        """
+        Frequency axis of the sweep in Hz.
+
+        Built from the tracked ``fstart``/``fstop``/``npoints`` and
+        checked against ``SENS1:FREQ:DATA?`` once; the result is cached
+        (read-only) until one of those setters changes the
+        configuration, so repeated access costs no instrument I/O.
+
+        Returns
+        -------
+        np.ndarray
+            Frequency array in Hz.
+
+        """
+        if self._freqs is None:
+            freqs = self._query_freqs()
+            freqs.flags.writeable = False
+            self._freqs = freqs
+        return self._freqs
+
+    def _query_freqs(self):
+        """
+        Read the frequency axis from the VNA and, if the configuration
+        is fully known, compare it to the locally computed linear axis.
+
+        Returns
+        -------
+        np.ndarray
+            The local axis if it matches the instrument's, otherwise
+            the instrument's (which may round or clip the settings).
+
+        """
         # ASCII transfer: the server ignores FORM:DATA (see
         # _push_config), so binary-block reads are unavailable
-        return self.s.query_ascii_values(
-            "SENS1:FREQ:DATA?", container=np.array
-        )
+        measured = self._read_array("SENS1:FREQ:DATA?")
+        if None in (self._fstart, self._fstop, self._npoints):
+            return measured
+        local = np.linspace(self._fstart, self._fstop, self._npoints)
+        if local.shape == measured.shape and np.allclose(
+            local, measured, rtol=1e-9, atol=0
+        ):
+            return local
+        return measured
 
     @property
     def header(self):
@@ -219,8 +795,8 @@ class VNA:
         -------
         dict
             Dictionary with keys 'fstart', 'fstop', 'npoints', 'ifbw',
-            'power_dBm', and 'freqs'. The values are the corresponding
-            settings of the VNA.
+            'power_dBm', 'averages', and 'freqs'. The values are the
+            corresponding settings of the VNA.
 
         """
         return {
@@ -229,6 +805,7 @@ class VNA:
             "npoints": self.npoints,
             "ifbw": self.ifbw,
             "power_dBm": self.power_dBm,
+            "averages": self.averages,
             "freqs": self.freqs,
         }
 
@@ -253,14 +830,24 @@ class VNA:
             raise
 
     def _clear_data(self):
-        self.data = dict()
-        self.stds_meta = dict()
+        self.data = {}
+        self.stds_meta = {}
 
     def setup(
-        self, fstart=1e6, fstop=250e6, npoints=1000, ifbw=100, power_dBm=0
+        self,
+        fstart=1e6,
+        fstop=250e6,
+        npoints=1000,
+        ifbw=100,
+        power_dBm=0,
+        strict=False,
     ):
         """
-        Setup S11 measurement.
+        Setup S11 measurement. The settings that changed are sent as one
+        compound command and verified with one query, see
+        ``apply_profile``. Values the instrument adjusts (IFBW rounded to
+        a supported step, a clipped stop frequency) are adopted with a
+        warning.
 
         Parameters
         ----------
@@ -274,6 +861,9 @@ class VNA:
             Intermediate frequency bandwidth in Hz
         power_dBm : float
             Power level in dBm
+        strict : bool
+            Raise RuntimeError instead of warning if the instrument
+            does not apply a setting as requested.
 
         Returns
         -------
@@ -281,13 +871,66 @@ class VNA:
             Frequency array in Hz
 
         """
-        self.power_dBm = power_dBm
-        self.fstart = fstart
-        self.fstop = fstop
-        self.npoints = npoints
-        self.ifbw = ifbw
+        self.apply_profile(
+            {
+                "power_dBm": power_dBm,
+                "fstart": fstart,
+                "fstop": fstop,
+                "npoints": npoints,
+                "ifbw": ifbw,
+            },
+            strict=strict,
+        )
         return self.freqs
 
+    def _trigger(self):
+        """
+        Trigger a sweep and block until it has completed. With
+        ``averages`` above 1, the running average is cleared first and
+        ``averages`` sweeps are triggered, so the trace holds no sweeps
+        of an earlier measurement.
+        """
+        navg = self.averages or 1
+        if navg > 1:
+            self.s.write("SENS1:AVER:CLE\n")  # restart the average
+        for _ in range(navg):
+            with self.timer.span("trigger"):
+                self.s.write("TRIG:SEQ:SING")  # sweep
+            with self.timer.span("sweep"):
+                self.wait_for_opc()  # wait for operation complete
+
+    def _read_s11(self):
+        """
+        Read the last completed sweep from the instrument buffer.
+
+        Returns
+        -------
+        data : np.ndarray
+            Complex-valued array of S11 measurements.
+
+        """
+        # SDAT (not FDAT): complex S-parameter re/im pairs regardless
+        # of display format, so no dependence on CALC:FORM — which the
+        # server may ignore just like FORM:DATA. ASCII per
+        # _push_config.
+        if self.dtype == np.complex128:
+            data = self._read_array("CALC:DATA:SDAT?")
+            # interleaved re/im float64 pairs are exactly the memory
+            # layout of complex128, so de-interleave with a zero-copy
+            # view
+            return data.view(np.complex128)
+        # parse straight into the re/im pairs of a complex64 sweep
+        data = np.empty(self._sweep_npoints(), dtype=self.dtype)
+        self._read_array("CALC:DATA:SDAT?", out=data.view(np.float32))
+        return data
+
+    def _sweep_npoints(self):
+        """Points per sweep, from the tracked setting or ``freqs``."""
+        if self.npoints is None:
+            return len(self.freqs)
+        return self.npoints
+
+    @timed("measure_S11")
     def measure_S11(self, verbose=False):
         """
         Get S11 measurement (complex).
@@ -304,22 +947,300 @@ class VNA:
 
         """
         t0 = time.time()
-        self.s.write("TRIG:SEQ:SING")  # sweep
-        self.wait_for_opc()  # wait for operation complete
+        self._trigger()
         if verbose:
             print("swept")
-        # SDAT (not FDAT): complex S-parameter re/im pairs regardless
-        # of display format, so no dependence on CALC:FORM — which the
-        # server may ignore just like FORM:DATA. ASCII per
-        # _push_config.
-        data = self.s.query_ascii_values("CALC:DATA:SDAT?", container=np.array)
-        self.wait_for_opc()  # wait for operation complete
+        # the query itself is synchronous, so no second *OPC? is needed
+        # after the read
+        data = self._read_s11()
         if verbose:
             sweep_time = time.time() - t0
             print(f"{sweep_time:.2f} seconds to sweep.")
-        data = data[0::2] + 1j * data[1::2]
         return data
 
+    @timed("measure_S11_batch")
+    def measure_S11_batch(self, n, averages=None):
+        """
+        Take ``n`` S11 sweeps into one preallocated array.
+
+        Each sweep is parsed straight into its row of the output, so no
+        per-sweep arrays or dictionary entries are created.
+
+        Parameters
+        ----------
+        n : int
+            Number of sweeps.
+        averages : int or None
+            Instrument-side averaging factor (``SENS1:AVER:COUN``) for
+            this batch; the previous setting is restored afterwards.
+            Each row is then the average of ``averages`` sweeps, read
+            out once. If None, uses the current ``averages`` setting.
+
+        Returns
+        -------
+        data : np.ndarray
+            Complex S11 sweeps, shape (n, npoints).
+        times : np.ndarray
+            ``time.monotonic()`` at the end of each sweep (after the
+            last averaged sweep), shape (n,).
+
+        """
+        data = np.empty((n, self._sweep_npoints()), dtype=self.dtype)
+        times = np.empty(n, dtype=np.float64)
+        flat = data.view(data.real.dtype)  # interleaved re/im rows
+        previous = self.averages
+        if averages is not None:
+            self.averages = averages
+        try:
+            for i in range(n):
+                self._trigger()
+                times[i] = time.monotonic()
+                self._read_array("CALC:DATA:SDAT?", out=flat[i])
+        finally:
+            if averages is not None:
+                self.averages = previous
+        return data, times
+
+    def stream(self, capacity=1024, policy="drop_oldest", count=None):
+        """
+        Continuous S11 acquisition in a background thread, see
+        :class:`cmt_vna.stream.SweepStream`. The returned stream is not
+        started; use it as a context manager or call ``start``.
+
+        Parameters
+        ----------
+        capacity : int
+            Number of most recent sweeps kept in the circular buffer.
+        policy : str
+            What to do when a subscriber falls ``capacity`` sweeps
+            behind: ``"drop_oldest"`` or ``"block"``.
+        count : int or None
+            Stop after this many sweeps. If None, runs until stopped.
+
+        Returns
+        -------
+        SweepStream
+
+        """
+        return SweepStream(self, capacity=capacity, policy=policy, count=count)
+
+    def _run_sequence(
+        self, states, pipelined=None, current_state=None, check=None
+    ):
+        """
+        Switch to each state in turn and take one S11 sweep.
+
+        Once ``*OPC?`` returns, the sweep is complete and its trace sits
+        in the instrument buffer, so with ``pipelined`` the switch to
+        the next state runs in a worker thread while the trace is
+        transferred and parsed. A switch failure is re-raised before
+        the next sweep is triggered. Consecutive repeats of a state do
+        not call ``switch_fn`` again. Stage durations are stored in
+        ``last_sequence_timing``.
+
+        Parameters
+        ----------
+        states : list of str
+            Switch path names, passed verbatim to ``switch_fn``.
+        pipelined : bool or None
+            Overlap switching with readout. If None, uses the
+            ``pipelined`` attribute.
+        current_state : str or None
+            State the switch is already on; not switched to again if
+            the sequence starts there.
+        check : Callable[[str, np.ndarray], bool] or None
+            Called with each state and its sweep as soon as it is read
+            out; the sequence stops early when it returns False.
+
+        Returns
+        -------
+        sweeps : list of np.ndarray
+            One complex S11 sweep per entry of ``states``, up to and
+            including the first one rejected by ``check``.
+
+        """
+        if pipelined is None:
+            pipelined = self.pipelined
+        timing = {"switch": 0.0, "sweep": 0.0, "readout": 0.0}
+
+        def switch(state):
+            t = time.perf_counter()
+            self.switch_fn(state)
+            dt = time.perf_counter() - t
+            if self.timer.enabled:
+                self.timer.record("switch", dt)
+            return dt
+
+        sweeps = []
+        t_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = None
+            prev = current_state
+            try:
+                for i, state in enumerate(states):
+                    if pending is not None:
+                        timing["switch"] += pending.result()
+                        pending = None
+                    elif state != prev:
+                        timing["switch"] += switch(state)
+                    t = time.perf_counter()
+                    self._trigger()
+                    timing["sweep"] += time.perf_counter() - t
+                    nxt = states[i + 1] if i + 1 < len(states) else state
+                    if pipelined and nxt != state:
+                        pending = pool.submit(switch, nxt)
+                    t = time.perf_counter()
+                    sweeps.append(self._read_s11())
+                    timing["readout"] += time.perf_counter() - t
+                    prev = state
+                    if check is not None and not check(state, sweeps[-1]):
+                        if pending is not None:
+                            # the next switch already ran: report it
+                            timing["switch"] += pending.result()
+                            pending = None
+                        break
+            finally:
+                if pending is not None:
+                    # wait for an in-flight switch and collect its
+                    # outcome; the error that stopped the loop propagates
+                    pending.exception()
+        timing["wall"] = time.perf_counter() - t_start
+        # the serial path runs every stage back to back
+        timing["serial"] = timing["switch"] + timing["sweep"]
+        timing["serial"] += timing["readout"]
+        timing["saved"] = timing["serial"] - timing["wall"]
+        self.last_sequence_timing = timing
+        return sweeps
+
+    @timed("measure_sequence")
+    def measure_sequence(
+        self,
+        states,
+        pipelined=None,
+        flag_policy=None,
+        repeat=None,
+        current_state=None,
+    ):
+        """
+        Measure S11 on several switch paths, optionally overlapping the
+        switch to each next path with the readout of the previous
+        sweep. Repeated sweeps of a path run back to back without
+        switching again.
+
+        Unless the flag policy is ``"off"``, each sweep is checked
+        against its band (see ``activeflag`` and ``STATE_FLAG_KEYS``) as
+        soon as it is read out, and the result stored per state in
+        ``last_sequence_flags``. With ``"abort"`` or ``"retry"`` a sweep
+        outside its band stops the sequence before the next sweep (a
+        pipelined switch to the next path may already have run; it is
+        waited for and its failure raised).
+
+        Parameters
+        ----------
+        states : list of str
+            Distinct switch path names, passed verbatim to
+            ``switch_fn``.
+        pipelined : bool or None
+            Overlap switching with readout. If None, uses the
+            ``pipelined`` attribute.
+        flag_policy : str or None
+            One of ``FLAG_POLICIES``. If None, uses the ``flag_policy``
+            attribute.
+        repeat : int or dict or None
+            Sweeps per state, the same for all or per state name
+            (default 1). If None, one sweep per state.
+        current_state : str or None
+            State the switch is already on; not switched to again if
+            the sequence starts there.
+
+        Returns
+        -------
+        s11 : dict
+            Complex S11 sweep per state, in measurement order; with
+            ``repeat``, a stack of shape (repeat, npoints) per state.
+            The stage timing of the call, including the wall-clock time
+            ``saved`` against the serial path, is available in
+            ``last_sequence_timing``.
+
+        Raises
+        -------
+        RuntimeError
+            If the attribute switch_fn is None, or a sweep is flagged
+            with policy ``"abort"`` (or still flagged after the last
+            retry with ``"retry"``).
+        ValueError
+            If ``states`` has duplicates, a repeat is not positive or
+            ``flag_policy`` is unknown.
+        Exception
+            Any exception raised by ``switch_fn`` propagates, aborting
+            the sequence before the corresponding S11 measurement.
+
+        """
+        if self.switch_fn is None:
+            raise RuntimeError("No switch_fn set, cannot measure S11.")
+        if len(set(states)) != len(states):
+            raise ValueError(f"Duplicate states in sequence {states}.")
+        counts = None
+        sequence = states
+        if repeat is not None:
+            if not isinstance(repeat, dict):
+                repeat = dict.fromkeys(states, repeat)
+            counts = [repeat.get(state, 1) for state in states]
+            if min(counts, default=1) < 1:
+                raise ValueError(f"Repeats must be positive, got {repeat}.")
+            sequence = [s for s, n in zip(states, counts) for _ in range(n)]
+        if flag_policy is None:
+            flag_policy = self.flag_policy
+        _check_flag_policy(flag_policy)
+
+        def result(sweeps):
+            if counts is None:
+                return dict(zip(states, sweeps))
+            s11, i = {}, 0
+            for state, n in zip(states, counts):
+                s11[state] = np.array(sweeps[i : i + n])
+                i += n
+            return s11
+
+        if flag_policy == "off":
+            self.last_sequence_flags = None
+            sweeps = self._run_sequence(
+                sequence, pipelined=pipelined, current_state=current_state
+            )
+            return result(sweeps)
+
+        bands = {**DEFAULT_FLAG_THRESHOLDS, **self.flag_thresholds}
+        flags, values = {}, {}
+
+        def check(state, sweep):
+            band = bands.get(STATE_FLAG_KEYS.get(state, state))
+            if band is None:
+                return True
+            values[state] = float(mean_dB(sweep))
+            flags[state] = in_band(values[state], band)
+            return flags[state] or flag_policy == "record"
+
+        attempts = 1 + (self.flag_retries if flag_policy == "retry" else 0)
+        for _ in range(attempts):
+            flags.clear()
+            sweeps = self._run_sequence(
+                sequence,
+                pipelined=pipelined,
+                current_state=current_state,
+                check=check,
+            )
+            self.last_sequence_flags = dict(flags)
+            if flag_policy == "record" or all(flags.values()):
+                return result(sweeps)
+            current_state = None  # a retry switches to the first state
+        state = sequence[len(sweeps) - 1]
+        band = bands[STATE_FLAG_KEYS.get(state, state)]
+        raise RuntimeError(
+            f"S11 of {state} at {values[state]:.1f} dB is outside its "
+            f"band {band} dB after {attempts} attempt(s)."
+        )
+
+    @timed("measure_OSL")
     def measure_OSL(self):
         """
         Iterate through all standards for measurement.
@@ -337,34 +1258,155 @@ class VNA:
             the OSL sequence before the subsequent S11 measurement.
 
         """
-
-        OSL = {}
         standards = ["VNAO", "VNAS", "VNAL"]  # set osl standard list
-        for standard in standards:
-            if self.switch_fn is None:  # testing/manual osl measurements
-                print(f"connect {standard} and press enter")
-                input()
-            else:
-                self.switch_fn(standard)
-            data = self.measure_S11()
-            OSL[standard] = data
+        if self.switch_fn is not None:
+            return self.measure_sequence(standards)
+        OSL = {}
+        for standard in standards:  # testing/manual osl measurements
+            print(f"connect {standard} and press enter")
+            input()
+            OSL[standard] = self.measure_S11()
         return OSL
 
-    def add_OSL(self, std_key="vna"):
+    def add_OSL(self, std_key="vna", kit=None):
         """
         Call measure_OSL to iterate through standards. Adds standards
-        measurement to self.data.
+        measurement to self.data and keeps it, with the kit, for
+        ``error_model``, which solves the calibration on first use.
 
         Parameters
         ----------
         std_key : str
             Key value to assign to the OSL entry in self.stds.
+        kit : CalKit or None
+            Calibration kit of the standards. If None, uses the S911T
+            model on the current frequency grid.
 
         """
         OSL = self.measure_OSL()
         self.data[std_key] = np.array(list(OSL.values()))
         self.stds_meta[std_key] = list(OSL.keys())
+        if kit is None:
+            kit = S911T(freq_Hz=self.freqs)  # standards built lazily
+        self._cal_stds[std_key] = (self.data[std_key], kit)
+        self.error_models.pop(std_key, None)
+        self._cal_models.pop(std_key, None)
+        self._archive(std_key, self.data[std_key])
+
+    def error_model(self, std_key="vna"):
+        """
+        Error model solved from an ``add_OSL`` calibration on its own
+        frequency grid. Solved on first use and kept in
+        ``error_models``.
+
+        Parameters
+        ----------
+        std_key : str
+            Key the calibration was added under.
 
+        Returns
+        -------
+        ErrorModel
+
+        Raises
+        ------
+        KeyError
+            If there is no calibration under ``std_key``.
+        np.linalg.LinAlgError
+            If the standards do not determine a finite model, e.g. an
+            all-zero or broken OSL set.
+
+        """
+        model = self.error_models.get(std_key)
+        if model is not None:
+            return model
+        if std_key not in self._cal_stds:
+            raise KeyError(f"No calibration {std_key!r}, run add_OSL first.")
+        osl, kit = self._cal_stds[std_key]
+        msg = (
+            f"OSL calibration {std_key!r} does not determine a finite "
+            "error model; check the standards measurements."
+        )
+        try:
+            with np.errstate(over="ignore", invalid="ignore"):
+                model = ErrorModel.from_osl(osl, kit, precision=self.precision)
+        except np.linalg.LinAlgError as e:
+            raise np.linalg.LinAlgError(msg) from e
+        if not np.all(np.isfinite(model.sparams)):
+            raise np.linalg.LinAlgError(msg)
+        self.error_models[std_key] = model
+        return model
+
+    def cal_model(self, std_key="vna", freqs=None):
+        """
+        Error model of an ``add_OSL`` calibration on a frequency grid.
+
+        A grid other than the calibrated one (e.g. after changing
+        ``npoints``, ``fstart`` or ``fstop``) gets the model interpolated
+        onto it, with the error estimate in its ``interp_error``, so the
+        standards need not be measured again. The model for the last grid
+        is kept per calibration.
+
+        Parameters
+        ----------
+        std_key : str
+            Key the calibration was added under.
+        freqs : np.ndarray or None
+            Frequency grid in Hz. If None, uses the current ``freqs``.
+
+        Returns
+        -------
+        ErrorModel
+
+        Raises
+        ------
+        KeyError
+            If there is no calibration under ``std_key``.
+        np.linalg.LinAlgError
+            If the calibration does not solve, see ``error_model``.
+        ValueError
+            If the grid extends outside the calibrated band.
+
+        """
+        error_model = self.error_model(std_key)
+        if freqs is None:
+            freqs = self.freqs
+        model = self._cal_models.get(std_key)
+        if model is None or not np.array_equal(model.freq_Hz, freqs):
+            model = error_model.interp(freqs)
+            self._cal_models[std_key] = model
+        return model
+
+    def calibrate(self, gamma, std_key="vna", freqs=None):
+        """
+        Remove an ``add_OSL`` calibration from measured S11.
+
+        Parameters
+        ----------
+        gamma : np.ndarray
+            Measured S11, shape (..., len(freqs)).
+        std_key : str
+            Key the calibration was added under.
+        freqs : np.ndarray or None
+            Frequency grid of ``gamma`` in Hz, any grid within the
+            calibrated band. If None, uses the current ``freqs``.
+
+        Returns
+        -------
+        np.ndarray
+            Calibrated S11.
+
+        Raises
+        ------
+        KeyError
+            If there is no calibration under ``std_key``.
+        ValueError
+            If the grid extends outside the calibrated band.
+
+        """
+        return self.cal_model(std_key, freqs).remove(gamma)
+
+    @timed("measure_ant")
     def measure_ant(self, measure_noise=True, measure_load=True):
         """
         Measure S11 of antenna. If measure_noise is True, also measures
@@ -395,21 +1437,18 @@ class VNA:
             the sequence before the corresponding S11 measurement.
 
         """
-        if self.switch_fn is None:
-            raise RuntimeError("No switch_fn set, cannot measure S11.")
-        s11 = {}
-        self.switch_fn("VNAANT")  # switch to antenna
-        s11["ant"] = self.measure_S11()
+        paths = {"VNAANT": "ant"}  # antenna
         if measure_load:
-            # switch to load (noise source off)
-            self.switch_fn("VNANOFF")
-            s11["load"] = self.measure_S11()
+            paths["VNANOFF"] = "load"  # load (noise source off)
         if measure_noise:
-            # switch to noise source
-            self.switch_fn("VNANON")
-            s11["noise"] = self.measure_S11()
+            paths["VNANON"] = "noise"  # noise source
+        s11 = self.measure_sequence(list(paths))
+        s11 = {paths[state]: data for state, data in s11.items()}
+        for key, data in s11.items():
+            self._archive(key, data)
         return s11
 
+    @timed("measure_rec")
     def measure_rec(self):
         """
         Measure S11 of the receiver. This is a convenience function that uses
@@ -431,13 +1470,11 @@ class VNA:
             before the S11 measurement.
 
         """
-        if self.switch_fn is None:
-            raise RuntimeError("No switch_fn set, cannot measure S11.")
-        s11 = {}
-        self.switch_fn("VNARF")  # switch to receiver
-        s11["rec"] = self.measure_S11()
-        return s11
+        s11 = self.measure_sequence(["VNARF"])  # switch to receiver
+        self._archive("rec", s11["VNARF"])
+        return {"rec": s11["VNARF"]}
 
+    @timed("measure_dut")
     def measure_dut(self, state):
         """
         Measure S11 of an arbitrary DUT selected by switch path name.
@@ -468,8 +1505,11 @@ class VNA:
         """
         if self.switch_fn is None:
             raise RuntimeError("No switch_fn set, cannot measure S11.")
-        self.switch_fn(state)
-        return self.measure_S11()
+        with self.timer.span("switch"):
+            self.switch_fn(state)
+        s11 = self.measure_S11()
+        self._archive(state, s11)
+        return s11
 
     def activeflag(self, data, cal, thresholds=None):
         """
@@ -477,7 +1517,9 @@ class VNA:
 
         Computes the mean dB magnitude of each entry and checks that it
         falls within a ``(low, high)`` band. Useful for catching obviously
-        broken measurements before committing them.
+        broken measurements before committing them. ``measure_sequence``
+        can apply the same bands to each sweep as it arrives, and
+        ``flag_sweeps`` to a whole stack of sweeps at once.
 
         Parameters
         ----------
@@ -500,29 +1542,23 @@ class VNA:
 
         """
         bands = {**DEFAULT_FLAG_THRESHOLDS, **(thresholds or {})}
-
-        def in_band(value, key):
-            low, high = bands[key]
-            if low is not None and value < low:
-                return False
-            if high is not None and value > high:
-                return False
-            return True
-
         flags = {
             "cal": all(
-                in_band(mlin(cal[k]), k) for k in ("VNAO", "VNAS", "VNAL")
+                in_band(mlin(cal[k]), bands[k])
+                for k in ("VNAO", "VNAS", "VNAL")
             )
         }
         for key in ("rec", "ant", "load", "noise"):
             if key in data:
-                flags[key] = in_band(mlin(data[key]), key)
+                flags[key] = in_band(mlin(data[key]), bands[key])
         return flags
 
     def read_data(self, num_data=1):
         """
         Repeatedly call ``measure_S11, and store the results in the ``data''
-        attribute.
+        attribute. With an ``archive`` set, each sweep is also appended to
+        the ``gamma`` stream of the current settings as soon as it is
+        taken.
 
         Parameters
         ----------
@@ -532,8 +1568,20 @@ class VNA:
         """
         for _ in range(num_data):
             gamma = self.measure_S11()
-            date = datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.data[f"{date}_gamma"] = gamma
+            now = datetime.now()
+            self.data[f"{now:%Y%m%d_%H%M%S}_gamma"] = gamma
+            self._archive("gamma", gamma, t=now.timestamp())
+
+    def _archive(self, base, data, t=None):
+        """
+        Append a sweep to the ``archive``, if set, in the stream of
+        the current settings (``SweepArchive.key_for``).
+        """
+        if self.archive is None:
+            return
+        header = self.header
+        key = self.archive.key_for(base, header)
+        self.archive.append(key, data, t=t, header=header)
 
     def write_data(self, outdir=None):
         """
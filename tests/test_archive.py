@@ -0,0 +1,117 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from cmt_vna import archive
+from cmt_vna.archive import HEADER_SIZE, SweepArchive
+from cmt_vna.testing import DummyVNA
+
+
+def sweep(value, n=7):
+    return np.full(n, value * (1 + 1j))
+
+
+def test_append_and_read_while_open(tmp_path):
+    arc = SweepArchive(tmp_path / "arc")
+    arc.append("gamma", sweep(0), t=10.0)
+    arc.append("gamma", sweep(1), t=11.0)
+    # readable while the writer is still open, with plain numpy too
+    rec = np.load(tmp_path / "arc" / "gamma.npy", mmap_mode="r")
+    assert rec.shape == (2,)
+    np.testing.assert_array_equal(rec["time"], [10.0, 11.0])
+    np.testing.assert_array_equal(rec["data"][1], sweep(1))
+    arc.append("gamma", sweep(2))
+    rec = archive.load(tmp_path / "arc", "gamma")
+    assert isinstance(rec, np.memmap)
+    assert rec["data"].shape == (3, 7)
+    arc.close()
+    assert archive.keys(tmp_path / "arc") == ["gamma"]
+
+
+def test_reopen_discards_torn_record(tmp_path):
+    with SweepArchive(tmp_path) as arc:
+        for i in range(3):
+            arc.append("gamma", sweep(i))
+    fpath = tmp_path / "gamma.npy"
+    size = fpath.stat().st_size
+    # simulate a crash after a partial record write
+    with open(fpath, "ab") as f:
+        f.write(b"\x00" * 20)
+    with SweepArchive(tmp_path) as arc:
+        arc.append("gamma", sweep(3))
+    assert fpath.stat().st_size == size + (size - HEADER_SIZE) // 3
+    rec = archive.load(tmp_path, "gamma", mmap=False)
+    np.testing.assert_array_equal(
+        rec["data"][:, 0], [0, 1 + 1j, 2 + 2j, 3 + 3j]
+    )
+
+
+def test_shape_and_header_checks(tmp_path):
+    arc = SweepArchive(tmp_path)
+    hdr = {"npoints": 7, "freqs": np.arange(7.0)}
+    arc.append("gamma", sweep(0), header=hdr)
+    with pytest.raises(ValueError, match="does not fit"):
+        arc.append("gamma", sweep(0, n=8))
+    with pytest.raises(ValueError, match="settings changed"):
+        arc.append("gamma", sweep(0), header={**hdr, "freqs": np.ones(7)})
+    arc.append("gamma", sweep(1), header=dict(hdr))
+    meta = archive.header(tmp_path, "gamma")
+    assert meta["header"]["freqs"] == list(range(7))
+    arc.close()
+    # a different record shape cannot be appended after reopening
+    with pytest.raises(ValueError, match="does not fit"):
+        SweepArchive(tmp_path).append("gamma", sweep(0, n=3))
+
+
+def test_vna_archives_sweeps(tmp_path):
+    vna = DummyVNA(switch_fn=MagicMock(), archive=SweepArchive(tmp_path / "a"))
+    vna.setup(npoints=11)
+    vna.read_data(num_data=3)
+    vna.add_OSL()
+    vna.archive.close()
+    rec = archive.load(tmp_path / "a", "gamma")
+    assert rec["data"].shape == (3, 11)
+    assert archive.load(tmp_path / "a", "vna")["data"].shape == (1, 3, 11)
+    hdr = archive.header(tmp_path / "a", "gamma")["header"]
+    assert hdr["npoints"] == 11
+    np.testing.assert_allclose(hdr["freqs"], vna.freqs)
+
+
+def test_setup_change_starts_new_stream(tmp_path):
+    vna = DummyVNA(switch_fn=MagicMock(), archive=SweepArchive(tmp_path))
+    vna.setup(npoints=11)
+    vna.read_data()
+    vna.setup(npoints=21)
+    vna.read_data(num_data=2)
+    vna.setup(npoints=11)
+    vna.read_data()
+    vna.measure_ant()
+    vna.measure_rec()
+    vna.measure_dut("VNAAMB")
+    vna.archive.close()
+    assert archive.keys(tmp_path) == [
+        "VNAAMB",
+        "ant",
+        "gamma",
+        "gamma_1",
+        "load",
+        "noise",
+        "rec",
+    ]
+    assert archive.load(tmp_path, "gamma")["data"].shape == (2, 11)
+    assert archive.load(tmp_path, "gamma_1")["data"].shape == (2, 21)
+    assert archive.header(tmp_path, "gamma_1")["header"]["npoints"] == 21
+    # reopened, the streams are matched to the settings again
+    arc = SweepArchive(tmp_path)
+    assert arc.key_for("gamma", vna.header) == "gamma"
+    assert arc.key_for("gamma", {**vna.header, "ifbw": 1}) == "gamma_2"
+
+
+def test_single_precision_stream(tmp_path):
+    with SweepArchive(tmp_path) as arc:
+        arc.append("gamma", sweep(1).astype(np.complex64))
+        arc.append("gamma", sweep(2))  # cast to the stream's precision
+    rec = archive.load(tmp_path, "gamma")
+    assert rec["data"].dtype == np.complex64
+    np.testing.assert_array_equal(rec["data"][:, 0], [1 + 1j, 2 + 2j])
@@ -0,0 +1,180 @@
+import asyncio
+import socket
+from pathlib import Path
+from unittest.mock import MagicMock, call
+
+import numpy as np
+import pytest
+
+from cmt_vna.testing import AsyncDummyVNA
+from cmt_vna.transport import AsyncSocketResource, format_ascii_array
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncDummyVNA:
+    def setup_method(self):
+        self.switch_fn = MagicMock()
+
+    async def _connected(self, **kwargs):
+        vna = AsyncDummyVNA(switch_fn=self.switch_fn, **kwargs)
+        await vna.connect()
+        return vna
+
+    def test_setup_and_freqs(self):
+        async def main():
+            vna = await self._connected()
+            freqs = await vna.setup(npoints=101, ifbw=1000)
+            assert vna.npoints == 101
+            assert vna.ifbw == 1000
+            np.testing.assert_allclose(freqs, np.linspace(1e6, 250e6, 101))
+            # cached until the configuration changes
+            assert (await vna.freqs()) is freqs
+            assert len(await vna.setup(npoints=11)) == 11
+            assert await vna.id() == "DummyVNA"
+            await vna.close()
+
+        run(main())
+
+    def test_measure_s11(self):
+        async def main():
+            async with AsyncDummyVNA() as vna:
+                await vna.setup(npoints=101)
+                s11 = await vna.measure_S11()
+                out = np.empty(101, dtype=complex)
+                await vna.trigger()
+                res = await vna.read_s11(out=out)
+            assert s11.shape == (101,)
+            assert s11.dtype == np.complex128
+            assert np.shares_memory(res, out)
+
+        run(main())
+
+    def test_sequences_with_sync_switch(self):
+        async def main():
+            vna = await self._connected()
+            await vna.setup(npoints=11)
+            osl = await vna.measure_OSL()
+            ant = await vna.measure_ant()
+            rec = await vna.measure_rec()
+            return osl, ant, rec
+
+        osl, ant, rec = run(main())
+        assert list(osl) == ["VNAO", "VNAS", "VNAL"]
+        assert list(ant) == ["ant", "load", "noise"]
+        assert list(rec) == ["rec"]
+        assert self.switch_fn.call_args_list == [
+            call(s)
+            for s in (
+                "VNAO",
+                "VNAS",
+                "VNAL",
+                "VNAANT",
+                "VNANOFF",
+                "VNANON",
+                "VNARF",
+            )
+        ]
+
+    def test_async_switch_overlaps_readout(self):
+        async def switch(state):
+            await asyncio.sleep(0.05)
+
+        async def main():
+            vna = AsyncDummyVNA(switch_fn=switch)
+            await vna.connect()
+            await vna.setup(npoints=11)
+            read = vna.read_s11
+
+            async def slow_read(out=None):
+                await asyncio.sleep(0.05)
+                return await read(out=out)
+
+            vna.read_s11 = slow_read
+            await vna.measure_OSL()
+            return vna.last_sequence_timing
+
+        timing = run(main())
+        assert timing["saved"] > 0.07
+
+    def test_switch_failure_aborts(self):
+        async def main():
+            vna = await self._connected()
+            vna.switch_fn = MagicMock(side_effect=[None, RuntimeError("boom")])
+            with pytest.raises(RuntimeError, match="boom"):
+                await vna.measure_OSL()
+            return vna.switch_fn.call_count
+
+        assert run(main()) == 2
+
+    def test_no_switch_fn_raises(self):
+        async def main():
+            vna = AsyncDummyVNA()
+            await vna.connect()
+            with pytest.raises(RuntimeError, match="No switch_fn set"):
+                await vna.measure_rec()
+            with pytest.raises(ValueError, match="Duplicate"):
+                vna.switch_fn = self.switch_fn
+                await vna.measure_sequence(["VNAO", "VNAO"])
+
+        run(main())
+
+    def test_write_data(self, tmp_path):
+        async def main():
+            vna = await self._connected(save_dir=tmp_path)
+            await vna.setup(npoints=11)
+            await vna.add_OSL()
+            await vna.read_data()
+            fpath = await vna.write_data()
+            assert vna.data == {}
+            return fpath
+
+        fpath = run(main())
+        assert isinstance(fpath, Path)
+        with np.load(fpath) as f:
+            assert f["vna"].shape == (3, 11)
+            assert len(f["freqs"]) == 11
+            assert sum(k.endswith("_gamma") for k in f.files) == 1
+
+
+def test_async_socket_resource():
+    async def handle(reader, writer):
+        while line := await reader.readline():
+            if line.strip() == b"CALC:DATA:SDAT?":
+                writer.write(format_ascii_array(np.arange(20000.0)) + b"\n")
+            elif line.strip() == b"*OPC?":
+                writer.write(b"1\n")
+            await writer.drain()
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        s = await AsyncSocketResource.open("127.0.0.1", port, timeout=2000)
+        assert await s.query("*OPC?") == "1"
+        data = await s.query_ascii_array("CALC:DATA:SDAT?")
+        s.timeout = 50
+        with pytest.raises(TimeoutError):
+            await s.query("FORM:DATA?")  # never answered
+        await s.close()
+        server.close()
+        await server.wait_closed()
+        return data
+
+    np.testing.assert_array_equal(run(main()), np.arange(20000.0))
+
+
+def test_async_socket_resource_sets_nodelay():
+    async def main():
+        server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        s = await AsyncSocketResource.open("127.0.0.1", port)
+        sock = s._writer.get_extra_info("socket")
+        nodelay = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        await s.close()
+        server.close()
+        return nodelay
+
+    assert run(main())
@@ -1,5 +1,6 @@
 from cmt_vna import calkit as cal
 import numpy as np
+import pytest
 
 
 def test_impedance_to_gamma():
@@ -259,3 +260,324 @@ def test_sparams_with_explicit_model():
     assert np.allclose(sprms[0], 0)  # s11
     assert np.allclose(sprms[1], 1)  # s12s21
     assert np.allclose(sprms[2], 0)  # s22
+
+
+def _solve_sparams(gamma_true, gamma_meas):
+    """Reference: per-frequency np.linalg.solve of M16 Eq. 3."""
+    gamma_true = np.array(gamma_true, dtype=complex).T
+    gamma_meas = np.array(gamma_meas, dtype=complex).T
+    mat = np.stack(
+        [np.ones_like(gamma_true), gamma_true, gamma_true * gamma_meas],
+        axis=-1,
+    )
+    sparams = np.linalg.solve(mat, gamma_meas[..., np.newaxis])[..., 0].T
+    sparams[1] += sparams[0] * sparams[2]
+    return np.squeeze(sparams)
+
+
+def test_network_sparams_matches_linalg_solve():
+    rng = np.random.default_rng(1)
+    freqs = np.linspace(50e6, 250e6, 201)
+    model = cal.S911T(freq_Hz=freqs).std_gamma
+    shape = (3, 5, len(freqs))
+    sprms = 0.2 * (rng.normal(size=shape) + 1j * rng.normal(size=shape))
+    sprms[1] += 1
+    meas = np.moveaxis(cal.embed_sparams(sprms, model[:, None]), 0, 1)
+    for m in meas:
+        np.testing.assert_allclose(
+            cal.network_sparams(model, m),
+            _solve_sparams(model, m),
+            rtol=1e-10,
+            atol=1e-12,
+        )
+    # one (T, 3, N) call against the model broadcast over the batch
+    batch = cal.network_sparams(model, meas)
+    assert batch.shape == (5, 3, len(freqs))
+    np.testing.assert_allclose(batch, np.moveaxis(sprms, 0, 1), atol=1e-9)
+    # a single frequency and a batch of one keep their layouts
+    assert cal.network_sparams(model[:, 0], meas[0, :, 0]).shape == (3,)
+    assert cal.network_sparams(model, meas[:1]).shape == (1, 3, len(freqs))
+
+
+def test_network_sparams_singular():
+    freqs = np.linspace(50e6, 250e6, 11)
+    model = cal.S911T(freq_Hz=freqs).std_gamma
+    meas = cal.embed_sparams([0.1, 0.9, 0.05], model)
+    # the same standard twice, at all or at one frequency
+    for f in (slice(None), 5):
+        model2, meas2 = model.copy(), meas.copy()
+        model2[1, f], meas2[1, f] = model2[0, f], meas2[0, f]
+        with pytest.raises(np.linalg.LinAlgError, match="Singular"):
+            cal.network_sparams(model2, meas2)
+    # no signal, and a non-finite measurement
+    with pytest.raises(np.linalg.LinAlgError):
+        cal.network_sparams(model, np.zeros_like(meas))
+    meas[2, 3] = np.nan
+    with pytest.raises(np.linalg.LinAlgError):
+        cal.network_sparams(model, meas)
+
+
+def _random_sparams(rng, n):
+    sprms = 0.2 * (rng.normal(size=(3, n)) + 1j * rng.normal(size=(3, n)))
+    sprms[1] += 1
+    return sprms
+
+
+def test_cascade_sparams():
+    rng = np.random.default_rng(2)
+    a, b, c = (_random_sparams(rng, 50) for _ in range(3))
+    gamma = 0.5 * (rng.normal(size=50) + 1j * rng.normal(size=50))
+    nested = cal.embed_sparams(
+        a, cal.embed_sparams(b, cal.embed_sparams(c, gamma))
+    )
+    np.testing.assert_allclose(
+        cal.embed_sparams(cal.cascade_sparams(a, b, c), gamma), nested
+    )
+    # a perfect through is the identity of the cascade
+    thru = np.array([0, 1, 0])[:, None]
+    np.testing.assert_allclose(cal.cascade_sparams(thru, a), a)
+    np.testing.assert_allclose(cal.cascade_sparams(a, thru), a)
+
+
+def test_embed_kernels_out_and_scratch():
+    rng = np.random.default_rng(5)
+    sprms = _random_sparams(rng, 20)
+    gamma = 0.5 * (rng.normal(size=(3, 20)) + 1j * rng.normal(size=(3, 20)))
+    meas = cal.embed_sparams(sprms, gamma)
+    # in place on a batch with a reused scratch array
+    buf, scratch = meas.copy(), np.empty_like(meas)
+    assert cal.de_embed_sparams(sprms, buf, out=buf, scratch=scratch) is buf
+    np.testing.assert_allclose(buf, gamma)
+    assert cal.embed_sparams(sprms, buf, out=buf, scratch=scratch) is buf
+    np.testing.assert_allclose(buf, meas)
+    with pytest.raises(ValueError, match="overlap"):
+        cal.embed_sparams(sprms, buf, out=buf, scratch=buf[::-1])
+    # complex64 stays complex64
+    s64, m64 = sprms.astype(np.complex64), meas.astype(np.complex64)
+    g64 = cal.de_embed_sparams(s64, m64)
+    assert g64.dtype == np.complex64
+    np.testing.assert_allclose(g64, gamma, rtol=1e-4)
+    out = np.empty(meas.shape, dtype=np.complex64)
+    cal.de_embed_sparams(sprms, meas, out=out)
+    np.testing.assert_allclose(out, gamma, rtol=1e-4)
+    # scalars
+    g = cal.de_embed_sparams(sprms[:, 0], meas[0, 0])
+    assert np.ndim(g) == 0
+    assert g == pytest.approx(gamma[0, 0])
+
+
+def test_single_precision():
+    rng = np.random.default_rng(6)
+    freqs = np.linspace(50e6, 250e6, 41)
+    kit = cal.S911T(freq_Hz=freqs)
+    true = _random_sparams(rng, 41)
+    osl = cal.embed_sparams(true, kit.std_gamma)
+    single = cal.network_sparams(kit.std_gamma, osl, precision="single")
+    assert single.dtype == np.complex64
+    # against the double precision solve
+    double = cal.network_sparams(kit.std_gamma, osl)
+    np.testing.assert_allclose(single, double, rtol=0, atol=1e-5)
+    with pytest.raises(ValueError, match="Unknown precision"):
+        cal.network_sparams(kit.std_gamma, osl, precision="half")
+    assert cal.cascade_sparams(single, single).dtype == np.complex64
+    assert cal.cascade_sparams(single, double).dtype == np.complex128
+    sub, _ = cal.interp_sparams(freqs, single, freqs[1:-1] + 1e6)
+    assert sub.dtype == np.complex64
+
+
+def test_calibrate_matches_sequential_de_embedding():
+    rng = np.random.default_rng(3)
+    sprms_dict = {
+        "vna": _random_sparams(rng, 40),
+        "cable": _random_sparams(rng, 40),
+    }
+    gammas = 0.5 * (rng.normal(size=(6, 40)) + 1j * rng.normal(size=(6, 40)))
+    expected = gammas
+    for sprm in sprms_dict.values():
+        expected = np.array(
+            [
+                cal.de_embed_sparams(sparams=sprm, gamma_prime=g)
+                for g in expected
+            ]
+        )
+    calibrated = cal.calibrate(gammas, sprms_dict)
+    assert calibrated.shape == (6, 40)
+    np.testing.assert_allclose(calibrated, expected)
+    assert cal.calibrate(gammas, {}) is gammas
+
+
+def test_std_gamma_cache(monkeypatch):
+    cal.clear_std_gamma_cache()
+    freqs = np.linspace(50e6, 250e6, 101)
+    kit = cal.S911T(freq_Hz=freqs)
+    gamma = kit.std_gamma
+    # callers get their own copy of the cached model
+    assert gamma.flags.writeable
+    gamma[:] = 1
+    gamma = kit.std_gamma
+    cached = cal._std_gamma_cache[kit.cache_key]
+    np.testing.assert_array_equal(gamma, cached)
+    assert not np.all(gamma == 1)
+    # identical grids share the cached model; standards stay unbuilt
+    kit2 = cal.S911T(freq_Hz=freqs.copy())
+    assert kit2.cache_key == kit.cache_key
+    np.testing.assert_array_equal(kit2.std_gamma, gamma)
+    assert cal._std_gamma_cache[kit2.cache_key] is cached
+    assert kit2._standards == {}
+    np.testing.assert_array_equal(gamma, kit2._std_gamma())
+    other = cal.S911T(freq_Hz=freqs[:50])
+    assert other.cache_key != kit.cache_key
+    assert other.std_gamma.shape == (3, 50)
+    # kit parameters are part of the key
+    key = kit.cache_key
+    monkeypatch.setattr(cal.S911T, "OPEN_DELAY", 31e-12)
+    assert cal.S911T(freq_Hz=freqs).cache_key != key
+    monkeypatch.undo()
+    # bounded eviction, least recently used first
+    monkeypatch.setattr(cal, "STD_GAMMA_CACHE_SIZE", 2)
+    assert kit.std_gamma.shape == (3, 101)  # most recent
+    assert cal.S911T(freq_Hz=freqs[:20]).std_gamma.shape == (3, 20)
+    assert other.cache_key not in cal._std_gamma_cache
+    assert cal._std_gamma_cache[kit.cache_key] is cached
+    # computed once per kit
+    assert "cache_key" in vars(kit)
+    # a kit's model can be replaced without touching the cache
+    kit2.std_gamma = np.zeros((3, 101))
+    assert np.all(kit2.std_gamma == 0)
+    np.testing.assert_array_equal(kit.std_gamma, gamma)
+    cal.clear_std_gamma_cache()
+
+
+def test_std_gamma_follows_standards():
+    cal.clear_std_gamma_cache()
+    freqs = np.linspace(50e6, 250e6, 101)
+    kit = cal.S911T(freq_Hz=freqs)
+    gamma = kit.std_gamma
+    # a replaced standard is used instead of the cached model
+    kit.add_open(1e-12, 0, 0)
+    custom = kit.std_gamma
+    assert not np.allclose(custom[0], gamma[0])
+    np.testing.assert_array_equal(custom[1:], gamma[1:])
+    kit.add_short(1e-9, 0, 0)
+    kit.load = cal.BasicLoadStandard(np.full(101, 75.0))
+    custom = kit.std_gamma
+    assert not np.allclose(custom[1], gamma[1])
+    np.testing.assert_allclose(custom[2], 0.2)
+    # other kits on the same grid still get the model
+    np.testing.assert_array_equal(cal.S911T(freq_Hz=freqs).std_gamma, gamma)
+    # a new grid rebuilds the models
+    kit.std_gamma = np.zeros((3, 101))
+    kit.freq_Hz = freqs[:50]
+    assert kit.open.gamma.shape == (50,)
+    np.testing.assert_array_equal(kit.std_gamma, gamma[:, :50])
+    assert not hasattr(kit, "match")
+    cal.clear_std_gamma_cache()
+
+
+def test_std_gamma_disk_cache(tmp_path):
+    cal.clear_std_gamma_cache()
+    freqs = np.linspace(50e6, 250e6, 11)
+    kit = cal.S911T(freq_Hz=freqs, cache_dir=tmp_path)
+    gamma = kit.std_gamma
+    fpath = tmp_path / f"{kit.cache_key}.npy"
+    np.testing.assert_array_equal(np.load(fpath), gamma)
+    # a fresh process would load the stored model instead of computing
+    cal.clear_std_gamma_cache()
+    np.save(fpath, np.zeros((3, 11), dtype=complex))
+    kit = cal.S911T(freq_Hz=freqs, cache_dir=tmp_path)
+    assert np.all(kit.std_gamma == 0)
+    cal.clear_std_gamma_cache()
+
+
+def test_error_model(tmp_path):
+    rng = np.random.default_rng(4)
+    freqs = np.linspace(50e6, 250e6, 31)
+    kit = cal.S911T(freq_Hz=freqs)
+    true = _random_sparams(rng, 31)
+    osl = cal.embed_sparams(true, kit.std_gamma)
+    em = cal.ErrorModel.from_osl(osl, kit)
+    assert em.sparams.flags.c_contiguous
+    np.testing.assert_allclose(em.sparams, true)
+
+    gammas = 0.5 * (
+        rng.normal(size=(4, 2, 31)) + 1j * rng.normal(size=(4, 2, 31))
+    )
+    meas = em.apply(gammas)
+    np.testing.assert_allclose(meas, cal.embed_sparams(true, gammas))
+    np.testing.assert_allclose(em.remove(meas), gammas)
+    # in place
+    buf = meas.copy()
+    assert em.remove(buf, out=buf) is buf
+    np.testing.assert_allclose(buf, gammas)
+
+    em.save(tmp_path / "cal.npz")
+    loaded = cal.ErrorModel.load(tmp_path / "cal.npz")
+    np.testing.assert_array_equal(loaded.sparams, em.sparams)
+    np.testing.assert_array_equal(loaded.freq_Hz, freqs)
+    # single precision models keep their precision through a save
+    em32 = cal.ErrorModel.from_osl(osl, kit, precision="single")
+    assert em32.sparams.dtype == np.complex64
+    assert em.astype("double") is em
+    np.testing.assert_allclose(
+        em.astype("single").sparams, em32.sparams, atol=1e-5
+    )
+    assert em32.remove(meas.astype(np.complex64)).dtype == np.complex64
+    em32.save(tmp_path / "cal32.npz")
+    assert cal.ErrorModel.load(tmp_path / "cal32.npz").precision == "single"
+
+    with pytest.raises(ValueError, match="31 frequencies"):
+        em.remove(np.zeros(30, dtype=complex))
+    with pytest.raises(ValueError, match="shape"):
+        cal.ErrorModel(freqs, true[:, :5])
+
+
+def test_error_model_cascade():
+    rng = np.random.default_rng(5)
+    freqs = np.arange(20.0)
+    a = cal.ErrorModel(freqs, _random_sparams(rng, 20))
+    b = cal.ErrorModel(freqs, _random_sparams(rng, 20))
+    gamma = 0.5 * (rng.normal(size=20) + 1j * rng.normal(size=20))
+    ab = cal.ErrorModel.cascade(a, b)
+    np.testing.assert_allclose(ab.apply(gamma), a.apply(b.apply(gamma)))
+    with pytest.raises(ValueError, match="different grids"):
+        cal.ErrorModel.cascade(a, cal.ErrorModel(freqs + 1, b.sparams))
+    with pytest.raises(ValueError, match="at least one"):
+        cal.ErrorModel.cascade()
+
+
+def test_interp_sparams(tmp_path):
+    delay = 20e-9  # ~1.3 turns of phase over the band
+    coarse = np.linspace(50e6, 250e6, 201)
+    fine = np.linspace(60e6, 240e6, 997)
+
+    def term(f):
+        ripple = 0.1 * np.sin(2 * np.pi * f / 100e6)
+        return (0.8 + ripple) * np.exp(-2j * np.pi * f * delay)
+
+    sprms = np.stack([term(coarse), 0.5 * term(coarse), 0 * coarse + 0.1])
+    interp, err = cal.interp_sparams(coarse, sprms, fine)
+    expected = np.stack([term(fine), 0.5 * term(fine), 0 * fine + 0.1])
+    actual = np.abs(interp - expected)
+    assert actual.max() < 1e-4
+    # the estimate is of the right size, and zero for a constant term
+    assert actual[0].max() < 2 * err[0].max()
+    assert err[0].max() < 10 * actual[0].max()
+    np.testing.assert_allclose(err[2], 0, atol=1e-15)
+    # on the original grid the interpolation is exact
+    same, _ = cal.interp_sparams(coarse, sprms, coarse)
+    np.testing.assert_allclose(same, sprms, rtol=1e-12)
+    with pytest.raises(ValueError, match="outside the calibrated band"):
+        cal.interp_sparams(coarse, sprms, [40e6])
+
+    em = cal.ErrorModel(coarse, sprms)
+    assert em.interp(coarse) is em
+    sub = em.interp(fine)
+    np.testing.assert_array_equal(sub.sparams, interp)
+    np.testing.assert_array_equal(sub.interp_error, err)
+    # the error estimate is kept through a save
+    sub.save(tmp_path / "sub.npz")
+    loaded = cal.ErrorModel.load(tmp_path / "sub.npz")
+    np.testing.assert_array_equal(loaded.sparams, sub.sparams)
+    np.testing.assert_array_equal(loaded.interp_error, err)
+    em.save(tmp_path / "em.npz")
+    assert cal.ErrorModel.load(tmp_path / "em.npz").interp_error is None
@@ -0,0 +1,144 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from cmt_vna import calmanager
+from cmt_vna.calmanager import CalibrationManager
+from cmt_vna.dataset import NpzDataset
+from cmt_vna.testing import DummyVNA
+
+NPOINTS = 11
+
+
+def osl():
+    ones = np.ones(NPOINTS, dtype=complex)
+    return {"VNAO": 0.9 * ones, "VNAS": -0.9 * ones, "VNAL": 0.01 * ones}
+
+
+class TestCalibrationManager:
+    def setup_method(self):
+        self.vna = DummyVNA(switch_fn=MagicMock())
+        self.vna.setup(npoints=NPOINTS)
+        self.osl = patch.object(self.vna, "measure_OSL", side_effect=osl)
+        self.mock_osl = self.osl.start()
+        self.load = 0.01 * np.ones(NPOINTS, dtype=complex)
+        self.seq = patch.object(
+            self.vna,
+            "measure_sequence",
+            side_effect=lambda states: {s: self.load for s in states},
+        )
+        self.mock_seq = self.seq.start()
+
+    def teardown_method(self):
+        self.osl.stop()
+        self.seq.stop()
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError, match="Unknown metric"):
+            CalibrationManager(self.vna, metric="rms")
+        with pytest.raises(ValueError, match="not an OSL standard"):
+            CalibrationManager(self.vna, monitor="VNAANT")
+
+    def test_recalibrates_on_drift(self):
+        cal = CalibrationManager(self.vna, threshold=0.01)
+        t0 = cal.ensure()
+        assert cal.history[0]["reason"] == "initial"
+        assert self.vna.error_model().freq_Hz.size == NPOINTS
+        self.mock_seq.assert_not_called()
+        # monitor unchanged: no new calibration
+        assert cal.ensure() == t0
+        assert cal.last_drift == 0
+        assert self.mock_osl.call_count == 1
+        # small drift is tolerated, a large one triggers a full OSL
+        self.load = self.load + 0.005
+        assert cal.ensure() == t0
+        self.load = self.load + 0.05
+        cal.ensure()
+        assert self.mock_osl.call_count == 2
+        assert cal.history[-1]["reason"] == "drift"
+        assert cal.history[-1]["drift"] == pytest.approx(0.055)
+        assert cal.standards_sweeps == 2 * 3 + 3
+        self.mock_seq.assert_called_with(["VNAL"])
+
+    def test_recalibrates_on_age(self, monkeypatch):
+        cal = CalibrationManager(self.vna, max_age=60)
+        now = [1000.0]
+        monkeypatch.setattr(calmanager.time, "time", lambda: now[0])
+        assert cal.ensure() == 1000.0
+        now[0] += 59
+        assert cal.ensure() == 1000.0
+        now[0] += 1
+        assert cal.ensure() == 1060.0
+        assert [h["reason"] for h in cal.history] == ["initial", "age"]
+        # the age check replaces the drift check
+        assert cal.n_checks == 1
+
+    def test_mean_dB_metric(self):
+        cal = CalibrationManager(self.vna, metric="mean_dB", threshold=1)
+        cal.ensure()
+        self.load = self.load * 10 ** (0.5 / 20)
+        cal.ensure()
+        assert cal.last_drift == pytest.approx(0.5)
+        assert len(cal.history) == 1
+        self.load = self.load * 10 ** (1 / 20)
+        cal.ensure()
+        assert len(cal.history) == 2
+
+    def test_read_data_tags_sweeps(self, tmp_path):
+        cal = CalibrationManager(self.vna)
+        t0 = cal.read_data("VNAANT")
+        self.vna.switch_fn.assert_called_with("VNAANT")
+        (gamma_key,) = [k for k in self.vna.data if k.endswith("_gamma")]
+        cal_key = gamma_key.replace("_gamma", "_cal")
+        assert self.vna.data[cal_key] == t0
+        # the tags are indexed by time like the sweeps
+        self.vna.write_data(outdir=tmp_path)
+        ds = NpzDataset(tmp_path)
+        assert "cal" in ds.kinds
+        times, _, data = ds.select(kind="cal")
+        np.testing.assert_array_equal(times, ds.times())
+        np.testing.assert_array_equal(data, [t0])
+
+    def test_every_file_holds_its_calibration(self, tmp_path):
+        cal = CalibrationManager(self.vna, model_dir=tmp_path)
+        # two files written under the same calibration
+        for outdir in ("first", "second"):
+            (tmp_path / outdir).mkdir()
+            t0 = cal.read_data("VNAANT")
+            self.vna.write_data(outdir=tmp_path / outdir)
+        assert self.mock_osl.call_count == 1
+        ds = NpzDataset(tmp_path / "second")
+        (osl_entry,) = ds.entries("vna")
+        (cal_entry,) = ds.entries("cal")
+        assert osl_entry.path == ds.entries("gamma")[0].path
+        np.testing.assert_array_equal(
+            ds.read(osl_entry), np.array(list(osl().values()))
+        )
+        # the tag finds the saved error model of the calibration
+        assert ds.read(cal_entry) == t0
+        model = calmanager.load_model(tmp_path, ds.read(cal_entry))
+        np.testing.assert_array_equal(
+            model.sparams, self.vna.error_model().sparams
+        )
+        assert calmanager.model_path(tmp_path, t0).exists()
+
+    def test_sweeps_follow_drift_check_in_dut_state(self):
+        cal = CalibrationManager(self.vna)
+        cal.ensure()
+        calls = []
+
+        def sequence(states):
+            calls.extend(states)
+            return {s: self.load for s in states}
+
+        def sweep():
+            calls.append("sweep")
+            return self.load
+
+        self.vna.switch_fn.side_effect = calls.append
+        self.mock_seq.side_effect = sequence
+        with patch.object(self.vna, "measure_S11", side_effect=sweep):
+            cal.read_data("VNAANT", num_data=2)
+        # drift check on the load, then back to the DUT before sweeping
+        assert calls == ["VNAL", "VNAANT", "sweep", "sweep"]
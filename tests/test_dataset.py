@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from cmt_vna.dataset import NpzDataset, parse_time
+
+FREQS = np.linspace(1e6, 250e6, 11)
+
+
+def gamma(value, n=11):
+    return np.full(n, value + 1j * value)
+
+
+def write(tmp_path, stamp, sweeps, compressed=False, osl=False, freqs=FREQS):
+    data = {f"{s}_gamma": gamma(v, len(freqs)) for s, v in sweeps.items()}
+    data["freqs"] = freqs
+    if osl:
+        data["vna"] = np.ones((3, len(freqs)), dtype=complex)
+    save = np.savez_compressed if compressed else np.savez
+    save(tmp_path / f"{stamp}_vna_data.npz", **data)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    write(
+        tmp_path,
+        "20250101_000010",
+        {"20250101_000001": 1, "20250101_000005": 2},
+        osl=True,
+    )
+    write(
+        tmp_path,
+        "20250101_000030",
+        {"20250101_000020": 3, "20250101_000025": 4},
+        compressed=True,
+    )
+    (tmp_path / "notes.txt").write_text("ignored")
+    return NpzDataset(tmp_path)
+
+
+def test_index(dataset):
+    assert len(dataset) == 4
+    assert dataset.kinds == ["freqs", "gamma", "vna"]
+    t = dataset.times()
+    assert t[0] == parse_time("20250101_000001")
+    assert np.all(np.diff(t) > 0)
+    # uncompressed members are memory-mapped, compressed ones are not
+    assert isinstance(dataset.sweep(0), np.memmap)
+    assert not isinstance(dataset.sweep(3), np.memmap)
+    np.testing.assert_array_equal(dataset.sweep(3), gamma(4))
+    (osl,) = dataset.entries("vna")
+    assert osl.time == parse_time("20250101_000010")
+    assert dataset.read(osl).shape == (3, 11)
+
+
+def test_select(dataset):
+    times, freqs, data = dataset.select()
+    assert data.shape == (4, 11)
+    np.testing.assert_array_equal(freqs, FREQS)
+    np.testing.assert_array_equal(data[:, 0].real, [1, 2, 3, 4])
+    start = datetime(2025, 1, 1, 0, 0, 5)
+    times, _, data = dataset.select(start, parse_time("20250101_000025"))
+    np.testing.assert_array_equal(data[:, 0].real, [2, 3])
+    assert len(times) == 2
+    times, freqs, data = dataset.select(stop=0.0)
+    assert len(times) == 0 and freqs is None
+
+
+def test_select_reads_only_needed_files(dataset, tmp_path):
+    # corrupting the second file does not affect selections of the first
+    (tmp_path / "20250101_000030_vna_data.npz").write_bytes(b"garbage")
+    _, _, data = dataset.select(stop=parse_time("20250101_000010"))
+    assert data.shape == (2, 11)
+
+
+def test_select_rejects_mixed_axes(tmp_path):
+    write(tmp_path, "20250101_000010", {"20250101_000001": 1})
+    write(
+        tmp_path,
+        "20250101_000030",
+        {"20250101_000020": 1},
+        freqs=FREQS[:5],
+    )
+    ds = NpzDataset(tmp_path)
+    with pytest.raises(ValueError, match="differ in shape"):
+        ds.select()
+    assert ds.select(stop=parse_time("20250101_000010"))[2].shape == (1, 11)
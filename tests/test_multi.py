@@ -0,0 +1,101 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from cmt_vna.multi import MultiVNA
+from cmt_vna.schedule import Schedule
+from cmt_vna.testing import DummyVNA, TimingModel
+
+NPOINTS = 11
+SWEEP = 0.05  # seconds per simulated sweep
+
+
+def simulated():
+    model = TimingModel(
+        point_overhead=0, ifbw_factor=0, sweep_overhead=SWEEP, latency=0
+    )
+    vna = DummyVNA(switch_fn=MagicMock(), simulate=model)
+    vna.setup(npoints=NPOINTS)
+    return vna
+
+
+@pytest.fixture
+def multi():
+    with MultiVNA() as m:
+        yield m
+
+
+def test_runs_concurrently(multi):
+    for name in "abc":
+        multi.add(name, simulated())
+    assert len(multi) == 3
+    data = multi.measure_S11()
+    assert list(data) == ["a", "b", "c"]
+    assert all(d.shape == (NPOINTS,) for d in data.values())
+    timing = multi.last_cycle_timing
+    assert min(timing["busy"].values()) >= SWEEP
+    # bounded by the slowest instrument, not the sum
+    assert timing["wall"] < 0.7 * timing["serial"]
+    assert timing["saved"] > 0
+    events = multi.events(task="measure_S11")
+    assert [e.name for e in sorted(events)] == ["a", "b", "c"]
+    assert max(e.start for e in events) < min(e.stop for e in events)
+
+
+def test_shared_resources_take_turns(multi):
+    multi.add("a", simulated(), shared=["pico"])
+    multi.add("b", simulated(), shared=["pico"])
+    multi.add("c", simulated())
+    osl = multi.measure_OSL()
+    assert set(osl["a"]) == {"VNAO", "VNAS", "VNAL"}
+    # the calls holding the shared switch do not overlap
+    held = sorted(
+        (e.start + e.wait, e.stop) for e in multi.events() if e.name in "ab"
+    )
+    assert held[0][1] <= held[1][0]
+    assert multi.events("c")[0].wait == 0
+    stats = multi.stats()
+    assert stats["multi"]["cycle.measure_OSL"]["count"] == 1
+    assert "a.wait" in stats["multi"] and "c.wait" not in stats["multi"]
+    assert stats["a"] == {}  # VNA timer disabled
+
+
+def test_errors_and_names(multi):
+    multi.add("a", simulated()).add("b", simulated())
+    with pytest.raises(ValueError, match="Duplicate"):
+        multi.add("a", simulated())
+    # one instrument under two names would share its socket between
+    # concurrent calls
+    with pytest.raises(ValueError, match="already added as 'a'"):
+        multi.add("a2", multi["a"])
+    assert len(multi) == 2
+    with pytest.raises(KeyError, match="Unknown instrument"):
+        multi.measure_S11(names=["x"])
+    multi["b"].switch_fn.side_effect = RuntimeError("switch failed")
+    with pytest.raises(RuntimeError, match="switch failed"):
+        multi.measure_sequence(["VNAANT"])
+    # the other instrument still completed its call
+    events = sorted(multi.events(task="measure_sequence"))
+    assert [(e.name, e.error) for e in events] == [
+        ("a", None),
+        ("b", "RuntimeError"),
+    ]
+    assert multi.last_cycle_timing["busy"].keys() == {"a"}
+
+
+def test_setup_read_data_and_schedules(multi):
+    multi.add("a", simulated()).add("b", simulated())
+    freqs = multi.setup(npoints=21, fstart=10e6)
+    np.testing.assert_allclose(freqs["a"], np.linspace(10e6, 250e6, 21))
+    multi.read_data(names=["b"])
+    assert not multi["a"].data and len(multi["b"].data) == 1
+    results = multi.run_schedules(
+        {"a": Schedule().add("VNAANT", repeat=2), "b": Schedule().add("VNAL")}
+    )
+    assert results["a"]["VNAANT"].shape == (2, 21)
+    assert results["b"]["VNAL"].shape == (1, 21)
+    with pytest.raises(KeyError, match="Unknown instrument"):
+        multi.run_schedules({"x": Schedule()})
+    multi.run(lambda vna: vna.id)
+    assert multi.events()[-1].task == "<lambda>"
@@ -0,0 +1,123 @@
+from unittest.mock import MagicMock, call, patch
+
+import numpy as np
+import pytest
+
+from cmt_vna.schedule import Schedule, ScheduleResult
+from cmt_vna.testing import DummyVNA
+
+
+class TestSchedule:
+    def setup_method(self):
+        self.switch_fn = MagicMock()
+        self.vna = DummyVNA(switch_fn=self.switch_fn)
+        self.vna.setup(npoints=101)
+
+    def test_add_validation(self):
+        sched = Schedule().add("VNAO")
+        with pytest.raises(ValueError, match="Duplicate schedule key"):
+            sched.add("VNAO")
+        with pytest.raises(ValueError, match="repeat must be positive"):
+            sched.add("VNAS", repeat=0)
+        with pytest.raises(ValueError, match="Unknown sweep settings"):
+            sched.add("VNAS", averages=4)
+        sched.add("VNAO", key="VNAO_hi", npoints=11)
+        assert [e["key"] for e in sched.entries] == ["VNAO", "VNAO_hi"]
+
+    def test_groups_by_config_and_merges_states(self):
+        sched = (
+            Schedule()
+            .add("VNAO", key="o_fine", npoints=11)
+            .add("VNAANT", repeat=2)
+            .add("VNAO", key="o_coarse")
+            .add("VNAS", key="s_fine", npoints=11)
+            .add("VNAANT", key="ant_fine", npoints=11)
+        )
+        plan = sched.plan({"npoints": 101, "ifbw": None})
+        # current configuration first, then the other one
+        assert [g["npoints"] for g, _ in plan] == [101, 11]
+        assert [e["key"] for e in plan[0][1]] == ["VNAANT", "o_coarse"]
+        # second group starts where the first one ended
+        assert [e["state"] for e in plan[1][1]] == ["VNAO", "VNAS", "VNAANT"]
+
+    def test_run(self):
+        sched = (
+            Schedule()
+            .add("VNAO", key="o_fine", npoints=11)
+            .add("VNAANT", repeat=3)
+            .add("VNAO", key="o_coarse", repeat=2)
+            .add("VNAS", key="s_fine", npoints=11)
+        )
+        res = sched.run(self.vna)
+        assert isinstance(res, ScheduleResult)
+        assert res["VNAANT"].shape == (3, 101)
+        assert res["o_coarse"].shape == (2, 101)
+        assert res["o_fine"].shape == (1, 11)
+        assert res.settings["s_fine"]["npoints"] == 11
+        np.testing.assert_allclose(
+            res.freqs["o_fine"], np.linspace(1e6, 250e6, 11)
+        )
+        assert [k for k, _, _ in res.order] == [
+            "VNAANT",
+            "o_coarse",
+            "o_fine",
+            "s_fine",
+        ]
+        # VNAO is shared by both groups, so it is switched to only once
+        assert self.switch_fn.call_args_list == [
+            call("VNAANT"),
+            call("VNAO"),
+            call("VNAS"),
+        ]
+        assert res.timing["n_switches"] == 3
+        assert res.timing["n_config_changes"] == 1
+        busy = sum(res.timing[k] for k in ("setup", "switch", "sweep"))
+        assert 0 < busy < res.timing["wall"] + res.timing["saved"] + 1e-3
+
+    def test_run_sends_only_given_settings(self):
+        # a profile applied earlier is not reset to setup() defaults
+        self.vna.apply_profile({"fstart": 10e6, "fstop": 100e6, "ifbw": 1e3})
+        self.vna._power_dBm = None  # never set on this instrument
+        sched = Schedule().add("VNAANT").add("VNAO", npoints=11)
+        with patch.object(self.vna.s, "write", wraps=self.vna.s.write) as m:
+            res = sched.run(self.vna)
+        writes = [c.args[0].strip() for c in m.call_args_list]
+        assert [w for w in writes if "TRIG" not in w] == ["SENS1:SWE:POIN 11"]
+        assert self.vna.fstart == 10e6 and self.vna.ifbw == 1e3
+        assert "power_dBm" not in res.settings["VNAO"]
+        np.testing.assert_allclose(
+            res.freqs["VNAO"], np.linspace(10e6, 100e6, 11)
+        )
+
+    def test_run_uses_measure_sequence(self, monkeypatch):
+        calls = []
+        measure_sequence = self.vna.measure_sequence
+
+        def spy(states, **kwargs):
+            calls.append((states, kwargs))
+            return measure_sequence(states, **kwargs)
+
+        monkeypatch.setattr(self.vna, "measure_sequence", spy)
+        sched = Schedule().add("VNAO", repeat=2).add("VNAO", key="o2")
+        res = sched.add("VNAS").run(self.vna)
+        assert calls == [
+            (
+                ["VNAO", "VNAS"],
+                {"repeat": {"VNAO": 3, "VNAS": 1}, "current_state": None},
+            )
+        ]
+        assert res["VNAO"].shape == (2, 101)
+        assert res["o2"].shape == (1, 101)
+
+    def test_run_without_switch_fn(self):
+        self.vna.switch_fn = None
+        with pytest.raises(RuntimeError, match="No switch_fn set"):
+            Schedule().add("VNAO").run(self.vna)
+
+    def test_switch_failure_propagates(self):
+        self.vna.switch_fn = MagicMock(
+            side_effect=[None, RuntimeError("switch boom")]
+        )
+        sched = Schedule().add("VNAO").add("VNAS")
+        with pytest.raises(RuntimeError, match="switch boom"):
+            sched.run(self.vna)
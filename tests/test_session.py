@@ -0,0 +1,170 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from cmt_vna import VNA
+from cmt_vna.session import (
+    RECORD,
+    ReplayResource,
+    SessionRecorder,
+    read_session,
+)
+from cmt_vna.testing import (
+    DummyResource,
+    FakeCmtvnaServer,
+    ReplayVNA,
+    SimulatedResource,
+    TimingModel,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, dt):
+        self.now += dt
+
+
+@pytest.fixture
+def server():
+    with FakeCmtvnaServer() as srv:
+        yield srv
+
+
+def run(vna):
+    """The calls of a recorded session; its results."""
+    freqs = vna.setup(npoints=101)
+    s11 = vna.measure_S11()
+    osl = vna.measure_OSL()
+    return freqs, s11, osl
+
+
+@pytest.mark.parametrize("transport", ["visa", "socket"])
+@pytest.mark.parametrize("precision", ["double", "single"])
+def test_record_and_replay(server, tmp_path, transport, precision):
+    path = tmp_path / "session.bin"
+    kwargs = {"transport": transport, "precision": precision}
+    with VNA(
+        port=server.port, switch_fn=MagicMock(), record=path, **kwargs
+    ) as vna:
+        freqs, s11, osl = run(vna)
+    assert vna.s._file.closed
+    header, records = read_session(path)
+    assert records[0] == (records[0].time, "write", records[0].data)
+    assert header["methods"][-1] == "query_ascii_values"
+    assert ("query_raw" in header["methods"]) == (transport == "socket")
+    # arrays are stored in binary, as parsed by the resource
+    arrays = [r for r in records if r.kind == "array"]
+    bulk = transport == "socket" and precision == "single"
+    assert arrays[-1].data.dtype == (np.float32 if bulk else np.float64)
+
+    switch = MagicMock()
+    replay = ReplayVNA(path, switch_fn=switch, **kwargs)
+    freqs2, s11_2, osl2 = run(replay)
+    assert replay.s.remaining == 0
+    np.testing.assert_array_equal(freqs2, freqs)
+    np.testing.assert_array_equal(s11_2, s11)
+    assert s11_2.dtype == s11.dtype
+    for key in osl:
+        np.testing.assert_array_equal(osl2[key], osl[key])
+    assert switch.call_count == 3
+
+
+def test_replay_detects_divergence(server, tmp_path):
+    path = tmp_path / "session.bin"
+    vna = VNA(port=server.port, record=path)
+    vna.setup(npoints=101)
+    vna.measure_S11()
+    replay = ReplayVNA(path)
+    with pytest.raises(RuntimeError, match="diverged at record"):
+        replay.setup(npoints=201)
+    replay = ReplayVNA(path)
+    replay.setup(npoints=101)
+    replay.measure_S11()
+    with pytest.raises(RuntimeError, match="exhausted"):
+        replay.measure_S11()
+
+
+def test_replay_through_other_array_path(server, tmp_path):
+    # recorded through query_ascii_array, replayed through query_raw
+    path = tmp_path / "session.bin"
+    vna = VNA(port=server.port, record=path, transport="socket")
+    vna.setup(npoints=101)
+    s11 = vna.measure_S11()
+    replay = ReplayVNA(path, transport="socket", timing=True)
+    replay.setup(npoints=101)
+    np.testing.assert_allclose(replay.measure_S11(), s11, rtol=1e-12)
+    assert replay.timer.stats("parse")["count"] == 2  # freqs and S11
+
+
+def test_record_raw_replies(server, tmp_path):
+    # query_raw replies are views of the receive buffer; logged as raw
+    path = tmp_path / "session.bin"
+    with VNA(port=server.port, record=path, transport="socket") as vna:
+        vna.timer.enabled = True
+        vna.setup(npoints=101)
+        s11 = vna.measure_S11()
+    _, records = read_session(path)
+    assert "raw" in {r.kind for r in records}
+    replay = ReplayVNA(path, transport="socket")
+    replay.timer.enabled = True
+    replay.setup(npoints=101)
+    np.testing.assert_array_equal(replay.measure_S11(), s11)
+
+
+def test_replay_speed(tmp_path):
+    path = tmp_path / "session.bin"
+    clock = FakeClock()
+    model = TimingModel(latency=1e-3, transfer_rate=1e6)
+    s = SessionRecorder(
+        SimulatedResource(model, clock, clock.sleep), path, clock=clock
+    )
+    s.write("SENS1:SWE:POIN 101")
+    s.write("TRIG:SEQ:SING")
+    assert s.query("*OPC?") == "1"
+    s.query_ascii_values("CALC:DATA:SDAT?", container=np.array)
+    s.close()
+    assert s.n_records == 6
+
+    sleeps = []
+    replay = ReplayResource(path, speed=2, sleep=sleeps.append)
+    assert not hasattr(replay, "query_raw")
+    replay.write("SENS1:SWE:POIN 101")
+    replay.write("TRIG:SEQ:SING")
+    assert replay.query("*OPC?") == "1"
+    data = replay.query_ascii_values("CALC:DATA:SDAT?", container=np.array)
+    np.testing.assert_array_equal(data, np.zeros(202))
+    # the recorded *OPC? and transfer latencies, at twice the speed
+    assert sum(sleeps) == pytest.approx(clock.now / 2)
+    assert len(sleeps) == 2
+    with pytest.raises(ValueError, match="positive"):
+        ReplayResource(path, speed=0)
+
+
+def test_errors_and_truncated_log(tmp_path):
+    path = tmp_path / "session.bin"
+    s = SessionRecorder(DummyResource(), path)
+    s.timeout = 100  # passed through
+    assert s._resource.timeout == 100
+    assert s.query("*IDN?") == "DummyVNA"
+    with pytest.raises(ValueError, match="not recognized"):
+        s.query("FORM:DATA?")
+    s.close()
+    with open(path, "ab") as f:
+        f.write(RECORD.pack(1.0, 0, 10) + b"TRIG")  # torn record
+    _, records = read_session(path)
+    assert [r.kind for r in records] == ["query", "text", "query", "error"]
+
+    replay = ReplayResource(path)
+    assert replay.query("*IDN?") == "DummyVNA"
+    with pytest.raises(ValueError, match="not recognized"):
+        replay.query("FORM:DATA?")
+    assert replay.remaining == 0
+    (tmp_path / "other.bin").write_bytes(b"not a log")
+    with pytest.raises(ValueError, match="not a session log"):
+        read_session(tmp_path / "other.bin")
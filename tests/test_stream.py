@@ -0,0 +1,120 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from cmt_vna.stream import Subscription, SweepStream
+from cmt_vna.testing import DummyVNA
+
+
+def numbered_vna(npoints=5):
+    """DummyVNA whose n-th sweep has all values equal to n."""
+    vna = DummyVNA()
+    vna.setup(npoints=npoints)
+    counter = iter(range(10**6))
+
+    def read_array(command, out=None):
+        out[...] = 0.0
+        out[::2] = next(counter)
+        return out
+
+    vna._read_array = read_array
+    return vna
+
+
+def test_validation():
+    vna = DummyVNA()
+    vna.setup(npoints=5)
+    with pytest.raises(ValueError, match="Unknown policy"):
+        SweepStream(vna, policy="newest")
+    with pytest.raises(ValueError, match="capacity must be positive"):
+        SweepStream(vna, capacity=0)
+
+
+def test_iterator_receives_every_sweep_in_order():
+    vna = numbered_vna()
+    stream = vna.stream(capacity=100, count=20)
+    sub = stream.subscribe()
+    assert isinstance(sub, Subscription)
+    stream.start()
+    sweeps = list(sub)
+    stream.wait()
+    assert [s.seq for s in sweeps] == list(range(20))
+    for s in sweeps:
+        np.testing.assert_array_equal(s.data, s.seq)
+    assert np.all(np.diff([s.time for s in sweeps]) >= 0)
+    assert sub.dropped == 0
+    assert stream.nsweeps == 20
+
+
+def test_drop_oldest_keeps_memory_fixed():
+    vna = numbered_vna()
+    stream = vna.stream(capacity=4, count=50)
+    sub = stream.subscribe()
+    with stream:
+        stream._thread.join()
+    received = list(sub)
+    # only the retained sweeps are left; the rest were dropped
+    assert [s.seq for s in received] == [46, 47, 48, 49]
+    assert sub.dropped == 46
+    assert stream._data.shape == (5, 5)
+    times, data = stream.latest(2)
+    np.testing.assert_array_equal(data.real, [[48] * 5, [49] * 5])
+    assert len(times) == 2
+
+
+def test_block_policy_waits_for_slow_consumer():
+    vna = numbered_vna()
+    stream = vna.stream(capacity=2, policy="block", count=15)
+    sub = stream.subscribe()
+    stream.start()
+    seqs = []
+    for sweep in sub:
+        time.sleep(0.002)
+        seqs.append(sweep.seq)
+    stream.wait()
+    assert seqs == list(range(15))
+    assert sub.dropped == 0
+
+
+def test_callback_and_close():
+    vna = numbered_vna()
+    stream = vna.stream(capacity=8, policy="block")
+    got = []
+    done = threading.Event()
+
+    def callback(sweep):
+        got.append(sweep.seq)
+        if len(got) == 5:
+            done.set()
+            raise RuntimeError("consumer gone")
+
+    cb_sub = stream.subscribe(callback=callback)
+    with stream:
+        assert done.wait(5)
+        # the failed callback closed its subscription, so the block
+        # policy no longer waits for it
+        sub = stream.subscribe()
+        assert sub.get(timeout=5) is not None
+    assert got == [0, 1, 2, 3, 4]
+    assert isinstance(cb_sub.error, RuntimeError)
+    assert cb_sub.get() is None
+
+
+def test_get_timeout_and_acquisition_error():
+    vna = DummyVNA()
+    vna.setup(npoints=5)
+    stream = vna.stream()
+    sub = stream.subscribe()
+    with pytest.raises(TimeoutError):
+        sub.get(timeout=0.01)
+
+    def fail():
+        raise ConnectionError("link down")
+
+    vna._trigger = fail
+    stream.start()
+    assert sub.get() is None  # stream ended
+    with pytest.raises(ConnectionError, match="link down"):
+        stream.stop()
@@ -0,0 +1,156 @@
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from cmt_vna import VNA
+from cmt_vna.testing import (
+    DummyVNA,
+    FakeCmtvnaServer,
+    SimulatedResource,
+    SimulatedSocketResource,
+    TimingModel,
+    synthetic_s11,
+)
+
+
+class FakeClock:
+    """Clock that only advances when slept on."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, dt):
+        assert dt >= 0
+        self.now += dt
+
+
+def simulated_vna(model, **kwargs):
+    vna = DummyVNA(simulate=model, **kwargs)
+    clock = FakeClock()
+    vna.s.clock, vna.s.sleep = clock, clock.sleep
+    return vna, clock
+
+
+def test_timing_model():
+    model = TimingModel()
+    assert model.sweep_time(1000, 10e3) == pytest.approx(
+        5e-3 + 1000 * (20e-6 + 1e-4)
+    )
+    assert model.query_time(5000) == pytest.approx(0.5e-3 + 1e-3)
+    jittery = TimingModel(jitter=0.1, seed=1)
+    times = [jittery.sweep_time(1000, 10e3) for _ in range(200)]
+    assert np.std(times) > 0
+    assert np.mean(times) == pytest.approx(0.125, rel=0.05)
+    assert min(times) >= 0
+
+
+@pytest.mark.parametrize("transport", ["visa", "socket"])
+def test_measure_s11_takes_simulated_time(transport):
+    model = TimingModel(latency=1e-3, transfer_rate=1e6)
+    vna, clock = simulated_vna(model, transport=transport)
+    cls = SimulatedSocketResource if transport == "socket" else None
+    assert isinstance(vna.s, cls or SimulatedResource)
+    vna.setup(npoints=101, ifbw=1e3)
+    t0 = clock()
+    s11 = vna.measure_S11()
+    assert s11.shape == (101,)
+    sweep = model.sweep_time(101, 1e3)
+    # trigger, *OPC? once the sweep is done, then the SDAT transfer
+    expected = sweep + 1e-3 + 2 / 1e6 + 1e-3 + 2 * 101 * 20 / 1e6
+    assert clock() - t0 == pytest.approx(expected)
+
+
+def test_sweeps_queue_and_timeout():
+    vna, clock = simulated_vna(TimingModel(latency=0))
+    vna.setup(npoints=100, ifbw=1e3)
+    sweep = vna.s.model.sweep_time(100, 1e3)
+    t0 = clock()
+    vna.s.write("TRIG:SEQ:SING")
+    vna.s.write("TRIG:SEQ:SING")  # starts when the first one ends
+    vna.wait_for_opc()
+    assert clock() - t0 == pytest.approx(2 * sweep, rel=1e-3)
+    vna.s.timeout = sweep / 2 * 1e3
+    vna.s.write("TRIG:SEQ:SING")
+    with pytest.raises(TimeoutError):
+        vna.wait_for_opc()
+
+
+def test_simulate_defaults():
+    assert isinstance(DummyVNA(simulate=True).s.model, TimingModel)
+    assert DummyVNA().simulate is None
+
+
+@pytest.fixture
+def server():
+    with FakeCmtvnaServer() as srv:
+        yield srv
+
+
+@pytest.mark.parametrize("transport", ["visa", "socket"])
+def test_unmodified_vna_on_fake_server(server, transport):
+    vna = VNA(ip="127.0.0.1", port=server.port, timeout=5, transport=transport)
+    freqs = vna.setup(fstart=10e6, fstop=200e6, npoints=2001, ifbw=1e3)
+    np.testing.assert_allclose(freqs, np.linspace(10e6, 200e6, 2001))
+    s11 = vna.measure_S11()
+    np.testing.assert_allclose(s11, synthetic_s11(freqs), atol=1e-12)
+    assert vna.header["npoints"] == 2001
+    vna.s.close()
+
+
+def test_resource_calls_hold_lock(server, monkeypatch):
+    # handler threads share the resource, so every call is serialized
+    res = server.resource
+    calls = []
+    for name in ("write", "query", "query_ascii_values"):
+
+        def locked(*args, _call=getattr(res, name), **kwargs):
+            calls.append(server._lock.locked())
+            return _call(*args, **kwargs)
+
+        monkeypatch.setattr(res, name, locked)
+    vna = VNA(ip="127.0.0.1", port=server.port, timeout=5, transport="socket")
+    vna.setup(npoints=11)
+    vna.measure_S11()
+    vna.s.close()
+    assert len(calls) > 5 and all(calls)
+
+
+def test_format_subsystem_ignored(server):
+    with socket.create_connection((server.host, server.port)) as s:
+        f = s.makefile("rb")
+        s.sendall(b"FORM:DATA REAL\nFORM:DATA?\n*IDN?\n")
+        # FORM:DATA? is never answered, so the next reply is *IDN?'s
+        assert f.readline() == b"DummyVNA\n"
+        s.sendall(b"SENS1:SWE:POIN 11;:SENS1:SWE:POIN?\n")
+        assert f.readline() == b"11\n"
+
+
+def test_fault_injection(server):
+    vna = VNA(
+        ip="127.0.0.1", port=server.port, timeout=0.2, transport="socket"
+    )
+    vna.setup(npoints=11)
+    server.delay = 0.05
+    t0 = time.perf_counter()
+    vna.measure_S11()
+    assert time.perf_counter() - t0 >= 0.1  # *OPC? and SDAT replies
+    server.delay = 0.5
+    with pytest.raises(TimeoutError):
+        vna.wait_for_opc()
+    server.delay = 0
+    server.drop_after = server.n_queries
+    with pytest.raises(ConnectionError):
+        vna = VNA(ip="127.0.0.1", port=server.port, transport="socket")
+        vna.s.query("*IDN?\n")
+    # the server keeps accepting connections
+    server.drop_after = None
+    vna = VNA(ip="127.0.0.1", port=server.port, transport="socket")
+    assert vna.id == "DummyVNA"
+    server.drop()
+    with pytest.raises(ConnectionError):
+        vna.s.query("*IDN?\n")
@@ -0,0 +1,94 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from cmt_vna.testing import DummyVNA
+from cmt_vna.timing import BIN_EDGES, PhaseTimer
+
+
+def test_disabled_records_nothing():
+    timer = PhaseTimer()
+    with timer.span("sweep"):
+        pass
+    assert timer.phases == []
+    assert timer.span("a") is timer.span("b")  # shared no-op
+
+
+def test_record_stats_and_quantiles():
+    timer = PhaseTimer(enabled=True)
+    for dt in [1e-3] * 90 + [1e-1] * 10:
+        timer.record("sweep", dt)
+    st = timer.stats("sweep")
+    assert st["count"] == 100
+    assert st["total"] == pytest.approx(0.09 + 1.0)
+    assert st["min"] == 1e-3
+    assert st["max"] == 1e-1
+    assert sum(st["hist"]) == 100
+    assert len(st["hist"]) == len(BIN_EDGES) - 1
+    assert st["median"] == pytest.approx(1e-3, rel=0.13)
+    assert timer.quantile("sweep", 0.99) == pytest.approx(1e-1, rel=0.13)
+    # out of range durations land in the end bins
+    timer.record("x", 0.0)
+    timer.record("x", 1e6)
+    assert timer.stats("x")["hist"][0] == 1
+    assert timer.stats("x")["hist"][-1] == 1
+    timer.reset()
+    assert timer.stats() == {}
+
+
+def test_span_and_dump(tmp_path):
+    timer = PhaseTimer(enabled=True)
+    with pytest.raises(KeyError), timer.span("fail"):
+        raise KeyError
+    assert timer.stats("fail")["count"] == 1
+    timer.dump(tmp_path / "timing.json")
+    out = json.loads((tmp_path / "timing.json").read_text())
+    assert out["bin_edges"] == list(BIN_EDGES)
+    assert out["phases"]["fail"]["count"] == 1
+
+
+class TestVNATiming:
+    def setup_method(self):
+        self.vna = DummyVNA(switch_fn=MagicMock(), timing=True)
+        self.vna.setup(npoints=11)
+        self.vna.timer.reset()
+
+    def test_measure_s11_phases(self):
+        self.vna.measure_S11()
+        stats = self.vna.timer.stats()
+        for phase in ("trigger", "sweep", "transfer", "measure_S11"):
+            assert stats[phase]["count"] == 1
+        # pyvisa-style resources parse inside the transfer
+        assert "parse" not in stats
+
+    def test_socket_transport_splits_parse(self):
+        vna = DummyVNA(transport="socket", timing=True)
+        vna.setup(npoints=11)
+        vna.timer.reset()
+        vna.measure_S11_batch(3)
+        stats = vna.timer.stats()
+        assert stats["transfer"]["count"] == 3
+        assert stats["parse"]["count"] == 3
+        assert stats["measure_S11_batch"]["count"] == 1
+
+    def test_sequence_phases(self):
+        self.vna.measure_OSL()
+        self.vna.measure_ant()
+        self.vna.measure_rec()
+        self.vna.measure_dut("VNAAMB")
+        stats = self.vna.timer.stats()
+        for name in ("measure_OSL", "measure_ant", "measure_rec"):
+            assert stats[name]["count"] == 1
+        assert stats["measure_dut"]["count"] == 1
+        assert stats["switch"]["count"] == 3 + 3 + 1 + 1
+        assert stats["sweep"]["count"] == 8
+
+    def test_disabled_by_default(self):
+        vna = DummyVNA()
+        vna.setup(npoints=11)
+        vna.measure_S11()
+        assert vna.timer.phases == []
+        vna.timer.enabled = True
+        vna.measure_S11()
+        assert vna.timer.stats("measure_S11")["count"] == 1
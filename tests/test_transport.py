@@ -0,0 +1,158 @@
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from cmt_vna import transport
+from cmt_vna.transport import (
+    SocketResource,
+    format_ascii_array,
+    parse_ascii_array,
+)
+
+
+class _EchoServer:
+    """
+    One-connection SCPI responder: answers every query line with the
+    next canned reply, ignores writes.
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.received = []
+        self._lsock = socket.create_server(("127.0.0.1", 0))
+        self.port = self._lsock.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        conn, _ = self._lsock.accept()
+        with conn, conn.makefile("rb") as f:
+            for line in f:
+                cmd = line.decode().strip()
+                self.received.append(cmd)
+                if cmd.endswith("?"):
+                    conn.sendall(self.replies.pop(0) + b"\n")
+
+    def close(self):
+        self._lsock.close()
+
+
+def test_parse_ascii_array_roundtrip():
+    values = np.random.default_rng(0).normal(size=101)
+    parsed = parse_ascii_array(format_ascii_array(values))
+    assert parsed.dtype == np.float64
+    np.testing.assert_allclose(parsed, values, rtol=1e-12)
+
+
+def test_parse_ascii_array_into_out():
+    out = np.empty(4)
+    res = parse_ascii_array(b"1,2.5,-3e-1,4E+00\n", out=out)
+    assert res is out
+    np.testing.assert_array_equal(out, [1, 2.5, -0.3, 4])
+
+
+def test_parse_ascii_array_into_complex_view():
+    # interleaved re/im parse straight into a complex array
+    gamma = np.empty(2, dtype=complex)
+    parse_ascii_array(b"1,2,3,4", out=gamma.view(np.float64))
+    np.testing.assert_array_equal(gamma, [1 + 2j, 3 + 4j])
+
+
+def test_parse_ascii_array_size_mismatch():
+    with pytest.raises(ValueError, match="Expected 3 values"):
+        parse_ascii_array(b"1,2", out=np.empty(3))
+
+
+def test_parse_ascii_array_in_chunks(monkeypatch):
+    monkeypatch.setattr(transport, "PARSE_CHUNK", 100)
+    values = np.random.default_rng(1).normal(size=(50, 2))
+    raw = memoryview(bytearray(format_ascii_array(values) + b"\n"))
+    out = np.empty((50, 2))
+    assert parse_ascii_array(raw, out=out) is out
+    np.testing.assert_allclose(out, values, rtol=1e-12)
+    # non-contiguous output and str input
+    out = np.empty((50, 4))[:, ::2]
+    parse_ascii_array(str(raw, "ascii"), out=out)
+    np.testing.assert_allclose(out, values, rtol=1e-12)
+    with pytest.raises(ValueError, match="Expected 99 values.*got 100"):
+        parse_ascii_array(raw, out=np.empty(99))
+
+
+class TestSocketResource:
+    def test_query_and_write(self):
+        server = _EchoServer([b"CMT,R60", b"1"])
+        s = SocketResource("127.0.0.1", server.port, timeout=2000)
+        try:
+            s.write("TRIG:SOUR BUS\n")
+            assert s.query("*IDN?\n") == "CMT,R60"
+            assert s.query("*OPC?") == "1"
+        finally:
+            s.close()
+            server.close()
+        assert server.received == ["TRIG:SOUR BUS", "*IDN?", "*OPC?"]
+
+    def test_large_reply_grows_and_reuses_buffer(self):
+        values = np.arange(20000, dtype=float)
+        payload = format_ascii_array(values)
+        server = _EchoServer([payload, payload])
+        s = SocketResource("127.0.0.1", server.port, buffer_size=64)
+        try:
+            first = s.query_ascii_array("CALC:DATA:SDAT?")
+            size = len(s._buf)
+            out = np.empty(values.size)
+            second = s.query_ascii_array("CALC:DATA:SDAT?", out=out)
+        finally:
+            s.close()
+            server.close()
+        np.testing.assert_array_equal(first, values)
+        assert second is out
+        np.testing.assert_array_equal(out, values)
+        assert size >= len(payload)
+        assert len(s._buf) == size  # no regrowth on the second read
+
+    def test_read_raw_is_buffer_view(self):
+        server = _EchoServer([b"1,2,3"])
+        s = SocketResource("127.0.0.1", server.port)
+        try:
+            raw = s.query_raw("SENS1:FREQ:DATA?")
+        finally:
+            s.close()
+            server.close()
+        assert raw.readonly and raw.obj is s._buf
+        assert bytes(raw) == b"1,2,3"
+
+    def test_replies_in_one_packet(self):
+        # both replies arrive in one send; the second must not be lost
+        server = _EchoServer([b"1\n+1.0E+06", b"0"])
+        s = SocketResource("127.0.0.1", server.port, buffer_size=4)
+        try:
+            assert s.query("*OPC?") == "1"
+            assert bytes(s.read_raw()) == b"+1.0E+06"
+            assert s.query("*ESR?") == "0"
+        finally:
+            s.close()
+            server.close()
+
+    def test_query_ascii_values_container(self):
+        server = _EchoServer([b"1,2,3"])
+        s = SocketResource("127.0.0.1", server.port)
+        try:
+            vals = s.query_ascii_values("SENS1:FREQ:DATA?", container=list)
+        finally:
+            s.close()
+            server.close()
+        assert vals == [1.0, 2.0, 3.0]
+
+    def test_timeout(self):
+        # the server never answers FORM:DATA?, like the real cmtvna
+        server = _EchoServer([])
+        s = SocketResource("127.0.0.1", server.port, timeout=100)
+        try:
+            s.write("FORM:DATA REAL")
+            with pytest.raises(TimeoutError):
+                s.read_raw()
+        finally:
+            s.close()
+            server.close()
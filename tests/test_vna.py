@@ -5,8 +5,17 @@ import tempfile
 import time
 from unittest.mock import MagicMock, call, patch
 
-from cmt_vna.vna import IP, PORT, DEFAULT_FLAG_THRESHOLDS, lin2dB, mlin
-from cmt_vna.testing import DummyResource, DummyVNA
+from cmt_vna.vna import (
+    IP,
+    PORT,
+    DEFAULT_FLAG_THRESHOLDS,
+    flag_sweeps,
+    lin2dB,
+    mean_dB,
+    mlin,
+)
+from cmt_vna import calkit
+from cmt_vna.testing import DummyResource, DummySocketResource, DummyVNA
 
 
 class TestDummyVNA:
@@ -496,6 +505,24 @@ class TestDbHelpers:
         arr = np.array([1.0, 0.1])
         assert mlin(arr) == pytest.approx(np.mean([0.0, -20.0]))
 
+    def test_mean_dB_per_sweep(self):
+        rng = np.random.default_rng(0)
+        stack = rng.normal(size=(4, 32)) + 1j * rng.normal(size=(4, 32))
+        expected = np.mean(lin2dB(stack), axis=-1)
+        np.testing.assert_allclose(mean_dB(stack), expected)
+        assert mean_dB(stack.astype(np.complex64)).dtype == np.float32
+        assert mlin(stack) == pytest.approx(np.mean(lin2dB(stack)))
+
+    def test_flag_sweeps_batch(self):
+        stack = np.array([_const_lin(db) for db in (-1, -10, 0.5, -4)])
+        np.testing.assert_array_equal(
+            flag_sweeps(stack, "VNAO"), [True, False, False, True]
+        )
+        np.testing.assert_array_equal(
+            flag_sweeps(stack, "VNAO", thresholds={"VNAO": (-20, None)}),
+            [True, True, True, True],
+        )
+
 
 class TestActiveFlag:
     def setup_method(self):
@@ -591,3 +618,626 @@ class TestAsciiTransfer:
         # the driver must not regress to binary reads: the dummy, like
         # the real server, only serves ASCII
         assert not hasattr(DummyResource(), "query_binary_values")
+
+
+class TestSocketTransport:
+    """DummyVNA on the raw-socket transport's bulk parse path."""
+
+    def test_unknown_transport_raises(self):
+        with pytest.raises(ValueError, match="Unknown transport"):
+            DummyVNA(transport="gpib")
+
+    def test_socket_transport_uses_socket_resource(self):
+        vna = DummyVNA(transport="socket")
+        assert vna.transport == "socket"
+        assert isinstance(vna.s, DummySocketResource)
+        assert isinstance(DummyVNA().s, DummyResource)
+        assert not isinstance(DummyVNA().s, DummySocketResource)
+
+    def test_measure_s11_matches_visa_path(self):
+        visa = DummyVNA()
+        sock = DummyVNA(transport="socket")
+        for vna in (visa, sock):
+            vna.setup(npoints=101)
+        s11 = sock.measure_S11()
+        assert s11.dtype == complex
+        np.testing.assert_array_equal(s11, visa.measure_S11())
+        np.testing.assert_allclose(sock.freqs, visa.freqs)
+
+    def test_read_array_into_out(self):
+        vna = DummyVNA(transport="socket")
+        vna.setup(npoints=11)
+        out = np.empty(11)
+        res = vna._read_array("SENS1:FREQ:DATA?", out=out)
+        assert res is out
+        np.testing.assert_allclose(out, np.linspace(1e6, 250e6, 11))
+
+
+class TestPipelinedSequence:
+    def setup_method(self):
+        self.switch_fn = MagicMock()
+        self.vna = DummyVNA(switch_fn=self.switch_fn)
+        self.vna.setup(npoints=101)
+
+    def test_serial_and_pipelined_match(self):
+        piped = self.vna.measure_sequence(
+            ["VNAO", "VNAS", "VNAL"], pipelined=True
+        )
+        calls = self.switch_fn.call_args_list
+        self.switch_fn.reset_mock()
+        serial = self.vna.measure_sequence(
+            ["VNAO", "VNAS", "VNAL"], pipelined=False
+        )
+        assert self.switch_fn.call_args_list == calls
+        assert list(piped) == list(serial) == ["VNAO", "VNAS", "VNAL"]
+        for key in piped:
+            np.testing.assert_array_equal(piped[key], serial[key])
+
+    def test_single_opc_per_sweep(self):
+        with patch.object(
+            self.vna.s, "query", wraps=self.vna.s.query
+        ) as m_query:
+            self.vna.measure_S11()
+        m_query.assert_called_once_with("*OPC?\n")
+
+    def test_switch_overlaps_readout(self):
+        self.vna.switch_fn = lambda state: time.sleep(0.1)
+        read = self.vna._read_s11
+
+        def slow_read():
+            time.sleep(0.1)
+            return read()
+
+        self.vna._read_s11 = slow_read
+        self.vna.measure_sequence(["VNAO", "VNAS", "VNAL"], pipelined=True)
+        timing = self.vna.last_sequence_timing
+        assert set(timing) == {
+            "switch",
+            "sweep",
+            "readout",
+            "wall",
+            "serial",
+            "saved",
+        }
+        # two of the three switches hide behind a readout
+        assert timing["saved"] > 0.15
+        assert timing["wall"] < timing["serial"]
+
+        self.vna.measure_sequence(["VNAO", "VNAS", "VNAL"], pipelined=False)
+        assert self.vna.last_sequence_timing["saved"] < 0.05
+
+    def test_pipelined_switch_failure_aborts_before_next_sweep(self):
+        self.vna.switch_fn = MagicMock(
+            side_effect=[None, RuntimeError("switch boom")]
+        )
+        with (
+            patch.object(
+                self.vna, "_trigger", wraps=self.vna._trigger
+            ) as m_trig,
+            pytest.raises(RuntimeError, match="switch boom"),
+        ):
+            self.vna.measure_sequence(["VNAO", "VNAS", "VNAL"], pipelined=True)
+        assert m_trig.call_count == 1
+        assert self.vna.switch_fn.call_count == 2
+
+    def test_readout_failure_waits_for_switch(self):
+        done = []
+
+        def switch(state):
+            time.sleep(0.05)
+            done.append(state)
+
+        self.vna.switch_fn = switch
+        with (
+            patch.object(
+                self.vna, "_read_s11", side_effect=TimeoutError("readout")
+            ),
+            pytest.raises(TimeoutError, match="readout"),
+        ):
+            self.vna._run_sequence(["VNAO", "VNAS"], pipelined=True)
+        # the switch in flight finished before the error propagated
+        assert done == ["VNAO", "VNAS"]
+
+    def test_duplicate_states_raise(self):
+        with pytest.raises(ValueError, match="Duplicate states"):
+            self.vna.measure_sequence(["VNAO", "VNAO"])
+
+    def test_repeated_state_switches_once(self):
+        sweeps = self.vna._run_sequence(["VNAO", "VNAO", "VNAS"])
+        assert len(sweeps) == 3
+        assert self.switch_fn.call_args_list == [call("VNAO"), call("VNAS")]
+
+    def test_repeat_and_current_state(self):
+        s11 = self.vna.measure_sequence(
+            ["VNAO", "VNAS"], repeat={"VNAO": 2}, current_state="VNAO"
+        )
+        assert s11["VNAO"].shape == (2, len(self.vna.freqs))
+        assert s11["VNAS"].shape == (1, len(self.vna.freqs))
+        assert self.switch_fn.call_args_list == [call("VNAS")]
+        assert (
+            self.vna.measure_sequence(["VNAL"], repeat=3)["VNAL"].shape[0] == 3
+        )
+        with pytest.raises(ValueError, match="Repeats must be positive"):
+            self.vna.measure_sequence(["VNAO"], repeat=0)
+
+    def test_pipelined_attribute_default(self):
+        assert self.vna.pipelined is False  # opt-in
+        vna = DummyVNA(switch_fn=self.switch_fn, pipelined=True)
+        vna.measure_rec()
+        assert vna.last_sequence_timing["saved"] < 0.05
+
+
+class TestSequenceFlags:
+    def setup_method(self):
+        self.switch_fn = MagicMock()
+        self.vna = DummyVNA(switch_fn=self.switch_fn)
+        self.vna.setup(npoints=16)
+        self.good = {
+            "VNAO": _const_lin(-1),
+            "VNAS": _const_lin(-1),
+            "VNAL": _const_lin(-35),
+        }
+
+    def _sweeps(self, *dbs):
+        """Patch readout to return sweeps at the given dB levels."""
+        return patch.object(
+            self.vna,
+            "_read_s11",
+            side_effect=[_const_lin(db) for db in dbs],
+        )
+
+    def test_off_by_default(self):
+        with self._sweeps(-20, -20, -20):
+            osl = self.vna.measure_OSL()
+        assert len(osl) == 3
+        assert self.vna.last_sequence_flags is None
+
+    def test_record(self):
+        with self._sweeps(-20, -1, -35):
+            osl = self.vna.measure_sequence(
+                list(self.good), flag_policy="record"
+            )
+        assert len(osl) == 3
+        assert self.vna.last_sequence_flags == {
+            "VNAO": False,
+            "VNAS": True,
+            "VNAL": True,
+        }
+
+    def test_abort_stops_before_next_sweep(self):
+        self.vna.flag_policy = "abort"
+        with (
+            self._sweeps(-20, -1, -35),
+            patch.object(
+                self.vna, "_trigger", wraps=self.vna._trigger
+            ) as m_trig,
+            pytest.raises(RuntimeError, match="VNAO at -20.0 dB"),
+        ):
+            self.vna.measure_OSL()
+        assert m_trig.call_count == 1
+        assert self.switch_fn.call_args_list == [call("VNAO")]
+        assert self.vna.last_sequence_flags == {"VNAO": False}
+
+    def test_abort_collects_pipelined_switch(self):
+        self.vna.flag_policy = "abort"
+        self.vna.pipelined = True
+        with (
+            self._sweeps(-20, -1, -35),
+            pytest.raises(RuntimeError, match="VNAO at -20.0 dB"),
+        ):
+            self.vna.measure_OSL()
+        # only the pipelined switch to the next standard was started
+        assert self.switch_fn.call_args_list == [call("VNAO"), call("VNAS")]
+        assert self.vna.last_sequence_timing["switch"] > 0
+        self.switch_fn.side_effect = [None, RuntimeError("switch boom")]
+        with (
+            self._sweeps(-20, -1, -35),
+            pytest.raises(RuntimeError, match="switch boom"),
+        ):
+            self.vna.measure_OSL()
+
+    def test_retry_starts_over(self):
+        vna = DummyVNA(switch_fn=self.switch_fn, flag_policy="retry")
+        with patch.object(
+            vna,
+            "_read_s11",
+            side_effect=[_const_lin(db) for db in (-1, -10, -1, -1, -35)],
+        ):
+            osl = vna.measure_OSL()
+        assert mlin(osl["VNAS"]) == pytest.approx(-1)
+        assert [c.args[0] for c in self.switch_fn.call_args_list] == [
+            "VNAO",
+            "VNAS",
+            "VNAO",
+            "VNAS",
+            "VNAL",
+        ]
+        assert all(vna.last_sequence_flags.values())
+
+    def test_retry_gives_up(self):
+        self.vna.flag_retries = 2
+        with (
+            self._sweeps(1, 1, 1),
+            pytest.raises(RuntimeError, match="after 3 attempt"),
+        ):
+            self.vna.measure_sequence(["VNARF"], flag_policy="retry")
+
+    def test_unflagged_states_and_overrides(self):
+        self.vna.flag_thresholds = {"ant": (None, -20)}
+        with (
+            self._sweeps(-10, 5),
+            pytest.raises(RuntimeError, match="VNAANT"),
+        ):
+            self.vna.measure_sequence(
+                ["VNAAMB", "VNAANT"], flag_policy="abort"
+            )
+        assert self.vna.last_sequence_flags == {"VNAANT": False}
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError, match="Unknown flag policy"):
+            self.vna.measure_sequence(["VNAO"], flag_policy="ignore")
+        with pytest.raises(ValueError, match="Unknown flag policy"):
+            DummyVNA(flag_policy="ignore")
+
+
+class TestMeasureS11Batch:
+    def setup_method(self):
+        self.vna = DummyVNA()
+        self.vna.setup(npoints=101)
+
+    def test_shapes_and_timestamps(self):
+        data, times = self.vna.measure_S11_batch(5)
+        assert data.shape == (5, 101)
+        assert data.dtype == np.complex128
+        assert times.shape == (5,)
+        assert times.dtype == np.float64
+        assert np.all(np.diff(times) >= 0)
+        assert self.vna.data == {}  # nothing stored per sweep
+
+    def test_matches_measure_s11(self):
+        for transport in ("visa", "socket"):
+            vna = DummyVNA(transport=transport)
+            vna.setup(npoints=11)
+            data, _ = vna.measure_S11_batch(2)
+            np.testing.assert_array_equal(data[1], vna.measure_S11())
+
+    def test_default_npoints_from_freqs(self):
+        vna = DummyVNA()  # npoints never set, resource default is 1000
+        data, _ = vna.measure_S11_batch(1)
+        assert data.shape == (1, 1000)
+
+    def test_push_config_disables_averaging(self):
+        assert self.vna.averages == 1
+
+    def test_instrument_averaging(self):
+        with (
+            patch.object(self.vna.s, "write", wraps=self.vna.s.write) as m_w,
+            patch.object(
+                self.vna, "_trigger", wraps=self.vna._trigger
+            ) as m_trig,
+        ):
+            data, _ = self.vna.measure_S11_batch(3, averages=4)
+        assert data.shape == (3, 101)
+        assert m_trig.call_count == 3  # one averaged sweep per row
+        writes = [c.args[0].strip() for c in m_w.call_args_list]
+        assert writes[:2] == ["SENS1:AVER:COUN 4", "SENS1:AVER ON"]
+        assert writes.count("SENS1:AVER:CLE") == 3
+        assert writes.count("TRIG:SEQ:SING") == 12  # 4 sweeps per row
+        # averaging is only on for the batch
+        assert writes[-2:] == ["SENS1:AVER:COUN 1", "SENS1:AVER OFF"]
+        assert self.vna.averages == 1
+        assert self.vna.header["averages"] == 1
+
+    def test_persistent_averaging_clears_per_measurement(self):
+        self.vna.averages = 3
+        s = self.vna.s
+        with patch.object(s, "write", wraps=s.write) as m_w:
+            self.vna.measure_S11()
+        writes = [c.args[0].strip() for c in m_w.call_args_list]
+        assert writes == ["SENS1:AVER:CLE"] + ["TRIG:SEQ:SING"] * 3
+
+    def test_averaging_off(self):
+        self.vna.averages = 4
+        s = self.vna.s
+        with patch.object(s, "write", wraps=s.write) as m_w:
+            self.vna.averages = 1
+        m_w.assert_has_calls(
+            [call("SENS1:AVER:COUN 1\n"), call("SENS1:AVER OFF\n")]
+        )
+
+
+class TestFreqsCache:
+    def setup_method(self):
+        self.vna = DummyVNA()
+        self.vna.setup(1e6, 250e6, 1000, 100, -5)
+
+    def _count_freq_queries(self, fn):
+        s = self.vna.s
+        with patch.object(
+            s, "query_ascii_values", wraps=s.query_ascii_values
+        ) as m_q:
+            fn()
+        return m_q.call_count
+
+    def test_header_costs_no_io(self):
+        def access():
+            for _ in range(5):
+                assert self.vna.header["freqs"] is self.vna.freqs
+
+        assert self._count_freq_queries(access) == 0
+
+    def test_setters_invalidate(self):
+        for attr, value in (
+            ("fstart", 2e6),
+            ("fstop", 200e6),
+            ("npoints", 11),
+        ):
+
+            def change(attr=attr, value=value):
+                setattr(self.vna, attr, value)
+                assert self.vna.freqs is self.vna.freqs
+
+            assert self._count_freq_queries(change) == 1
+        np.testing.assert_array_equal(
+            self.vna.freqs, np.linspace(2e6, 200e6, 11)
+        )
+
+    def test_unrelated_setter_keeps_cache(self):
+        def change():
+            self.vna.ifbw = 1000
+            self.vna.power_dBm = 0
+            assert self.vna.freqs.size == 1000
+
+        assert self._count_freq_queries(change) == 0
+
+    def test_cache_is_read_only(self):
+        with pytest.raises(ValueError):
+            self.vna.freqs[0] = 0
+
+    def test_instrument_axis_wins_on_mismatch(self):
+        # instrument clips the stop frequency the driver asked for
+        self.vna.fstop = 300e6
+        self.vna.s._fstop = 250e6
+        np.testing.assert_allclose(
+            self.vna.freqs, np.linspace(1e6, 250e6, 1000)
+        )
+
+
+class _ClampingResource(DummyResource):
+    """Instrument that clips the stop frequency at 250 MHz."""
+
+    def write(self, command):
+        super().write(command)
+        self._fstop = min(self._fstop, 250e6)
+
+
+class TestProfiles:
+    def setup_method(self):
+        self.vna = DummyVNA()
+        self.vna.setup(1e6, 250e6, 1000, 100, -5)
+
+    def _io(self, fn):
+        s = self.vna.s
+        with (
+            patch.object(s, "write", wraps=s.write) as m_w,
+            patch.object(s, "query", wraps=s.query) as m_q,
+        ):
+            fn()
+        return m_w, m_q
+
+    def test_push_config_is_one_write(self):
+        vna = DummyVNA()
+        s = MagicMock()
+        vna._push_config(s)
+        s.write.assert_called_once_with(
+            "SENS1:AVER:COUN 1;:SENS1:AVER OFF;:SWE:TYPE LIN;:TRIG:SOUR BUS\n"
+        )
+
+    def test_setup_is_one_round_trip(self):
+        vna = DummyVNA()
+        s = vna.s
+        with (
+            patch.object(s, "write", wraps=s.write) as m_w,
+            patch.object(s, "query", wraps=s.query) as m_q,
+        ):
+            vna.setup(2e6, 200e6, 11, 1000, -10)
+        m_w.assert_called_once_with(
+            "SOUR:POW -10;:SENS1:FREQ:STAR 2000000.0 HZ;"
+            ":SENS1:FREQ:STOP 200000000.0 HZ;:SENS1:SWE:POIN 11;"
+            ":SENS1:BWID 1000 HZ\n"
+        )
+        m_q.assert_called_once()
+        assert vna.header["npoints"] == 11
+        assert vna.power_dBm == -10
+
+    def test_setup_unchanged_sends_nothing(self):
+        m_w, m_q = self._io(lambda: self.vna.setup(1e6, 250e6, 1000, 100, -5))
+        m_w.assert_not_called()
+        m_q.assert_not_called()
+
+    def test_capture_profile(self):
+        # someone changed the instrument behind the driver's back
+        self.vna.s.write("SENS1:SWE:POIN 201;:SENS1:AVER:COUN 8")
+        profile = self.vna.capture_profile("survey")
+        assert profile == {
+            "power_dBm": -5.0,
+            "fstart": 1e6,
+            "fstop": 250e6,
+            "npoints": 201,
+            "ifbw": 100.0,
+            "averages": 8,
+        }
+        assert self.vna.profiles["survey"] == profile
+        assert self.vna.npoints == 201
+        assert len(self.vna.freqs) == 201
+
+    def test_switch_profiles_sends_only_differences(self):
+        self.vna.profiles["lo"] = self.vna.capture_profile()
+        hi = dict(self.vna.profiles["lo"], fstart=50e6, averages=4)
+        self.vna.profiles["hi"] = hi
+        assert self.vna.diff_profile("hi") == {"fstart": 50e6, "averages": 4}
+
+        m_w, m_q = self._io(lambda: self.vna.apply_profile("hi"))
+        m_w.assert_called_once_with(
+            "SENS1:FREQ:STAR 50000000.0 HZ;:SENS1:AVER:COUN 4;:SENS1:AVER ON\n"
+        )
+        m_q.assert_called_once_with("SENS1:FREQ:STAR?;:SENS1:AVER:COUN?\n")
+        assert self.vna.fstart == 50e6
+        assert self.vna.freqs[0] == 50e6
+
+        changed = self.vna.apply_profile("lo")
+        assert changed == {"fstart": 1e6, "averages": 1}
+        assert self.vna.apply_profile("lo") == {}
+
+    def test_readback_mismatch_warns(self):
+        class ClampingVNA(DummyVNA):
+            _resource_cls = _ClampingResource
+
+        vna = ClampingVNA()
+        with pytest.warns(UserWarning, match="did not apply settings"):
+            freqs = vna.setup(fstop=300e6)
+        # the cached state and axis follow the instrument
+        assert vna.fstop == 250e6
+        assert freqs[-1] == 250e6
+        assert vna.npoints == 1000
+
+    def test_readback_mismatch_raises_if_strict(self):
+        class ClampingVNA(DummyVNA):
+            _resource_cls = _ClampingResource
+
+        vna = ClampingVNA()
+        with pytest.raises(RuntimeError, match="did not apply settings"):
+            vna.setup(fstop=300e6, strict=True)
+        assert vna.fstop == 250e6
+        with pytest.raises(RuntimeError, match="did not apply settings"):
+            vna.apply_profile({"fstop": 260e6}, strict=True)
+
+    def test_unknown_profile(self):
+        with pytest.raises(KeyError):
+            self.vna.apply_profile("nope")
+        with pytest.raises(ValueError, match="Unknown settings"):
+            self.vna.apply_profile({"span": 1e6})
+
+
+def _error_network(f):
+    """One-port error terms with 2 ns and 5 ns delays."""
+    return np.array(
+        [
+            0.05 * np.exp(-2j * np.pi * f * 2e-9),
+            0.9 * np.exp(-2j * np.pi * f * 5e-9),
+            0.1 + 0.02j + 0 * f,
+        ]
+    )
+
+
+class TestCalibration:
+    def setup_method(self):
+        self.vna = DummyVNA(switch_fn=MagicMock())
+        self.vna.setup(fstart=10e6, fstop=200e6, npoints=381)
+        self.sprms = _error_network(self.vna.freqs)
+        kit = calkit.S911T(freq_Hz=self.vna.freqs)
+        osl = calkit.embed_sparams(self.sprms, kit.std_gamma)
+        osl = dict(zip(["VNAO", "VNAS", "VNAL"], osl))
+        with patch.object(self.vna, "measure_OSL", return_value=osl):
+            self.vna.add_OSL()
+
+    def test_add_osl_solves_error_model(self):
+        assert self.vna.error_models == {}  # solved on first use
+        model = self.vna.error_model()
+        np.testing.assert_allclose(model.sparams, self.sprms, atol=1e-9)
+        assert self.vna.error_models["vna"] is model
+        assert self.vna.cal_model() is model  # same grid, no interpolation
+        with pytest.raises(KeyError, match="run add_OSL"):
+            self.vna.cal_model("cable")
+
+    def test_broken_osl_raises(self):
+        osl = dict.fromkeys(["VNAO", "VNAS", "VNAL"], np.zeros(381))
+        with patch.object(self.vna, "measure_OSL", return_value=osl):
+            self.vna.add_OSL("broken")
+        with pytest.raises(np.linalg.LinAlgError, match="'broken'"):
+            self.vna.calibrate(np.zeros(381), std_key="broken")
+        assert "broken" not in self.vna.error_models
+
+    def test_calibrate_on_sub_grid(self):
+        self.vna.setup(fstart=50e6, fstop=150e6, npoints=101)
+        f = self.vna.freqs
+        dut = np.array(
+            [0.3 * np.exp(1j * np.linspace(0, 2, 101)), 0.01 + 0 * f]
+        )
+        meas = calkit.embed_sparams(_error_network(f), dut)
+        cal = self.vna.calibrate(meas)
+        model = self.vna.cal_model()
+        assert model.interp_error.shape == (3, 101)
+        assert np.abs(cal - dut).max() < 1e-3
+        assert self.vna.cal_model() is model  # cached for the grid
+        with pytest.raises(ValueError, match="outside the calibrated band"):
+            self.vna.calibrate(meas, freqs=f * 2)
+
+    def test_single_precision_matches_double(self):
+        vna = DummyVNA(switch_fn=MagicMock(), precision="single")
+        vna.setup(fstart=10e6, fstop=200e6, npoints=381)
+        kit = calkit.S911T(freq_Hz=vna.freqs)
+        osl = calkit.embed_sparams(self.sprms, kit.std_gamma)
+        osl = dict(zip(["VNAO", "VNAS", "VNAL"], osl.astype(np.complex64)))
+        with patch.object(vna, "measure_OSL", return_value=osl):
+            vna.add_OSL()
+        assert vna.data["vna"].dtype == np.complex64
+        assert vna.error_model().precision == "single"
+        dut = 0.3 * np.exp(1j * np.linspace(0, 2, 381))
+        meas = calkit.embed_sparams(self.sprms, dut)
+        cal = vna.calibrate(meas.astype(np.complex64))
+        assert cal.dtype == np.complex64
+        np.testing.assert_allclose(cal, self.vna.calibrate(meas), atol=1e-5)
+
+
+class _SweepResource(DummyResource):
+    """DummyResource whose S11 sweeps are a fixed nonzero trace."""
+
+    def query_ascii_values(self, command, container=list):
+        if command.strip() == "CALC:DATA:SDAT?":
+            n = 2 * self._npoints
+            return container(np.sin(np.arange(n)) / 3)
+        return super().query_ascii_values(command, container=container)
+
+
+class _SweepSocketResource(DummySocketResource, _SweepResource):
+    pass
+
+
+class _SweepVNA(DummyVNA):
+    _resource_cls = _SweepResource
+    _socket_resource_cls = _SweepSocketResource
+
+
+class TestSinglePrecision:
+    def test_unknown_precision_raises(self):
+        with pytest.raises(ValueError, match="Unknown precision"):
+            DummyVNA(precision="half")
+
+    @pytest.mark.parametrize("transport", ["visa", "socket"])
+    def test_sweeps_are_complex64(self, transport):
+        double = _SweepVNA(transport=transport)
+        single = _SweepVNA(transport=transport, precision="single")
+        for vna in (double, single):
+            vna.setup(npoints=101)
+        ref = double.measure_S11()
+        s11 = single.measure_S11()
+        assert s11.dtype == np.complex64
+        np.testing.assert_allclose(s11, ref, rtol=1e-6)
+        data, _ = single.measure_S11_batch(2)
+        assert data.dtype == np.complex64
+        np.testing.assert_array_equal(data[1], s11)
+        with single.stream(count=2) as stream:
+            stream.wait()
+        assert stream.latest(1)[1].dtype == np.complex64
+
+    def test_write_data_halves_size(self, tmp_path):
+        vna = _SweepVNA(precision="single")
+        vna.setup(npoints=101)
+        vna.read_data(num_data=2)
+        vna.write_data(outdir=tmp_path)
+        (fname,) = tmp_path.glob("*.npz")
+        with np.load(fname) as f:
+            gammas = [f[k] for k in f.files if k.endswith("_gamma")]
+        assert gammas[0].dtype == np.complex64
+        assert gammas[0].nbytes == 101 * 8